@@ -0,0 +1,490 @@
+"""HTTP/JSON API over the todo store, for scripts and other services.
+
+    python api.py --port 8765 [--backend sqlite] [--journal]
+
+Endpoints (all bodies are JSON):
+
+    GET    /todos?category=Work&completed=no&order_by=due_date&limit=25
+                              query the todos (the file_ops.query fields)
+    POST   /query             the same, with the spec as a JSON body
+    POST   /todos             add a todo: {"text": ..., "category": ..., ...}
+    GET    /todos/ID          one todo
+    PATCH  /todos/ID          change fields of a todo
+    DELETE /todos/ID          delete a todo
+    POST   /todos/bulk        {"ops": [{"op": "add", "todo": {...}},
+                                       {"op": "update", "id": 3, "changes": {...}},
+                                       {"op": "delete", "id": 4}]}, applied atomically
+    GET    /stats             running totals, as file_ops.get_stats()
+    GET    /categories        categories in use
+
+One process owns the store. Reads are answered on the event loop; every
+GET carries an ETag naming the store revision, so a client that sends it
+back in If-None-Match gets 304 without a body until the todos change.
+Revisions count from the start of each process, so ETags also carry a
+random epoch drawn when the server starts, and none survives a restart.
+Writes are queued to a single writer, which commits all writes waiting
+at that moment in one store transaction (group commit). A PATCH, DELETE
+or bulk request with If-Match is refused with 412 if the store revision
+has moved on. A server works on one named list, chosen with --list.
+"""
+import json
+import signal
+import secrets
+import asyncio
+import argparse
+from datetime import date, datetime
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qsl
+from typing import List, Dict, Any, Optional, Tuple, Callable
+import file_ops
+import archive
+from models import Todo, to_json
+
+HOST = '127.0.0.1'
+PORT = 8765
+# Largest request body accepted, in bytes
+MAX_BODY = 10 * 1024 * 1024
+# Most queued writes committed in one transaction
+MAX_GROUP = 256
+# Encoded GET responses kept for the current revision
+CACHE_ENTRIES = 256
+
+PRIORITIES = ('High', 'Medium', 'Low')
+# Fields a client may set on a todo, with their checks
+TODO_FIELDS = ('text', 'completed', 'category', 'priority', 'due_date')
+
+
+class ApiError(Exception):
+    """A request the API refuses, answered with status and a JSON error message"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _todo_changes(body: Any, partial: bool) -> Dict[str, Any]:
+    """Validate a todo (or, if partial, a set of changes) sent by a client"""
+    if not isinstance(body, dict):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "expected a JSON object")
+    unknown = sorted(set(body) - set(TODO_FIELDS))
+    if unknown:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"unknown field(s): {', '.join(unknown)}")
+    if not partial and 'text' not in body:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "text is required")
+    changes = {}
+    for field, value in body.items():
+        if field == 'text':
+            if not isinstance(value, str) or not value.strip():
+                raise ApiError(HTTPStatus.BAD_REQUEST, "text must be a non-empty string")
+            value = value.strip()
+        elif field == 'completed':
+            if not isinstance(value, bool):
+                raise ApiError(HTTPStatus.BAD_REQUEST, "completed must be true or false")
+        elif field == 'category':
+            if not isinstance(value, str) or not value.strip():
+                raise ApiError(HTTPStatus.BAD_REQUEST, "category must be a non-empty string")
+            value = value.strip()
+        elif field == 'priority':
+            if value not in PRIORITIES:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"priority must be one of: {', '.join(PRIORITIES)}")
+        elif field == 'due_date' and value is not None:
+            try:
+                value = date.fromisoformat(value).isoformat()
+            except (TypeError, ValueError):
+                raise ApiError(HTTPStatus.BAD_REQUEST, "due_date must be an ISO date or null") from None
+        changes[field] = value
+    return changes
+
+
+def _new_todo(fields: Dict[str, Any]) -> Todo:
+    # Same defaults as file_ops.add_todo; the store allocates the id
+    return Todo(id=None, text=fields['text'], completed=fields.get('completed', False),
+                created_at=datetime.now(), category=fields.get('category', 'General'),
+                priority=fields.get('priority', 'Medium'), due_date=fields.get('due_date'))
+
+
+def _todo_id(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "id must be a positive integer")
+    return value
+
+
+class Write:
+    """One queued write request: what to stage in the transaction and how to answer it"""
+
+    __slots__ = ('kind', 'payload', 'if_match', 'future')
+
+    def __init__(self, kind: str, payload: Any, if_match: Optional[str], future: asyncio.Future):
+        self.kind = kind
+        self.payload = payload
+        self.if_match = if_match
+        self.future = future
+
+    def stage(self, batch, exists: Callable[[int], bool], removed: set) -> Callable[[], Tuple[int, Any]]:
+        """Add this request's records to batch; return what produces its answer after the commit"""
+        store = batch.store
+        if self.kind == 'add':
+            todo = _new_todo(self.payload)
+            batch.add(todo)
+            # The store assigns the id when the batch is applied
+            return lambda: (HTTPStatus.CREATED, todo)
+        if self.kind == 'update':
+            todo_id, changes = self.payload
+            if not exists(todo_id):
+                return lambda: (HTTPStatus.NOT_FOUND, {'error': f"no todo with id {todo_id}"})
+            batch.update(todo_id, **changes)
+            return lambda: (HTTPStatus.OK, store.get(todo_id))
+        if self.kind == 'delete':
+            todo_id = self.payload
+            if not exists(todo_id):
+                return lambda: (HTTPStatus.NOT_FOUND, {'error': f"no todo with id {todo_id}"})
+            batch.delete(todo_id)
+            removed.add(todo_id)
+            return lambda: (HTTPStatus.NO_CONTENT, None)
+        # bulk
+        applied, added = 0, []
+        for op in self.payload:
+            if op['op'] == 'add':
+                todo = _new_todo(op['todo'])
+                batch.add(todo)
+                added.append(todo)
+            elif not exists(op['id']):
+                continue
+            elif op['op'] == 'update':
+                batch.update(op['id'], **op['changes'])
+            else:
+                batch.delete(op['id'])
+                removed.add(op['id'])
+            applied += 1
+        return lambda: (HTTPStatus.OK, {'applied': applied, 'added': [todo['id'] for todo in added]})
+
+
+class TodoApi:
+    """The API's request handling, its writer and its response cache"""
+
+    def __init__(self):
+        self.store = file_ops.get_store()
+        self.queue: 'asyncio.Queue[Write]' = asyncio.Queue()
+        self.cache: Dict[str, bytes] = {}
+        self.cache_revision: Optional[int] = None
+        # Tells this process's revisions apart from those of an earlier server
+        self.epoch = secrets.token_hex(8)
+        self.commits = 0
+        self.writes = 0
+
+    # Writes
+
+    async def writer(self):
+        """Commit queued writes, everything waiting at once in a single transaction"""
+        while True:
+            group = [await self.queue.get()]
+            while len(group) < MAX_GROUP and not self.queue.empty():
+                group.append(self.queue.get_nowait())
+            # Committed on the event loop: a commit is a single short store
+            # transaction, and on a worker thread every I/O call in it would
+            # queue for the GIL behind the request handlers
+            answers = self._commit(group)
+            for write, answer in zip(group, answers):
+                if not write.future.done():
+                    write.future.set_result(answer)
+                self.queue.task_done()
+
+    def _commit(self, group: List[Write]) -> List[Tuple[int, Any]]:
+        """Apply a group of writes in as few transactions as possible
+
+        A write with If-Match starts a new transaction, so it is checked
+        against the revision left by the writes queued before it.
+        """
+        answers = []
+        segments: List[List[Write]] = [[]]
+        for write in group:
+            if write.if_match is not None and segments[-1]:
+                segments.append([])
+            segments[-1].append(write)
+        for writes in segments:
+            try:
+                answers.extend(self._transaction(writes))
+            except Exception as e:
+                print(f"Error committing writes: {e}")
+                answers.extend([(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)})] * len(writes))
+        return answers
+
+    def _transaction(self, writes: List[Write]) -> List[Tuple[int, Any]]:
+        finishers = []
+        removed: set = set()
+
+        def exists(todo_id: int) -> bool:
+            if todo_id in removed:
+                return False
+            if self.store.get(todo_id) is not None:
+                return True
+            # An archived todo moves back to the hot tier, where the batch can change it
+            cold = file_ops.get_archive()
+            return cold is not None and archive.restore(self.store, cold, [todo_id]) > 0
+
+        with file_ops.transaction() as batch:
+            for write in writes:
+                if write.if_match is not None and write.if_match != self.etag(file_ops.get_revision()):
+                    finishers.append(lambda: (HTTPStatus.PRECONDITION_FAILED,
+                                              {'error': "the todos changed since that ETag"}))
+                    continue
+                finishers.append(write.stage(batch, exists, removed))
+        self.commits += 1
+        self.writes += len(writes)
+        return [finish() for finish in finishers]
+
+    async def submit(self, kind: str, payload: Any, if_match: Optional[str]) -> Tuple[int, Any]:
+        write = Write(kind, payload, if_match, asyncio.get_running_loop().create_future())
+        self.queue.put_nowait(write)
+        return await write.future
+
+    # Reads
+
+    def etag(self, revision) -> str:
+        return f'"{self.epoch}-{revision}"'
+
+    def cached(self, revision, target: str, produce: Callable[[], Any]) -> bytes:
+        """Encoded response for target at revision, reused until the todos change"""
+        if revision != self.cache_revision:
+            self.cache = {}
+            self.cache_revision = revision
+        body = self.cache.get(target)
+        if body is None:
+            body = encode(produce())
+            if len(self.cache) >= CACHE_ENTRIES:
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[target] = body
+        return body
+
+    def read_query(self, spec) -> Dict[str, Any]:
+        todos, total = file_ops.query(spec)
+        return {'todos': todos, 'total': total}
+
+    def read_todo(self, todo_id: int):
+        todo = file_ops.get_todo_by_id(todo_id)
+        if todo is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no todo with id {todo_id}")
+        return todo
+
+    # Routing
+
+    async def dispatch(self, method: str, target: str, headers: Dict[str, str],
+                       body: bytes) -> Tuple[int, bytes, Dict[str, str]]:
+        """Answer one request: status, encoded body and extra headers"""
+        url = urlsplit(target)
+        parts = [part for part in url.path.split('/') if part]
+        if_match = headers.get('if-match')
+
+        if method == 'GET':
+            # The revision is read before the data, so an ETag is never newer than its body
+            revision = file_ops.get_revision()
+            etag = self.etag(revision)
+            if headers.get('if-none-match') == etag:
+                return HTTPStatus.NOT_MODIFIED, b'', {'ETag': etag}
+            if parts == ['todos']:
+                spec = self._query_params(url.query)
+                produce = lambda: self.read_query(spec)
+            elif len(parts) == 2 and parts[0] == 'todos':
+                todo_id = self._path_id(parts[1])
+                produce = lambda: self.read_todo(todo_id)
+            elif parts == ['stats']:
+                produce = file_ops.get_stats
+            elif parts == ['categories']:
+                produce = file_ops.get_categories
+            else:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"no such resource: {url.path}")
+            return HTTPStatus.OK, self.cached(revision, target, produce), {'ETag': etag}
+
+        if method == 'POST' and parts == ['query']:
+            try:
+                spec = file_ops.Query.from_spec(self._json(body))
+            except (TypeError, ValueError) as e:
+                raise ApiError(HTTPStatus.BAD_REQUEST, str(e)) from None
+            revision = file_ops.get_revision()
+            return HTTPStatus.OK, encode(self.read_query(spec)), {'ETag': self.etag(revision)}
+
+        if method == 'POST' and parts == ['todos']:
+            status, result = await self.submit('add', _todo_changes(self._json(body), partial=False), None)
+            return status, encode(result), {'Location': f"/todos/{result['id']}"} if status == HTTPStatus.CREATED else {}
+
+        if method == 'POST' and parts == ['todos', 'bulk']:
+            status, result = await self.submit('bulk', self._bulk_ops(self._json(body)), if_match)
+            return status, encode(result), {}
+
+        if len(parts) == 2 and parts[0] == 'todos' and method in ('PATCH', 'DELETE'):
+            todo_id = self._path_id(parts[1])
+            if method == 'PATCH':
+                changes = _todo_changes(self._json(body), partial=True)
+                status, result = await self.submit('update', (todo_id, changes), if_match)
+            else:
+                status, result = await self.submit('delete', todo_id, if_match)
+            return status, b'' if result is None else encode(result), {}
+
+        if parts in (['todos'], ['stats'], ['categories'], ['query'], ['todos', 'bulk']) or (
+                len(parts) == 2 and parts[0] == 'todos'):
+            raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not supported on {url.path}")
+        raise ApiError(HTTPStatus.NOT_FOUND, f"no such resource: {url.path}")
+
+    @staticmethod
+    def _json(body: bytes) -> Any:
+        try:
+            return json.loads(body or b'null')
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {e}") from None
+
+    @staticmethod
+    def _path_id(part: str) -> int:
+        if not part.isdigit():
+            raise ApiError(HTTPStatus.NOT_FOUND, f"no todo with id {part}")
+        return int(part)
+
+    @staticmethod
+    def _query_params(query: str) -> file_ops.Query:
+        try:
+            return file_ops.Query.from_text(dict(parse_qsl(query)))
+        except ValueError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, str(e)) from None
+
+    @staticmethod
+    def _bulk_ops(body: Any) -> List[Dict[str, Any]]:
+        if not isinstance(body, dict) or not isinstance(body.get('ops'), list):
+            raise ApiError(HTTPStatus.BAD_REQUEST, 'expected {"ops": [...]}')
+        ops = []
+        for op in body['ops']:
+            kind = op.get('op') if isinstance(op, dict) else None
+            if kind == 'add':
+                ops.append({'op': 'add', 'todo': _todo_changes(op.get('todo'), partial=False)})
+            elif kind == 'update':
+                ops.append({'op': 'update', 'id': _todo_id(op.get('id')),
+                            'changes': _todo_changes(op.get('changes'), partial=True)})
+            elif kind == 'delete':
+                ops.append({'op': 'delete', 'id': _todo_id(op.get('id'))})
+            else:
+                raise ApiError(HTTPStatus.BAD_REQUEST, "every op needs op: add, update or delete")
+        return ops
+
+    # Connections
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the requests of one connection, keeping it open between them"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    writer.write(response(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                          encode({'error': "headers too large"}), {}, False))
+                    return
+                lines = head.decode('latin-1').split('\r\n')
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(':')
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                request = lines[0].split(' ')
+                version = request[2] if len(request) == 3 else 'HTTP/1.0'
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+                try:
+                    if len(request) != 3:
+                        raise ApiError(HTTPStatus.BAD_REQUEST, "malformed request line")
+                    length = headers.get('content-length')
+                    if length is None:
+                        if 'transfer-encoding' in headers:
+                            keep_alive = False
+                            raise ApiError(HTTPStatus.LENGTH_REQUIRED, "send the body with a Content-Length")
+                        length = '0'
+                    if not (length.isascii() and length.isdigit()):
+                        # Where this body ends is unknown, so the connection can't be reused
+                        keep_alive = False
+                        raise ApiError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+                    length = int(length)
+                    if length > MAX_BODY:
+                        keep_alive = False
+                        raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request body too large")
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload, extra = await self.dispatch(request[0], request[1], headers, body)
+                except ApiError as e:
+                    status, payload, extra = e.status, encode({'error': str(e)}), {}
+                except asyncio.IncompleteReadError:
+                    return
+                except Exception as e:
+                    print(f"Error handling {lines[0]}: {e}")
+                    status, payload, extra = HTTPStatus.INTERNAL_SERVER_ERROR, encode({'error': str(e)}), {}
+                writer.write(response(status, payload, extra, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def encode(payload: Any) -> bytes:
+    return json.dumps(payload, default=to_json, separators=(',', ':')).encode()
+
+
+def response(status: int, body: bytes, headers: Dict[str, str], keep_alive: bool) -> bytes:
+    status = HTTPStatus(status)
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+    if status not in (HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED):
+        lines.append("Content-Type: application/json")
+        lines.append(f"Content-Length: {len(body)}")
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+async def serve(host: str = HOST, port: int = PORT):
+    """Run the API until cancelled, then finish the queued writes"""
+    api = TodoApi()
+    writer = asyncio.create_task(api.writer())
+    server = await asyncio.start_server(api.handle, host, port)
+    print(f"Todo API listening on http://{host}:{port} "
+          f"({file_ops.BACKEND} backend, list {file_ops.current_list()})", flush=True)
+    try:
+        # Stop as cleanly on SIGTERM as on Ctrl+C
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except (NotImplementedError, AttributeError):
+        pass
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await api.queue.join()
+        writer.cancel()
+        print(f"Committed {api.writes} writes in {api.commits} transactions", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/JSON API over the todo store")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--backend', choices=file_ops.BACKENDS, help='storage backend (default: TODO_BACKEND)')
+    parser.add_argument('--journal', action='store_true', help='run the JSON backend in journal mode')
+    parser.add_argument('--list', help='serve this named list (default: TODO_LIST or the default list)')
+    args = parser.parse_args()
+    if args.list:
+        try:
+            file_ops.set_list(args.list)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.backend:
+        file_ops.set_backend(args.backend)
+    if args.journal:
+        file_ops.set_journal_mode(True)
+    # Runs the legacy/SQLite migration check before the first request
+    file_ops.get_revision()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
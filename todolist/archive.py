@@ -0,0 +1,139 @@
+"""Cold tier for old completed todos (JSON backend).
+
+Completed todos created more than a given number of days ago can be moved
+out of todos.json into an archive segment: todos.archive.json plus its
+append-only journal todos.archive.log, kept by a TodoStore of its own.
+Views of pending todos (the default todo list, the edit and complete
+pickers) then read, index and rewrite only the hot todos. The archive is
+loaded the first time a query that can match completed todos, the
+statistics page or an export needs it. The stats cards only need its
+running totals, which are saved next to it in todos.archive.stats.json
+together with the archive's file version, so they can be used without
+reading the archive for as long as it has not changed since.
+
+An id lives in one tier at a time, and changing an archived todo moves it
+back to the hot tier first. A move writes the receiving tier before the
+other one, so a crash in between leaves a todo in both tiers rather than
+in neither; the hot copy wins, and the next archive pass drops the cold one.
+"""
+import os
+import json
+import heapq
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from indexes import SORT_KEYS
+from query import Query
+from store import TodoStore
+from safe_io import atomic_write
+
+
+def archive_path(filename: str) -> str:
+    """Return the archive snapshot that goes with a todos JSON file"""
+    return os.path.splitext(filename)[0] + '.archive.json'
+
+
+def stats_path(filename: str) -> str:
+    """Return the file holding the running totals of a todos JSON file's archive"""
+    return os.path.splitext(archive_path(filename))[0] + '.stats.json'
+
+
+def saved_stats(filename: str) -> Optional[Dict[str, Any]]:
+    """The archive's running totals as last saved, None if missing or out of date"""
+    try:
+        with open(stats_path(filename), encoding='utf-8') as file:
+            saved = json.load(file)
+    except (OSError, ValueError):
+        return None
+    version = TodoStore.file_version(archive_path(filename))
+    # JSON turns the version's tuples into lists
+    if version is None or saved.get('version') != json.loads(json.dumps(version)):
+        return None
+    return saved['stats']
+
+
+def save_stats(filename: str, archive) -> Dict[str, Any]:
+    """Return the loaded archive's running totals, saving them if the saved ones are out of date"""
+    with archive.reading():
+        version = archive.version
+        stats = archive.stats()
+    if saved_stats(filename) != stats:
+        atomic_write(stats_path(filename), json.dumps({'version': version, 'stats': stats}))
+    return stats
+
+
+def cutoff(days: float) -> str:
+    """ISO timestamp of the moment todos must have been created before to be archived"""
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+
+def archive_completed(store, archive, before: str) -> int:
+    """Move the completed todos created before the ISO timestamp from store to archive
+
+    Returns how many were moved. The hot store stays locked throughout,
+    so no todo can change between being copied and being removed.
+    """
+    with store.transaction() as batch:
+        # Copies left in the archive by an interrupted move
+        stale = [todo['id'] for todo in archive.load() if store.get(todo['id']) is not None]
+        if stale:
+            archive.delete_ids(stale)
+        old = [todo for todo in store.filter(completed=True)
+               if todo.get('created_at') and todo['created_at'] < before]
+        if old:
+            archive.apply_records([{'op': 'add', 'todo': todo.copy()} for todo in old])
+            for todo in old:
+                batch.delete(todo['id'])
+    return len(old)
+
+
+def restore(store, archive, todo_ids: Iterable[int]) -> int:
+    """Move the archived todos with these ids back to the hot store, return how many"""
+    todos = [todo for todo in map(archive.get, todo_ids) if todo is not None]
+    if todos:
+        store.apply_records([{'op': 'add', 'todo': todo.copy()} for todo in todos])
+        # On disk before the archive lets go of them, even in write-behind mode
+        store.flush()
+        archive.delete_ids([todo['id'] for todo in todos])
+    return len(todos)
+
+
+def query(query: Query, store, archive) -> Tuple[List[Dict[str, Any]], int]:
+    """Run a query over both tiers and merge the pages in the query's order
+
+    Each tier returns its first offset + limit matches. Without order_by
+    archived todos follow the hot ones, as they are the older ones.
+    """
+    end = None if query.limit is None else query.offset + query.limit
+    part = query._replace(offset=0, limit=end)
+    hot, hot_total = store.query(part)
+    cold, cold_total = archive.query(part)
+    if query.order_by is None:
+        todos = hot + cold
+    else:
+        sort_key = SORT_KEYS[query.order_by]
+        if query.search:
+            # Each tier breaks ties by relevance; the merge keeps that order
+            key = sort_key
+        else:
+            key = lambda todo: (sort_key(todo), todo['id'])
+        todos = list(heapq.merge(hot, cold, key=key, reverse=query.descending))
+    return todos[query.offset:end], hot_total + cold_total
+
+
+def due_between(store, archive, start: Optional[str], end: Optional[str]) -> List[Dict[str, Any]]:
+    """Todos of both tiers due within [start, end], ordered by due date"""
+    return list(heapq.merge(store.due_between(start, end), archive.due_between(start, end),
+                            key=lambda todo: (todo['due_date'], todo['id'])))
+
+
+def merge_stats(hot: Dict[str, Any], cold: Dict[str, Any]) -> Dict[str, Any]:
+    """Add up two get_stats() results"""
+    stats = dict(hot)
+    for field in ('total', 'completed', 'pending'):
+        stats[field] = hot[field] + cold[field]
+    for field in ('by_category', 'by_priority', 'completed_by_category'):
+        counts = dict(hot[field])
+        for name, count in cold[field].items():
+            counts[name] = counts.get(name, 0) + count
+        stats[field] = counts
+    return stats
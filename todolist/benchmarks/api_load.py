@@ -0,0 +1,202 @@
+"""Load generator for the HTTP/JSON API (api.py).
+
+Starts the API on a scratch copy of a seeded synthetic todo list (or
+targets a running one with --port and --no-server), then keeps --clients
+concurrent keep-alive connections busy for --duration seconds with a mix
+of list queries, single-todo reads, stats reads, adds and updates.
+Reports requests per second and latency percentiles per request kind.
+
+    python benchmarks/api_load.py --size 10000 --clients 32 --duration 10
+    python benchmarks/api_load.py --write-ratio 0.5 --journal
+    python benchmarks/api_load.py --etag            # clients send If-None-Match
+
+With --etag every client remembers the ETag of each URL it read and sends
+it back, so unchanged data is answered with 304.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from collections import Counter, defaultdict
+from typing import List, Dict, Any, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Importing hot_paths points TODO_DATA_DIR at a scratch directory first
+from hot_paths import generate, percentile, CATEGORIES, PRIORITIES, WORDS  # noqa: E402
+import file_ops  # noqa: E402
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Share of the reads going to each kind; writes are split evenly between add and update
+READ_MIX = (('list', 0.5), ('get', 0.35), ('stats', 0.15))
+
+
+class Client:
+    """One keep-alive connection issuing requests one after another"""
+
+    def __init__(self, host: str, port: int, etag: bool):
+        self.host = host
+        self.port = port
+        self.etags: Optional[Dict[str, str]] = {} if etag else None
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, path: str, body: Any = None) -> int:
+        payload = b'' if body is None else json.dumps(body).encode()
+        headers = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(payload)}"]
+        if self.etags is not None and method == 'GET' and path in self.etags:
+            headers.append(f"If-None-Match: {self.etags[path]}")
+        self.writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode() + payload)
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split(' ')[1])
+        length = 0
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            name = name.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'etag' and self.etags is not None:
+                self.etags[path] = value.strip()
+        if length:
+            await self.reader.readexactly(length)
+        return status
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+
+
+def next_request(rng: random.Random, size: int, write_ratio: float) -> Tuple[str, str, str, Any]:
+    """(kind, method, path, body) of a random request"""
+    if rng.random() < write_ratio:
+        if rng.random() < 0.5:
+            return 'add', 'POST', '/todos', {'text': f"Load {rng.choice(WORDS)} {rng.randrange(10 ** 6)}",
+                                             'category': rng.choice(CATEGORIES),
+                                             'priority': rng.choice(PRIORITIES)}
+        return 'update', 'PATCH', f"/todos/{rng.randrange(1, size + 1)}", {'completed': rng.random() < 0.5}
+    pick = rng.random()
+    for kind, share in READ_MIX:
+        pick -= share
+        if pick < 0:
+            break
+    if kind == 'list':
+        return kind, 'GET', (f"/todos?completed=no&category={rng.choice(CATEGORIES)}"
+                             f"&order_by=due_date&offset={rng.randrange(4) * 25}&limit=25"), None
+    if kind == 'get':
+        return kind, 'GET', f"/todos/{rng.randrange(1, size + 1)}", None
+    return kind, 'GET', '/stats', None
+
+
+async def run_client(client: Client, rng: random.Random, args, deadline: float,
+                     latencies: Dict[str, List[float]], statuses: Counter):
+    await client.connect()
+    try:
+        while time.perf_counter() < deadline:
+            kind, method, path, body = next_request(rng, args.size, args.write_ratio)
+            started = time.perf_counter()
+            status = await client.request(method, path, body)
+            latencies[kind].append(time.perf_counter() - started)
+            statuses[status] += 1
+    finally:
+        client.close()
+
+
+async def run_load(args) -> Tuple[Dict[str, List[float]], Counter, float]:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(run_client(Client(args.host, args.port, args.etag), random.Random(args.seed + i),
+                                      args, deadline, latencies, statuses)
+                           for i in range(args.clients)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def start_server(args) -> subprocess.Popen:
+    """Seed the scratch data directory and start api.py on it"""
+    file_ops.set_backend(args.backend)
+    file_ops.set_journal_mode(args.journal)
+    file_ops.get_store().bulk_import(generate(args.size, args.seed), replace=True)
+    command = [sys.executable, 'api.py', '--host', args.host, '--port', str(args.port),
+               '--backend', args.backend] + (['--journal'] if args.journal else [])
+    server = subprocess.Popen(command, cwd=APP_DIR, stdout=subprocess.PIPE, text=True)
+    line = server.stdout.readline()
+    if 'listening' not in line:
+        server.kill()
+        raise SystemExit(f"API server did not start: {line.strip()}")
+    return server
+
+
+def stop_server(server: subprocess.Popen) -> str:
+    server.terminate()
+    output, _ = server.communicate(timeout=60)
+    return output.strip()
+
+
+def summarize(latencies: Dict[str, List[float]], elapsed: float) -> List[Dict[str, Any]]:
+    rows = []
+    everything = sorted(value for values in latencies.values() for value in values)
+    for kind, values in sorted(latencies.items()) + [('all', everything)]:
+        values = sorted(values)
+        if not values:
+            continue
+        rows.append({
+            'kind': kind,
+            'requests': len(values),
+            'per_sec': len(values) / elapsed,
+            'p50_ms': percentile(values, 0.50) * 1000,
+            'p95_ms': percentile(values, 0.95) * 1000,
+            'p99_ms': percentile(values, 0.99) * 1000,
+            'max_ms': values[-1] * 1000,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=10000, help='todos to seed the store with')
+    parser.add_argument('--clients', type=int, default=32, help='concurrent connections')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--write-ratio', type=float, default=0.1, help='share of requests that write')
+    parser.add_argument('--etag', action='store_true', help='send If-None-Match with repeated reads')
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--journal', action='store_true', help='run the JSON backend in journal mode')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--no-server', action='store_true',
+                        help='load an API that is already running (ids up to --size must exist)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    server = None if args.no_server else start_server(args)
+    try:
+        latencies, statuses, elapsed = asyncio.run(run_load(args))
+    finally:
+        server_report = stop_server(server).splitlines()[-1] if server else ''
+
+    rows = summarize(latencies, elapsed)
+    print(f"{args.clients} clients, {elapsed:.1f} s, {args.backend}{' journal' if args.journal else ''}, "
+          f"{args.size} todos, write ratio {args.write_ratio}{', ETags' if args.etag else ''}")
+    for row in rows:
+        print(f"{row['kind']:7s} {row['requests']:8d} req {row['per_sec']:9.1f} req/s   p50 {row['p50_ms']:8.2f} ms"
+              f"   p95 {row['p95_ms']:8.2f} ms   p99 {row['p99_ms']:8.2f} ms   max {row['max_ms']:8.2f} ms")
+    print("statuses: " + ', '.join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+    if server_report:
+        print(f"server: {server_report}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'args': vars(args), 'statuses': dict(statuses), 'server': server_report,
+                       'results': rows}, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""Benchmark suite for the file_ops hot paths across dataset sizes.
+
+For every backend and dataset size a synthetic todo list is generated
+(seeded, so runs are reproducible) and loaded into a scratch data
+directory; then each operation is timed call by call. Reported per
+operation: latency percentiles, mean, throughput and the peak memory
+allocated by one call (traced in a separate, untimed pass).
+
+    python benchmarks/hot_paths.py --sizes 1000,10000,100000 --output results.json
+    python benchmarks/hot_paths.py --sizes 1000,10000 --compare results.json
+
+--output writes the results as JSON; --compare reads such a file from an
+earlier run (e.g. another commit), prints the change in median latency
+per operation and exits non-zero if any got slower than --threshold.
+Every operation gets one untimed warm-up call first.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import resource
+import tracemalloc
+import subprocess
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Callable, Tuple
+
+# Keep the benchmark's todos away from the real todoText/ directory
+os.environ['TODO_DATA_DIR'] = tempfile.mkdtemp(prefix='todo-bench-')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_ops  # noqa: E402
+
+CATEGORIES = ['General', 'Work', 'Personal', 'Shopping', 'Health', 'Study', 'Home', 'Finance']
+PRIORITIES = ['High', 'Medium', 'Low']
+WORDS = ['report', 'groceries', 'exercise', 'email', 'meeting', 'invoice', 'dentist', 'laundry',
+         'budget', 'review', 'flight', 'garden', 'birthday', 'backup', 'taxes', 'presentation']
+SEARCHES = ['report', 'email meeting', 'gro', 'tax', 'flight review', 'nothingmatches']
+# Median slowdowns smaller than this are timer noise, whatever the percentage
+NOISE_FLOOR_MS = 0.01
+
+
+def generate(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """count synthetic todos with realistic text, dates and category/priority spread"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    todos = []
+    for i in range(count):
+        created = start + timedelta(seconds=rng.randrange(365 * 86400), microseconds=rng.randrange(10 ** 6))
+        due = (created + timedelta(days=rng.randrange(60))).date().isoformat() if rng.random() < 0.6 else None
+        todos.append({
+            'id': i + 1,
+            'text': f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} {i}",
+            'completed': rng.random() < 0.4,
+            'created_at': created.isoformat(),
+            'category': rng.choice(CATEGORIES),
+            'priority': rng.choice(PRIORITIES),
+            'due_date': due
+        })
+    return todos
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(call: Callable[[int], Any], ops: int, max_seconds: float) -> Dict[str, Any]:
+    """Time call(i) for i in range(ops), stopping early (after 3 calls) once max_seconds pass"""
+    timings = []
+    started = time.perf_counter()
+    for i in range(ops):
+        before = time.perf_counter()
+        call(i)
+        timings.append(time.perf_counter() - before)
+        if len(timings) >= 3 and time.perf_counter() - started > max_seconds:
+            break
+    total = sum(timings)
+    timings.sort()
+    ms = 1000.0
+    return {
+        'iterations': len(timings),
+        'mean_ms': total / len(timings) * ms,
+        'p50_ms': percentile(timings, 0.50) * ms,
+        'p90_ms': percentile(timings, 0.90) * ms,
+        'p99_ms': percentile(timings, 0.99) * ms,
+        'max_ms': timings[-1] * ms,
+        'ops_per_sec': len(timings) / total if total else float('inf'),
+    }
+
+
+def peak_allocation_kb(call: Callable[[int], Any], calls: int = 3) -> float:
+    """Largest traced allocation peak over a few calls, in KiB"""
+    peak = 0
+    for i in range(calls):
+        tracemalloc.start()
+        try:
+            call(i)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    return peak / 1024
+
+
+def operations(size: int, rng: random.Random) -> List[Tuple[str, Callable[[int], Any]]]:
+    """(name, call) pairs in run order; call(i) performs the i-th call of that operation"""
+    store = file_ops.get_store()
+    ids = [rng.randrange(1, size + 1) for _ in range(1000)]
+    added: List[int] = []
+    days = [(datetime(2024, 1, 1) + timedelta(days=rng.randrange(365))).date() for _ in range(1000)]
+
+    def read_cold(i):
+        # Drop the in-memory copy so the file is parsed again
+        store.invalidate()
+        return file_ops.read_todos()
+
+    def add(i):
+        added.append(file_ops.add_todo(f"Benchmark {WORDS[i % len(WORDS)]} {i}", CATEGORIES[i % 8],
+                                       PRIORITIES[i % 3])['id'])
+
+    def delete(i):
+        # Removes the todos add created, so later operations see the original size
+        if added:
+            file_ops.delete_todo(added.pop())
+
+    def due_window(i):
+        start = days[i % len(days)]
+        return file_ops.get_todos_by_due_date(start.isoformat(), (start + timedelta(days=7)).isoformat())
+
+    def query(i):
+        start = days[i % len(days)]
+        return file_ops.query(category=CATEGORIES[i % 8], completed=False, due_from=start.isoformat(),
+                              due_to=(start + timedelta(days=30)).isoformat(), order_by='priority', limit=25)
+
+    return [
+        ('read_todos (cold)', read_cold),
+        ('read_todos', lambda i: file_ops.read_todos()),
+        ('add_todo', add),
+        ('update_todo', lambda i: file_ops.update_todo(ids[i % len(ids)], completed=bool(i % 2))),
+        ('delete_todo', delete),
+        ('get_todo_by_id', lambda i: file_ops.get_todo_by_id(ids[i % len(ids)])),
+        ('search_todos', lambda i: file_ops.search_todos(SEARCHES[i % len(SEARCHES)])),
+        ('get_todos_by_category', lambda i: file_ops.get_todos_by_category(CATEGORIES[i % 8])),
+        ('get_todos_by_priority', lambda i: file_ops.get_todos_by_priority(PRIORITIES[i % 3])),
+        ('get_todos_by_due_date', due_window),
+        ('filter_todos', lambda i: file_ops.filter_todos(category=CATEGORIES[i % 8], completed=bool(i % 2))),
+        ('get_todo_page', lambda i: file_ops.get_todo_page(priority=PRIORITIES[i % 3], order_by='due_date',
+                                                           offset=(i % 10) * 25, limit=25)),
+        ('query', query),
+        ('get_categories', lambda i: file_ops.get_categories()),
+        ('get_stats', lambda i: file_ops.get_stats()),
+        ('get_statistics', lambda i: file_ops.get_statistics()),
+    ]
+
+
+def run_size(backend: str, size: int, args) -> List[Dict[str, Any]]:
+    file_ops.set_backend(backend)
+    store = file_ops.get_store()
+    store.bulk_import(generate(size, args.seed), replace=True)
+    rng = random.Random(args.seed)
+    results = []
+    for name, call in operations(size, rng):
+        result = {'backend': backend, 'size': size, 'operation': name}
+        # Warm up first, so one-off work (imports, lazily built columns) is not timed
+        call(0)
+        result.update(measure(call, args.ops, args.max_seconds))
+        if not args.no_memory:
+            result['peak_alloc_kb'] = peak_allocation_kb(call)
+        results.append(result)
+        print(f"{backend:6s} {size:>8d}  {name:22s} p50 {result['p50_ms']:9.3f} ms  "
+              f"p99 {result['p99_ms']:9.3f} ms  {result['ops_per_sec']:10.1f} ops/s"
+              + (f"  {result['peak_alloc_kb']:10.0f} KiB" if 'peak_alloc_kb' in result else ''))
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, threshold: float) -> bool:
+    """Print median latency change against an earlier run; False if anything regressed"""
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    before = {(r['backend'], r['size'], r['operation']): r for r in baseline['results']}
+    print(f"\nCompared with {baseline_path} ({baseline['meta'].get('commit') or 'unknown commit'}):")
+    ok = True
+    for result in results:
+        old = before.get((result['backend'], result['size'], result['operation']))
+        if old is None:
+            continue
+        change = result['p50_ms'] / old['p50_ms'] - 1 if old['p50_ms'] else 0.0
+        regressed = change > threshold and result['p50_ms'] - old['p50_ms'] > NOISE_FLOOR_MS
+        ok = ok and not regressed
+        print(f"{result['backend']:6s} {result['size']:>8d}  {result['operation']:22s} "
+              f"{old['p50_ms']:9.3f} -> {result['p50_ms']:9.3f} ms  {change:+7.1%}"
+              + ('  REGRESSION' if regressed else ''))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000',
+                        help='comma separated dataset sizes, e.g. 1000,10000,100000,1000000')
+    parser.add_argument('--backend', choices=['json', 'sqlite', 'all'], default='all')
+    parser.add_argument('--journal', action='store_true', help='run the JSON backend in journal mode')
+    parser.add_argument('--ops', type=int, default=200, help='calls per operation')
+    parser.add_argument('--max-seconds', type=float, default=5.0, help='time budget per operation')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-memory', action='store_true', help='skip the traced memory pass')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='median slowdown counted as a regression (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    file_ops.set_journal_mode(args.journal)
+    sizes = [int(size) for size in args.sizes.split(',')]
+    backends = ['json', 'sqlite'] if args.backend == 'all' else [args.backend]
+    results = []
+    for backend in backends:
+        for size in sizes:
+            results.extend(run_size(backend, size, args))
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'journal': args.journal,
+            'ops': args.ops,
+            'seed': args.seed,
+            # ru_maxrss is in kilobytes on Linux
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
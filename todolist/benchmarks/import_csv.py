@@ -0,0 +1,94 @@
+"""Import benchmark: stream a large CSV file into each storage backend.
+
+Generates a CSV file with the given number of rows (a small share of them
+invalid), imports it into a scratch store the way file_ops.import_todos()
+does and reports rows per second and peak memory for each backend.
+
+    python benchmarks/import_csv.py --rows 1000000
+"""
+import os
+import sys
+import csv
+import time
+import random
+import argparse
+import tempfile
+import resource
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store import TodoStore  # noqa: E402
+from importer import CsvImporter, IMPORT_MODES  # noqa: E402
+from models import FIELDS  # noqa: E402
+
+CATEGORIES = ['General', 'Work', 'Personal', 'Shopping', 'Health']
+PRIORITIES = ['High', 'Medium', 'Low', 'high', '']
+
+
+def write_sample(path: str, rows: int, invalid_every: int = 1000):
+    """A CSV as pandas or a spreadsheet would export it: float ids, nan cells, mixed case"""
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for i in range(rows):
+            created = start + timedelta(seconds=rng.randrange(365 * 86400), microseconds=rng.randrange(10 ** 6))
+            due = (created + timedelta(days=rng.randrange(60))).date().isoformat() if rng.random() < 0.6 else 'nan'
+            priority = rng.choice(PRIORITIES) if i % invalid_every else 'Urgent'
+            writer.writerow([f'{i + 1}.0', f'Imported todo {i}, row {i + 2}', rng.choice(['True', 'False', '1', '0']),
+                             created.isoformat(), rng.choice(CATEGORIES), priority, due])
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def open_store(backend: str):
+    directory = tempfile.mkdtemp(prefix='todo-import-')
+    if backend == 'sqlite':
+        from sqlite_store import SqliteStore
+        return SqliteStore(os.path.join(directory, 'todos.db'))
+    return TodoStore(os.path.join(directory, 'todos.json'))
+
+
+def run(backend: str, mode: str, csv_path: str, rows: int):
+    """The same steps as file_ops.import_todos(), against a scratch store"""
+    store = open_store(backend)
+    reader = CsvImporter(csv_path)
+
+    def todos():
+        for chunk in reader.chunks():
+            for todo in chunk:
+                if mode == 'append':
+                    todo.id = None
+                yield todo
+
+    started = time.perf_counter()
+    imported = store.bulk_import(todos(), replace=(mode == 'replace'))
+    elapsed = time.perf_counter() - started
+    stored = store.stats()['total']
+    status = 'OK' if stored == imported == rows - reader.rejected else f'FAIL: {stored} stored'
+    print(f"{backend:6s} {mode:7s} {rows} rows: {elapsed:6.2f}s {rows / elapsed:9.0f} rows/s  "
+          f"{reader.rejected} rejected  peak RSS {peak_rss_mb():.0f} MB  {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--backend', choices=['json', 'sqlite', 'all'], default='all')
+    parser.add_argument('--mode', choices=IMPORT_MODES, default='append')
+    args = parser.parse_args()
+
+    csv_path = os.path.join(tempfile.mkdtemp(prefix='todo-import-'), 'todos.csv')
+    write_sample(csv_path, args.rows)
+    print(f"CSV file: {os.path.getsize(csv_path) / 2 ** 20:.0f} MB")
+    backends = ['json', 'sqlite'] if args.backend == 'all' else [args.backend]
+    for backend in backends:
+        run(backend, args.mode, csv_path, args.rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Memory benchmark: plain dict todos versus Todo records.
+
+Builds the same todos both ways and reports the traced memory each
+representation holds, the way a long-running web process would keep them.
+
+    python benchmarks/memory_records.py --count 100000
+"""
+import os
+import sys
+import json
+import random
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Todo  # noqa: E402
+
+CATEGORIES = ['General', 'Work', 'Personal', 'Shopping', 'Health']
+PRIORITIES = ['High', 'Medium', 'Low']
+
+
+def sample_json(count: int) -> str:
+    """A todos file as it is stored on disk, so no strings are shared up front"""
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    todos = []
+    for i in range(count):
+        created = start + timedelta(seconds=rng.randrange(365 * 86400), microseconds=rng.randrange(10 ** 6))
+        due = (created + timedelta(days=rng.randrange(60))).date().isoformat() if rng.random() < 0.6 else None
+        todos.append({
+            'id': i + 1,
+            'text': f'Todo number {i} about {rng.choice(["reports", "groceries", "exercise", "email"])}',
+            'completed': rng.random() < 0.4,
+            'created_at': created.isoformat(),
+            'category': rng.choice(CATEGORIES),
+            'priority': rng.choice(PRIORITIES),
+            'due_date': due
+        })
+    return json.dumps(todos)
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    records = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args()
+
+    data = sample_json(args.count)
+    as_dicts = measure(lambda: json.loads(data))
+    as_records = measure(lambda: [Todo.from_dict(todo) for todo in json.loads(data)])
+
+    print(f"{args.count} todos")
+    print(f"  dicts:   {as_dicts / 2 ** 20:8.1f} MiB  ({as_dicts / args.count:5.0f} bytes/todo)")
+    print(f"  records: {as_records / 2 ** 20:8.1f} MiB  ({as_records / args.count:5.0f} bytes/todo)")
+    print(f"  saved:   {(1 - as_records / as_dicts) * 100:8.1f} %")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Startup benchmark: cold start time of the CLI and web entry points.
+
+Every case runs in a fresh interpreter, several times, and reports the
+fastest and median wall time of the whole process plus the time spent in
+the measured step itself, and which heavy libraries that step loaded.
+
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --output startup.json
+
+The web cases need streamlit; 'web: Todo List page' renders the default
+page through streamlit.testing, as a fresh Streamlit worker would.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ('pandas', 'numpy', 'plotly', 'pyarrow', 'sqlite3')
+
+# Each snippet sets `step` to the seconds its measured part took
+CASES = {
+    'cli: import': "import cli",
+    'cli: stats command': "import cli\ncli.run_command(['stats'])",
+    'web: import': "import web",
+    'web: Todo List page': (
+        "from streamlit.testing.v1 import AppTest\n"
+        "app = AppTest.from_file('web.py', default_timeout=120)\n"
+        "started = time.perf_counter()\n"
+        "app.run()\n"
+        "step = time.perf_counter() - started\n"
+        "assert not app.exception, app.exception"
+    ),
+}
+
+HARNESS = """
+import io, sys, json, time, contextlib
+before = set(sys.modules)
+started = time.perf_counter()
+step = None
+with contextlib.redirect_stdout(io.StringIO()):
+{body}
+if step is None:
+    step = time.perf_counter() - started
+loaded = sorted({{name.split('.')[0] for name in set(sys.modules) - before}} & set({heavy!r}))
+print(json.dumps({{'step': step, 'loaded': loaded}}))
+"""
+
+
+def run_case(code: str, env) -> dict:
+    script = HARNESS.format(body='\n'.join('    ' + line for line in code.splitlines()), heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', script], cwd=APP_DIR, env=env,
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'failed')
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    measured['wall'] = wall
+    return measured
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--cases', default=','.join(CASES), help='comma separated case names')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    # A scratch data directory, so the benchmark never touches todoText/
+    env = dict(os.environ, TODO_DATA_DIR=tempfile.mkdtemp(prefix='todo-startup-'))
+    results = []
+    for name in args.cases.split(','):
+        try:
+            runs = [run_case(CASES[name], env) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{name:22s} skipped: {e}")
+            continue
+        walls = [run['wall'] * 1000 for run in runs]
+        steps = [run['step'] * 1000 for run in runs]
+        result = {
+            'case': name,
+            'runs': len(runs),
+            'wall_min_ms': min(walls),
+            'wall_median_ms': statistics.median(walls),
+            'step_median_ms': statistics.median(steps),
+            'loaded': runs[-1]['loaded'],
+        }
+        results.append(result)
+        print(f"{name:22s} process {result['wall_min_ms']:8.1f} ms min {result['wall_median_ms']:8.1f} ms median"
+              f"   step {result['step_median_ms']:8.1f} ms   loaded: {', '.join(result['loaded']) or '-'}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'python': sys.version.split()[0], 'results': results}, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
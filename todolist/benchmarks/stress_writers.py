@@ -0,0 +1,150 @@
+"""Stress test: many processes adding, updating and deleting todos at once.
+
+Every worker writes to the same store; afterwards the store must contain
+exactly the todos that were not deleted, each with every update applied,
+and no id may have been handed out twice. Each worker writes 2 x --ops
+records, so the defaults compact the journal a few times while the others
+keep appending; --compact-every lowers the threshold further. With
+--lists N the workers are spread over N named lists, each its own store,
+as file_ops lays them out.
+
+    python benchmarks/stress_writers.py --workers 8 --ops 150 --mode all
+    python benchmarks/stress_writers.py --workers 8 --lists 8 --mode snapshot
+"""
+import os
+import sys
+import time
+import queue
+import argparse
+import tempfile
+import multiprocessing
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import store as store_module  # noqa: E402
+from store import TodoStore, ConcurrentModificationError  # noqa: E402
+
+
+# Snapshot encoding used by the snapshot/journal modes, set from --format
+SNAPSHOT_FORMAT = 'json'
+# Journal length that triggers a compaction, set from --compact-every
+COMPACT_EVERY = store_module.COMPACT_EVERY
+
+
+def open_store(mode: str, path: str):
+    if mode == 'sqlite':
+        from sqlite_store import SqliteStore
+        return SqliteStore(os.path.splitext(path)[0] + '.db')
+    return TodoStore(path, journal=(mode == 'journal'), snapshot_format=SNAPSHOT_FORMAT)
+
+
+def worker(mode: str, snapshot_format: str, compact_every: int, path: str, worker_id: int, ops: int, results):
+    global SNAPSHOT_FORMAT
+    SNAPSHOT_FORMAT = snapshot_format
+    store_module.COMPACT_EVERY = compact_every
+    store = open_store(mode, path)
+    kept = []
+    for i in range(ops):
+        todo = store.add({'id': None, 'text': f'worker {worker_id} todo {i}', 'completed': False,
+                          'category': f'w{worker_id}'})
+        if i % 5 == 4:
+            store.delete(todo['id'])
+        else:
+            kept.append(todo['id'])
+    for todo_id in kept:
+        store.update(todo_id, {'completed': True})
+    results.put((worker_id, kept))
+
+
+def list_paths(directory: str, lists: int) -> List[str]:
+    """Todos file of each list: the default one, then lists/<name>/todos.json"""
+    return [os.path.join(directory, 'todos.json')] + [
+        os.path.join(directory, 'lists', f'list{n}', 'todos.json') for n in range(1, lists)]
+
+
+def check_stale_write_rejected(mode: str, path: str) -> bool:
+    """A save based on an outdated version must raise, not overwrite"""
+    first, second = open_store(mode, path), open_store(mode, path)
+    stale = second.version
+    first.add({'id': None, 'text': 'sneaky concurrent add', 'completed': True})
+    try:
+        second.save([], expected_version=stale)
+    except ConcurrentModificationError:
+        return True
+    return False
+
+
+def run(mode: str, workers: int, ops: int, lists: int = 1, directory: str = None) -> bool:
+    directory = directory or tempfile.mkdtemp(prefix='todo-stress-')
+    paths = list_paths(directory, lists)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(mode, SNAPSHOT_FORMAT, COMPACT_EVERY,
+                                                              paths[n % lists], n, ops, results))
+                 for n in range(workers)]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    expected = {}
+    problems = []
+    while len(expected) < workers:
+        try:
+            worker_id, kept = results.get(timeout=1)
+        except queue.Empty:
+            # A worker that died never reports; don't wait for it forever
+            if any(process.exitcode not in (None, 0) for process in processes):
+                problems.append('a worker crashed')
+                break
+            continue
+        expected[worker_id] = kept
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    for number, path in enumerate(paths):
+        store = open_store(mode, path)
+        todos = store.load()
+        ids = [todo['id'] for todo in todos]
+        expected_ids = sorted(todo_id for worker_id, kept in expected.items() if worker_id % lists == number
+                              for todo_id in kept)
+        if len(ids) != len(set(ids)):
+            problems.append('duplicate ids')
+        if sorted(ids) != expected_ids:
+            problems.append(f'expected {len(expected_ids)} todos, found {len(ids)}')
+        if not all(todo['completed'] for todo in todos):
+            problems.append('lost updates: some todos are not completed')
+        stats = store.stats()
+        if (stats['total'], stats['completed']) != (len(todos), sum(1 for todo in todos if todo['completed'])):
+            problems.append(f"running totals drifted: {stats['total']} total, {stats['completed']} completed")
+    if not check_stale_write_rejected(mode, paths[0]):
+        problems.append('stale write was not rejected')
+
+    total_ops = workers * ops * 2
+    status = 'OK' if not problems else 'FAIL: ' + '; '.join(problems)
+    print(f"{mode:8s} {workers} workers x {ops} ops on {lists} list(s): {total_ops / elapsed:8.0f} ops/s  {status}")
+    return not problems
+
+
+def main():
+    global SNAPSHOT_FORMAT, COMPACT_EVERY
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=150, help='adds per worker, each followed by an update or delete')
+    parser.add_argument('--mode', choices=['snapshot', 'journal', 'sqlite', 'all'], default='all')
+    parser.add_argument('--format', choices=['json', 'binary'], default='json',
+                        help='snapshot encoding for the snapshot and journal modes')
+    parser.add_argument('--lists', type=int, default=1, help='spread the workers over this many lists')
+    parser.add_argument('--compact-every', type=int, default=COMPACT_EVERY,
+                        help='journal records between compactions in journal mode')
+    args = parser.parse_args()
+
+    SNAPSHOT_FORMAT = args.format
+    COMPACT_EVERY = args.compact_every
+
+    modes = ['snapshot', 'journal', 'sqlite'] if args.mode == 'all' else [args.mode]
+    ok = all([run(mode, args.workers, args.ops, max(1, args.lists)) for mode in modes])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,5 @@
+import sys
 import file_ops
-from my_time import print_current_time
 from datetime import datetime
 
 def display_menu():
@@ -15,6 +15,7 @@ def display_menu():
     print("  delete  - Delete a todo")
     print("  search  - Search todos")
     print("  stats   - Show statistics")
+    print("  export  - Export todos to CSV, NDJSON or JSON")
     print("  help    - Show this menu")
     print("  exit    - Exit the application")
     print("="*50)
@@ -72,7 +73,7 @@ def add_todo_interactive():
 
 def edit_todo_interactive():
     """Interactive todo editing"""
-    todos = [t for t in file_ops.read_todos() if not t['completed']]
+    todos, _ = file_ops.query(completed=False)
     if not todos:
         print("❌ No todos available to edit!")
         return
@@ -124,7 +125,7 @@ def edit_todo_interactive():
 
 def complete_todo_interactive():
     """Interactive todo completion"""
-    todos = [t for t in file_ops.read_todos() if not t['completed']]
+    todos, _ = file_ops.query(completed=False)
     if not todos:
         print("❌ No todos available to complete!")
         return
@@ -181,24 +182,19 @@ def search_todos_interactive():
 
 def show_statistics():
     """Display todo statistics"""
-    todos = file_ops.read_todos()
-    if not todos:
+    stats = file_ops.get_stats()
+    if not stats['total']:
         print("❌ No todos available for statistics!")
         return
     
-    total = len(todos)
-    completed = len([t for t in todos if t['completed']])
-    pending = total - completed
+    total = stats['total']
+    completed = stats['completed']
+    pending = stats['pending']
     
     # Category stats
-    categories = {}
+    categories = stats['by_category']
     priorities = {"High": 0, "Medium": 0, "Low": 0}
-    
-    for todo in todos:
-        cat = todo.get('category', 'General')
-        categories[cat] = categories.get(cat, 0) + 1
-        prio = todo.get('priority', 'Medium')
-        priorities[prio] = priorities.get(prio, 0) + 1
+    priorities.update(stats['by_priority'])
     
     print("\n📊 TODO STATISTICS")
     print("="*40)
@@ -217,9 +213,128 @@ def show_statistics():
             emoji = {"High": "🔥", "Medium": "📅", "Low": "💤"}[prio]
             print(f"  {emoji} {prio}: {count}")
 
+def export_todos_interactive():
+    """Interactive todo export"""
+    formats = list(file_ops.EXPORT_FORMATS)
+    fmt = input(f"📤 Format ({'/'.join(formats)}, default csv): ").strip().lower() or 'csv'
+    if fmt not in formats:
+        print(f"❌ Unknown format! Choose one of: {', '.join(formats)}")
+        return
+    default_path = f"todos_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    path = input(f"📁 File path (default {default_path}): ").strip() or default_path
+    
+    file_ops.export_todos(path, fmt)
+    print(f"✅ Exported {file_ops.get_stats()['total']} todos to {path}")
+
+USAGE = """Usage: python cli.py [--list NAME] [command [arguments]]
+
+Without a command the interactive menu starts. --list NAME works on that
+list instead of the default one (or TODO_LIST); it is created on first use.
+Commands:
+  add TEXT         Add a todo with default category and priority
+  show [FIELD=VALUE ...]
+                   Show all todos, or those matching a query, e.g.
+                   show completed=no category=Work order_by=due_date limit=10
+  complete ID      Mark the todo with this ID as complete
+  delete ID        Delete the todo with this ID
+  search QUERY     Search todos
+  stats            Show statistics
+  export [PATH]    Export todos; the format follows the extension (default CSV)
+  archive [DAYS]   Move completed todos created more than DAYS days ago
+                   (default TODO_ARCHIVE_DAYS or 30) to the archive
+  lists            Show the names of all lists
+  help             Show this message"""
+
+def parse_query(args):
+    """Turn FIELD=VALUE arguments into a query for file_ops.query"""
+    fields = {}
+    for arg in args:
+        field, sep, value = arg.partition('=')
+        if not sep:
+            raise ValueError(f"expected FIELD=VALUE, got '{arg}'")
+        fields[field] = value
+    return file_ops.Query.from_text(fields)
+
+def select_list(args):
+    """Apply a leading --list NAME (or --list=NAME) option and return the remaining arguments"""
+    if args and args[0] == '--list':
+        file_ops.set_list(args[1] if len(args) > 1 else '')
+        return args[2:]
+    if args and args[0].startswith('--list='):
+        file_ops.set_list(args[0].partition('=')[2])
+        return args[1:]
+    return args
+
+def run_command(args) -> int:
+    """Run one command given on the command line and return the exit status
+
+    This skips the menu and the interactive prompts, so scripts and shell
+    aliases only pay for importing file_ops.
+    """
+    command, rest = args[0].lower(), args[1:]
+    text = ' '.join(rest).strip()
+    
+    if command == 'add' and text:
+        todo = file_ops.add_todo(text)
+        print(f"✅ Todo added successfully! (ID: {todo['id']})")
+    elif command == 'show':
+        try:
+            todos, total = file_ops.query(parse_query(rest))
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        display_todos(todos, "All Todos" if not rest else f"Matching Todos, {total} in total")
+    elif command in ('complete', 'delete') and len(rest) == 1 and rest[0].isdigit():
+        todo_id = int(rest[0])
+        if command == 'complete':
+            done = file_ops.update_todo(todo_id, completed=True)
+        else:
+            done = file_ops.delete_todo(todo_id)
+        if not done:
+            print(f"❌ No todo with ID {todo_id}!")
+            return 1
+        print(f"🎉 Todo {todo_id} completed!" if command == 'complete' else f"🗑️ Todo {todo_id} deleted!")
+    elif command == 'search' and text:
+        results = file_ops.search_todos(text)
+        if not results:
+            print(f"❌ No todos found matching '{text}'!")
+            return 1
+        display_todos(results, f"Search Results for '{text}'")
+    elif command == 'stats' and not rest:
+        show_statistics()
+    elif command == 'export' and len(rest) <= 1:
+        path = rest[0] if rest else f"todos_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        try:
+            file_ops.export_todos(path)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"✅ Exported {file_ops.get_stats()['total']} todos to {path}")
+    elif command == 'archive' and len(rest) <= 1:
+        try:
+            days = float(rest[0]) if rest else None
+        except ValueError:
+            print(f"❌ DAYS must be a number, got '{rest[0]}'")
+            return 1
+        moved = file_ops.archive_completed(days)
+        print(f"📦 Archived {moved} completed todos")
+    elif command == 'lists' and not rest:
+        current = file_ops.current_list()
+        for name in file_ops.get_lists():
+            print(f"{'👉' if name == current else '  '} {name}")
+    elif command in ('help', '-h', '--help'):
+        print(USAGE)
+    else:
+        print(USAGE, file=sys.stderr)
+        return 2
+    return 0
+
 def main():
     """Main CLI application loop"""
+    from my_time import print_current_time
+    
     print(f"🕐 Current date and time: {print_current_time().strftime('%d-%m-%Y %H:%M')}")
+    print(f"📋 List: {file_ops.current_list()}")
     display_menu()
     
     while True:
@@ -247,6 +362,9 @@ def main():
             elif user_action.startswith('stats'):
                 show_statistics()
             
+            elif user_action.startswith('export'):
+                export_todos_interactive()
+            
             elif user_action.startswith('help'):
                 display_menu()
             
@@ -265,4 +383,11 @@ def main():
             print("Please try again or type 'help' for available commands.")
 
 if __name__ == "__main__":
+    try:
+        args = select_list(sys.argv[1:])
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(2)
+    if args:
+        sys.exit(run_command(args))
     main()
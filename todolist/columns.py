@@ -0,0 +1,216 @@
+import numpy as np
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Iterable, Tuple
+from models import Todo
+
+# Creation times are int64 microseconds since the epoch; this marks "unknown"
+NO_TIME = np.iinfo(np.int64).min
+US_PER_DAY = 86400 * 10 ** 6
+EPOCH = datetime(1970, 1, 1)
+ONE_US = timedelta(microseconds=1)
+
+
+class Codes:
+    """Assigns small integer codes to category/priority values"""
+
+    def __init__(self, default: str):
+        self.default = default
+        self.names: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value) -> int:
+        if value is None:
+            value = self.default
+        elif not isinstance(value, str):
+            value = str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.names)
+            self.names.append(value)
+        return code
+
+    def copy(self) -> 'Codes':
+        codes = Codes(self.default)
+        codes.names = list(self.names)
+        codes.codes = dict(self.codes)
+        return codes
+
+
+def _timestamp(value) -> int:
+    """ISO string or datetime -> microseconds since the epoch, NO_TIME if unknown"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return NO_TIME
+    if not isinstance(value, datetime):
+        return NO_TIME
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None) - value.utcoffset()
+    return (value - EPOCH) // ONE_US
+
+
+def _created(todo: Dict[str, Any]):
+    """Creation time of a todo, skipping the ISO round trip for Todo records"""
+    if isinstance(todo, Todo):
+        return getattr(todo, 'created', None)
+    return todo.get('created_at')
+
+
+class ColumnarStats:
+    """Typed column arrays over the todos, kept in step with a store.
+
+    Registered with ``store.observe()``, it receives the same rebuild/add/
+    remove calls as the secondary indexes. Each todo occupies one slot of
+    the completed, category code, priority code and created-at columns;
+    removing a todo only clears its slot's live flag, and dead slots are
+    squeezed out once they make up half the arrays. summary() answers
+    everything the statistics page shows with vectorized numpy operations.
+    """
+
+    # Fields that, when changed, require a todo's slot to be rewritten
+    FIELDS = ('completed', 'category', 'priority', 'created_at')
+
+    def __init__(self, capacity: int = 1024):
+        self.categories = Codes('General')
+        self.priorities = Codes('Medium')
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.live = np.zeros(capacity, dtype=bool)
+        self.completed = np.zeros(capacity, dtype=bool)
+        self.category = np.zeros(capacity, dtype=np.int32)
+        self.priority = np.zeros(capacity, dtype=np.int32)
+        self.created = np.full(capacity, NO_TIME, dtype=np.int64)
+        self.size = 0
+        self.dead = 0
+        self.slots: Dict[Any, int] = {}
+
+    def _columns(self) -> List[str]:
+        return ['ids', 'live', 'completed', 'category', 'priority', 'created']
+
+    def clear(self):
+        self.__init__()
+
+    def rebuild(self, todos: Iterable[Dict[str, Any]]):
+        todos = list(todos)
+        self.categories = Codes('General')
+        self.priorities = Codes('Medium')
+        self._allocate(max(1024, len(todos) * 2))
+        n = len(todos)
+        self.ids[:n] = [todo['id'] for todo in todos]
+        self.live[:n] = True
+        self.completed[:n] = [bool(todo.get('completed')) for todo in todos]
+        self.category[:n] = [self.categories.code(todo.get('category')) for todo in todos]
+        self.priority[:n] = [self.priorities.code(todo.get('priority')) for todo in todos]
+        self.created[:n] = [_timestamp(_created(todo)) for todo in todos]
+        self.size = n
+        self.slots = {todo['id']: slot for slot, todo in enumerate(todos)}
+
+    def add(self, todo: Dict[str, Any]):
+        if self.size == len(self.ids):
+            self._resize(len(self.ids) * 2)
+        slot = self.size
+        self.ids[slot] = todo['id']
+        self.live[slot] = True
+        self.completed[slot] = bool(todo.get('completed'))
+        self.category[slot] = self.categories.code(todo.get('category'))
+        self.priority[slot] = self.priorities.code(todo.get('priority'))
+        self.created[slot] = _timestamp(_created(todo))
+        self.slots[todo['id']] = slot
+        self.size += 1
+
+    def remove(self, todo: Dict[str, Any]):
+        slot = self.slots.pop(todo['id'], None)
+        if slot is None:
+            return
+        self.live[slot] = False
+        self.dead += 1
+        if self.dead > 1024 and self.dead * 2 > self.size:
+            self._compact()
+
+    def _resize(self, capacity: int):
+        for name in self._columns():
+            column = getattr(self, name)
+            grown = np.full(capacity, NO_TIME, dtype=column.dtype) if name == 'created' \
+                else np.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def _compact(self):
+        keep = self.live[:self.size]
+        n = int(keep.sum())
+        for name in self._columns():
+            column = getattr(self, name)
+            packed = np.zeros(max(1024, n * 2), dtype=column.dtype)
+            packed[:n] = column[:self.size][keep]
+            setattr(self, name, packed)
+        self.size = n
+        self.dead = 0
+        self.slots = dict(zip(self.ids[:n].tolist(), range(n)))
+
+    def _live(self, categories: Codes, priorities: Codes) -> Tuple[np.ndarray, ...]:
+        """The live slots' columns, category and priority given as codes of the tables passed in"""
+        live = self.live[:self.size]
+        category = self.category[:self.size][live]
+        priority = self.priority[:self.size][live]
+        if categories is not self.categories:
+            category = np.array([categories.code(name) for name in self.categories.names],
+                                dtype=np.int32)[category]
+        if priorities is not self.priorities:
+            priority = np.array([priorities.code(name) for name in self.priorities.names],
+                                dtype=np.int32)[priority]
+        return self.completed[:self.size][live], category, priority, self.created[:self.size][live]
+
+    def summary(self, *others: 'ColumnarStats') -> Dict[str, Any]:
+        """Totals, per-category/priority counts and the daily creation timeline.
+
+        by_category is ordered by count (largest first) like value_counts();
+        completion is ordered by category name like a groupby. The todos
+        tracked by others (e.g. the archive's) are counted in too.
+        """
+        categories, priorities = self.categories, self.priorities
+        if others:
+            categories, priorities = categories.copy(), priorities.copy()
+        columns = [stats._live(categories, priorities) for stats in (self,) + others]
+        completed, category, priority, created = (np.concatenate(column) for column in zip(*columns))
+
+        category_names = np.array(categories.names, dtype=object)
+        category_total = np.bincount(category, minlength=len(category_names))
+        category_done = np.bincount(category, weights=completed, minlength=len(category_names)).astype(np.int64)
+        used = np.flatnonzero(category_total)
+        by_count = used[np.argsort(-category_total[used], kind='stable')]
+        by_name = used[np.argsort(category_names[used].astype(str), kind='stable')]
+
+        priority_names = np.array(priorities.names, dtype=object)
+        priority_total = np.bincount(priority, minlength=len(priority_names))
+        used_priorities = np.flatnonzero(priority_total)
+        used_priorities = used_priorities[np.argsort(-priority_total[used_priorities], kind='stable')]
+
+        days, per_day = np.unique(created[created != NO_TIME] // US_PER_DAY, return_counts=True)
+        high = priorities.codes.get('High')
+
+        return {
+            'total': len(completed),
+            'completed': int(completed.sum()),
+            'high_priority': int(priority_total[high]) if high is not None else 0,
+            'by_category': {
+                'names': category_names[by_count].tolist(),
+                'counts': category_total[by_count]
+            },
+            'by_priority': {
+                'names': priority_names[used_priorities].tolist(),
+                'counts': priority_total[used_priorities]
+            },
+            'timeline': {
+                'dates': days.astype('datetime64[D]'),
+                'counts': per_day
+            },
+            'completion': {
+                'categories': category_names[by_name].tolist(),
+                'total': category_total[by_name],
+                'completed': category_done[by_name],
+                'completion_rate': np.round(category_done[by_name] / category_total[by_name] * 100, 1)
+            }
+        }
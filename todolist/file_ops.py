@@ -1,12 +1,212 @@
 import os
+import io
+import re
+import csv
 import json
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import List, Dict, Any
+from itertools import chain
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable, Iterator, Union
+from store import TodoStore, ConcurrentModificationError
+from snapshot import parse_legacy_lines
+from models import Todo, FIELDS
+from importer import CsvImporter, IMPORT_MODES, IMPORT_CHUNK_SIZE
+from query import Query
+import archive
+import instrumentation
 
 # Get the directory where this script is located
 script_dir = os.path.dirname(os.path.abspath(__file__))
-filepath = os.path.join(script_dir, 'todoText', 'todos.json')
-legacy_filepath = os.path.join(script_dir, 'todoText', 'todos.txt')
+# Data lives in todoText/ next to the code unless TODO_DATA_DIR points elsewhere
+data_dir = os.environ.get('TODO_DATA_DIR') or os.path.join(script_dir, 'todoText')
+filepath = os.path.join(data_dir, 'todos.json')
+legacy_filepath = os.path.join(data_dir, 'todos.txt')
+
+# Named lists: each keeps its own todos file, and with it its own store,
+# indexes, lock and archive. The default list is todoText/todos.json, any
+# other list todoText/lists/<name>/todos.json
+DEFAULT_LIST = 'default'
+LIST_NAME = re.compile(r'[A-Za-z0-9][A-Za-z0-9_-]{0,63}')
+lists_dir = os.path.join(data_dir, 'lists')
+# The list file_ops calls work on, per thread and asyncio task; TODO_LIST picks the initial one
+_current_list: ContextVar[str] = ContextVar('todo_list', default=os.environ.get('TODO_LIST') or DEFAULT_LIST)
+
+# Storage backend: 'json' keeps todos.json, 'sqlite' keeps todos.db next to it
+BACKENDS = ('json', 'sqlite')
+BACKEND = os.environ.get('TODO_BACKEND', 'json').lower()
+
+# Append mutations to a journal instead of rewriting todos.json every time
+JOURNAL_MODE = os.environ.get('TODO_JOURNAL_MODE', '').lower() in ('1', 'true', 'yes')
+
+# Apply mutations in memory and persist them from a background thread, a burst at a time
+WRITE_BEHIND = os.environ.get('TODO_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes')
+
+# Completed todos created more than this many days ago are moved to the
+# archive (see archive.py) by archive_completed(); with TODO_ARCHIVE_DAYS
+# set, that also happens once when a process first touches the todos
+ARCHIVE_AFTER_DAYS = float(os.environ.get('TODO_ARCHIVE_DAYS') or 30)
+AUTO_ARCHIVE = bool(os.environ.get('TODO_ARCHIVE_DAYS'))
+
+# Snapshot encoding for the JSON backend: 'json' or the compact 'binary' layout
+SNAPSHOT_FORMATS = ('json', 'binary')
+SNAPSHOT_FORMAT = os.environ.get('TODO_SNAPSHOT_FORMAT', 'json').lower()
+
+# Export formats and their MIME types; exports are produced this many todos at a time
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson', 'json': 'application/json'}
+EXPORT_CHUNK_SIZE = 1000
+
+# One store per backend and todos file, shared by every caller in this process
+_stores: Dict[tuple, TodoStore] = {}
+# Archive stores opened by this process, by todos file (JSON backend only)
+_archives: Dict[str, TodoStore] = {}
+# Columnar statistics attached to each store on first use (needs numpy)
+_columns: Dict[tuple, Any] = {}
+# (backend, todos file) pairs whose migration check already ran in this process
+_migrated: set = set()
+
+def list_path(name: str) -> str:
+    """Return the todos file of a named list; raises ValueError for an invalid name"""
+    if name == DEFAULT_LIST:
+        return filepath
+    if not isinstance(name, str) or not LIST_NAME.fullmatch(name):
+        raise ValueError(f"Invalid list name '{name}': use up to 64 letters, digits, '-' and '_'")
+    return os.path.join(lists_dir, name, 'todos.json')
+
+def _path(filename=None) -> str:
+    """The todos file to use: filename if given, otherwise the current list's"""
+    return list_path(_current_list.get()) if filename is None else filename
+
+def current_list() -> str:
+    """Name of the list file_ops calls work on in this thread or task"""
+    return _current_list.get()
+
+def set_list(name: str):
+    """Make name the list file_ops calls work on in this thread or task"""
+    list_path(name)
+    _current_list.set(name)
+
+@contextmanager
+def use_list(name: str) -> Iterator[None]:
+    """Work on the named list inside a with block"""
+    list_path(name)
+    token = _current_list.set(name)
+    try:
+        yield
+    finally:
+        _current_list.reset(token)
+
+def get_lists() -> List[str]:
+    """Names of the existing lists, the default one first"""
+    try:
+        names = sorted(name for name in os.listdir(lists_dir)
+                       if LIST_NAME.fullmatch(name) and name != DEFAULT_LIST
+                       and os.path.isdir(os.path.join(lists_dir, name)))
+    except FileNotFoundError:
+        names = []
+    return [DEFAULT_LIST] + names
+
+def create_list(name: str):
+    """Create an empty list unless it exists already"""
+    with use_list(name):
+        get_revision()
+
+def sqlite_path(filename=None) -> str:
+    """Return the SQLite database that stands in for a todos JSON file"""
+    return os.path.splitext(_path(filename))[0] + '.db'
+
+def get_store(filename=None) -> TodoStore:
+    """Return the shared store for a todos file (default: the current list's) on the configured backend"""
+    filename = _path(filename)
+    key = (BACKEND, filename)
+    store = _stores.get(key)
+    if store is None:
+        if BACKEND == 'sqlite':
+            from sqlite_store import SqliteStore
+            store = SqliteStore(sqlite_path(filename))
+        else:
+            store = TodoStore(filename, journal=JOURNAL_MODE, snapshot_format=SNAPSHOT_FORMAT,
+                              write_behind=WRITE_BEHIND)
+        store = _stores.setdefault(key, store)
+    return store
+
+def get_archive(filename=None, create: bool = False) -> Optional[TodoStore]:
+    """Return the store of archived todos for a todos file, None if there is none
+
+    Only the JSON backend archives. The archive is read the first time it
+    is used; create=True starts an empty one if nothing was archived yet.
+    """
+    if BACKEND != 'json':
+        return None
+    filename = _path(filename)
+    store = _archives.get(filename)
+    if store is None:
+        path = archive.archive_path(filename)
+        if not create and not os.path.exists(path):
+            return None
+        store = _archives.setdefault(filename, TodoStore(path, journal=True, snapshot_format=SNAPSHOT_FORMAT))
+    return store
+
+def set_backend(name: str):
+    """Select the storage backend ('json' or 'sqlite')"""
+    global BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}', expected one of {BACKENDS}")
+    BACKEND = name
+    _migrated.clear()
+
+def set_journal_mode(enabled: bool):
+    """Switch journal mode on or off for all stores"""
+    global JOURNAL_MODE
+    JOURNAL_MODE = enabled
+    for store in _stores.values():
+        if isinstance(store, TodoStore):
+            store.journal = enabled
+
+def set_write_behind(enabled: bool):
+    """Switch write-behind mode on or off for all JSON stores
+
+    Switching it off writes whatever is still held back.
+    """
+    global WRITE_BEHIND
+    WRITE_BEHIND = enabled
+    for store in _stores.values():
+        if isinstance(store, TodoStore):
+            store.write_behind = enabled
+            if not enabled:
+                store.flush()
+
+def flush() -> int:
+    """Persist the mutations write-behind mode is holding back, return how many
+
+    They are also written within a few milliseconds by a background
+    thread and when the process exits; call this when they must be on
+    disk now, e.g. before handing the files to another program.
+    """
+    return sum(store.flush() for store in _stores.values() if isinstance(store, TodoStore))
+
+def set_snapshot_format(fmt: str):
+    """Select how snapshots are written ('json' or 'binary'); reads detect either"""
+    global SNAPSHOT_FORMAT
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Unknown snapshot format '{fmt}', expected one of {SNAPSHOT_FORMATS}")
+    SNAPSHOT_FORMAT = fmt
+    for store in chain(_stores.values(), _archives.values()):
+        if isinstance(store, TodoStore):
+            store.snapshot_format = fmt
+
+def _ensure_migrated():
+    """Run the migration checks once per process for the current list"""
+    filename = _path()
+    key = (BACKEND, filename)
+    if key not in _migrated:
+        _migrated.add(key)
+        if filename == filepath:
+            migrate_legacy_todos()
+        if BACKEND == 'sqlite':
+            migrate_to_sqlite()
+        elif AUTO_ARCHIVE:
+            archive_completed()
 
 def migrate_legacy_todos():
     """Migrate from old txt format to new json format"""
@@ -15,123 +215,428 @@ def migrate_legacy_todos():
             with open(legacy_filepath, 'r') as file:
                 old_todos = file.readlines()
             
-            new_todos = []
-            for i, todo in enumerate(old_todos):
-                todo = todo.strip()
-                if todo:
-                    new_todos.append({
-                        'id': i + 1,
-                        'text': todo,
-                        'completed': False,
-                        'created_at': datetime.now().isoformat(),
-                        'category': 'General',
-                        'priority': 'Medium',
-                        'due_date': None
-                    })
-            
-            write_todos(new_todos)
+            write_todos(parse_legacy_lines(old_todos), filepath)
             # Backup old file
             os.rename(legacy_filepath, legacy_filepath + '.backup')
         except Exception as e:
             print(f"Migration failed: {e}")
 
-def read_todos(filename=filepath) -> List[Dict[str, Any]]:
-    """Read todos from JSON file"""
-    # Ensure the directory exists
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    
+def migrate_to_sqlite(filename=None) -> int:
+    """One-shot copy of a todos JSON file into its (empty) SQLite database"""
+    from sqlite_store import migrate_json_to_sqlite
+    filename = _path(filename)
+    try:
+        return migrate_json_to_sqlite(filename, sqlite_path(filename))
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return 0
+
+def read_todos(filename=None) -> List[Dict[str, Any]]:
+    """Read todos from the configured store, archived ones last"""
     # Check for legacy migration
-    migrate_legacy_todos()
+    _ensure_migrated()
     
-    if not os.path.exists(filename):
-        # Create the file if it doesn't exist
-        with open(filename, 'w') as file:
-            json.dump([], file)
-        return []
-    
-    try:
-        with open(filename, 'r') as file:
-            return json.load(file)
-    except (json.JSONDecodeError, Exception):
-        # If file is corrupted, return empty list
-        return []
-
-def write_todos(todos: List[Dict[str, Any]], filename=filepath):
-    """Write todos to JSON file"""
+    # The store hands out a new list, so callers can sort/filter it freely
+    todos = get_store(filename).load()
+    cold = get_archive(filename)
+    if cold is not None:
+        todos += cold.load()
+    return todos
+
+def write_todos(todos: List[Dict[str, Any]], filename=None, expected_version=None):
+    """Replace all todos in the configured store, archived ones included
+
+    Pass the value of get_version() taken when the todos were read as
+    expected_version to get a ConcurrentModificationError instead of
+    silently overwriting changes another writer made in the meantime.
+    """
     try:
-        with open(filename, 'w') as file:
-            json.dump(todos, file, indent=2)
+        get_store(filename).save(todos, expected_version)
+        # The given todos are all there is now; they are kept in the hot tier
+        cold = get_archive(filename)
+        if cold is not None:
+            cold.save([])
+    except ConcurrentModificationError:
+        raise
     except Exception as e:
         print(f"Error writing todos: {e}")
 
-def add_todo(text: str, category: str = "General", priority: str = "Medium", due_date: str = None) -> Dict[str, Any]:
+def get_version(filename=None):
+    """Get a token that changes whenever the stored todos change"""
+    _ensure_migrated()
+    return get_store(filename).version
+
+def get_revision(filename=None) -> int:
+    """Get a counter that changes whenever the todos change
+
+    Every add/update/delete and every reload of a file changed by another
+    process moves it, so it can key caches of anything derived from the
+    todos. Once the archive is in use its changes count too.
+
+    The counter is kept in memory and starts again in every process, so it
+    is only meaningful inside the process that read it; use get_version()
+    for a token that describes the files themselves.
+    """
+    _ensure_migrated()
+    filename = _path(filename)
+    revision = get_store(filename).revision
+    cold = _archives.get(filename) if BACKEND == 'json' else None
+    if cold is not None:
+        revision += cold.revision
+    return revision
+
+def add_todo(text: str, category: str = "General", priority: str = "Medium", due_date: str = None) -> Todo:
     """Add a new todo item"""
-    todos = read_todos()
+    _ensure_migrated()
     
-    # Generate new ID
-    max_id = max([todo.get('id', 0) for todo in todos], default=0)
-    new_id = max_id + 1
+    # The store allocates the ID from its persisted counter
+    new_todo = Todo(
+        id=None,
+        text=text.strip(),
+        completed=False,
+        created_at=datetime.now(),
+        category=category,
+        priority=priority,
+        due_date=due_date
+    )
     
-    new_todo = {
-        'id': new_id,
-        'text': text.strip(),
-        'completed': False,
-        'created_at': datetime.now().isoformat(),
-        'category': category,
-        'priority': priority,
-        'due_date': due_date
-    }
-    
-    todos.append(new_todo)
-    write_todos(todos)
-    return new_todo
+    return get_store().add(new_todo)
 
 def update_todo(todo_id: int, **updates) -> bool:
-    """Update a specific todo by ID"""
-    todos = read_todos()
-    
-    for todo in todos:
-        if todo['id'] == todo_id:
-            todo.update(updates)
-            write_todos(todos)
-            return True
-    return False
+    """Update a specific todo by ID; an archived todo moves back to the hot tier"""
+    _ensure_migrated()
+    store = get_store()
+    if store.update(todo_id, updates):
+        return True
+    cold = get_archive()
+    if cold is None or not archive.restore(store, cold, [todo_id]):
+        return False
+    return store.update(todo_id, updates)
 
 def delete_todo(todo_id: int) -> bool:
     """Delete a todo by ID"""
-    todos = read_todos()
-    
-    for i, todo in enumerate(todos):
-        if todo['id'] == todo_id:
-            todos.pop(i)
-            write_todos(todos)
-            return True
-    return False
+    _ensure_migrated()
+    if get_store().delete(todo_id):
+        return True
+    cold = get_archive()
+    return cold is not None and cold.delete(todo_id)
+
+def bulk_update(predicate: Callable[[Dict[str, Any]], bool], **changes) -> int:
+    """Apply changes to every todo matching predicate with one read and one write
+
+    Archived todos that match are moved back to the hot tier first.
+    """
+    _ensure_migrated()
+    store = get_store()
+    cold = get_archive()
+    if cold is not None:
+        archive.restore(store, cold, [todo['id'] for todo in cold.load() if predicate(todo)])
+    return store.update_where(predicate, changes)
+
+def bulk_delete(todo_ids: Iterable[int]) -> int:
+    """Delete several todos by ID with one read and one write"""
+    _ensure_migrated()
+    todo_ids = list(todo_ids)
+    count = get_store().delete_ids(todo_ids)
+    cold = get_archive()
+    if cold is not None:
+        count += cold.delete_ids(todo_ids)
+    return count
+
+def archive_completed(days: float = None, filename=None) -> int:
+    """Move completed todos created more than days ago (default ARCHIVE_AFTER_DAYS) to the archive
+
+    Returns how many were moved. Views of pending todos no longer read
+    them, while queries that can match completed todos, the statistics
+    and exports still include them. Only the JSON backend archives; on
+    SQLite, where the completed column is indexed, this returns 0.
+    """
+    _ensure_migrated()
+    if BACKEND != 'json':
+        return 0
+    if days is None:
+        days = ARCHIVE_AFTER_DAYS
+    filename = _path(filename)
+    cold = get_archive(filename, create=True)
+    moved = archive.archive_completed(get_store(filename), cold, archive.cutoff(days))
+    # Lets a new process show the stats cards without reading the archive
+    archive.save_stats(filename, cold)
+    return moved
+
+@contextmanager
+def transaction(filename=None, expected_version=None) -> Iterator[Any]:
+    """Group several add/update/delete calls into a single write
+
+    Usage:
+        with file_ops.transaction() as batch:
+            batch.update(1, completed=True)
+            batch.delete(2)
+
+    Archived todos the batch updates or deletes are moved back to the hot
+    tier just before it is applied, like update_todo() does.
+    """
+    _ensure_migrated()
+    store = get_store(filename)
+    with store.transaction(expected_version) as batch:
+        yield batch
+        cold = get_archive(filename)
+        if cold is not None:
+            referenced = {record['id'] for record in batch.records if record['op'] != 'add'}
+            archive.restore(store, cold, [todo_id for todo_id in referenced if store.get(todo_id) is None])
 
 def get_todo_by_id(todo_id: int) -> Dict[str, Any]:
     """Get a specific todo by ID"""
-    todos = read_todos()
-    
-    for todo in todos:
-        if todo['id'] == todo_id:
-            return todo
-    return None
+    _ensure_migrated()
+    todo = get_store().get(todo_id)
+    if todo is None:
+        cold = get_archive()
+        if cold is not None:
+            todo = cold.get(todo_id)
+    return todo
+
+def _query(query: Query, filename=None) -> Tuple[List[Dict[str, Any]], int]:
+    """Run a query on the hot todos, and on the archive too when it can match completed ones"""
+    store = get_store(filename)
+    cold = None if query.completed is False else get_archive(filename)
+    if cold is None:
+        return store.query(query)
+    return archive.query(query, store, cold)
 
 def get_todos_by_category(category: str) -> List[Dict[str, Any]]:
     """Get todos filtered by category"""
-    todos = read_todos()
-    return [todo for todo in todos if todo.get('category', 'General') == category]
+    _ensure_migrated()
+    return _query(Query(category=category))[0]
 
 def get_todos_by_priority(priority: str) -> List[Dict[str, Any]]:
     """Get todos filtered by priority"""
-    todos = read_todos()
-    return [todo for todo in todos if todo.get('priority', 'Medium') == priority]
+    _ensure_migrated()
+    return _query(Query(priority=priority))[0]
+
+def get_todos_by_due_date(start: str = None, end: str = None) -> List[Dict[str, Any]]:
+    """Get todos due between two ISO dates (inclusive), earliest first"""
+    _ensure_migrated()
+    cold = get_archive()
+    if cold is None:
+        return get_store().due_between(start, end)
+    return archive.due_between(get_store(), cold, start, end)
+
+def filter_todos(category: str = None, priority: str = None, completed: bool = None,
+                 search: str = None) -> List[Dict[str, Any]]:
+    """Get todos matching every given filter (None means any)"""
+    _ensure_migrated()
+    return _query(Query(category, priority, completed, search or None))[0]
+
+def get_todo_page(category: str = None, priority: str = None, completed: bool = None, search: str = None,
+                  order_by: str = None, descending: bool = False, offset: int = 0,
+                  limit: int = None) -> Tuple[List[Dict[str, Any]], int]:
+    """Get one page of filtered todos in sorted order and the total number of matches
+
+    order_by is 'created_at', 'priority', 'category' or 'due_date'; the
+    store sorts and slices, so only the requested todos are returned.
+    """
+    _ensure_migrated()
+    return _query(Query(category, priority, completed, search or None, order_by=order_by,
+                        descending=descending, offset=offset, limit=limit))
+
+def query(spec: Union[Query, Dict[str, Any]] = None, **fields) -> Tuple[List[Dict[str, Any]], int]:
+    """Run a structured query and return the requested todos and the total number of matches
+
+    spec is a Query or a dict of Query fields (filters, order_by,
+    descending, offset, limit); keyword arguments are added to it:
+
+        todos, total = query(completed=False, order_by='due_date', limit=10)
+        todos, total = query({'category': 'Work', 'due_to': '2024-06-30'})
+
+    The store plans the query once, starting from its most selective
+    index and testing the other filters in one pass. Raises ValueError for
+    an unknown field or sort key.
+    """
+    _ensure_migrated()
+    if isinstance(spec, Query):
+        spec = spec._asdict()
+    spec = Query.from_spec({**(spec or {}), **fields})
+    return _query(spec)
+
+def get_categories(archived: bool = True) -> List[str]:
+    """Get all categories in use, sorted
+
+    archived=False leaves out the categories only archived todos use, so
+    views of pending todos don't load the archive.
+    """
+    _ensure_migrated()
+    cold = get_archive() if archived else None
+    if cold is None:
+        return get_store().categories()
+    return sorted(set(get_store().categories()) | set(cold.categories()))
 
 def search_todos(query: str) -> List[Dict[str, Any]]:
-    """Search todos by text content"""
-    todos = read_todos()
-    query = query.lower()
-    return [todo for todo in todos if query in todo['text'].lower()]
+    """Search todos by text content
+
+    Every word in the query must start a word in the todo text, so partially
+    typed words still match; case and diacritics are ignored. Results are
+    ranked, best match first. Both backends match the same todos but rank
+    them differently: the JSON index scores exact words above prefixes,
+    SQLite uses FTS5's bm25.
+    """
+    _ensure_migrated()
+    return _query(Query(search=query or None))[0]
+
+def get_stats(filename=None) -> Dict[str, Any]:
+    """Get running totals: total, completed, pending, by_category,
+    by_priority and completed_by_category
+
+    The store updates these on every add/update/delete, so this does not
+    scan the todos. Archived todos are counted too, from the totals saved
+    next to the archive while it is not loaded and unchanged.
+    """
+    _ensure_migrated()
+    filename = _path(filename)
+    stats = get_store(filename).stats()
+    cold = _archive_stats(filename)
+    if cold is not None:
+        stats = archive.merge_stats(stats, cold)
+    return stats
+
+def _archive_stats(filename: str) -> Optional[Dict[str, Any]]:
+    """Running totals of a todos file's archive, None if there is none"""
+    if BACKEND != 'json':
+        return None
+    if filename not in _archives:
+        stats = archive.saved_stats(filename)
+        if stats is not None:
+            return stats
+    cold = get_archive(filename)
+    if cold is None:
+        return None
+    return archive.save_stats(filename, cold)
+
+def get_statistics(filename=None) -> Dict[str, Any]:
+    """Get totals, category/priority breakdowns and the creation timeline
+
+    Computed with numpy from typed columns that the store keeps up to date
+    on every change, so nothing is rebuilt per call. See columns.py for the
+    shape of the result.
+    """
+    _ensure_migrated()
+    filename = _path(filename)
+    store = get_store(filename)
+    columns = _columnar(store, (BACKEND, filename))
+    cold = get_archive(filename)
+    if cold is None:
+        with store.reading():
+            return columns.summary()
+    cold_columns = _columnar(cold, ('archive', filename))
+    with store.reading(), cold.reading():
+        return columns.summary(cold_columns)
+
+def _columnar(store: TodoStore, key: tuple):
+    """The ColumnarStats kept in step with store, attached on first use"""
+    from columns import ColumnarStats
+    columns = _columns.get(key)
+    if columns is None:
+        columns = _columns[key] = ColumnarStats()
+        store.observe(columns)
+    return columns
+
+def iter_export(fmt: str = 'csv', chunk_size: int = EXPORT_CHUNK_SIZE, filename=None) -> Iterator[str]:
+    """Yield an export of all todos as text chunks of chunk_size todos each
+
+    'csv' has one column per standard todo field (other keys are left
+    out), 'ndjson' one JSON object per line and 'json' a single array.
+    Todos are read from the store batch by batch, so memory stays bounded
+    by the chunk size whatever the number of todos; archived todos follow
+    the others.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {tuple(EXPORT_FORMATS)}")
+    _ensure_migrated()
+    first = True
+    if fmt == 'json':
+        yield '['
+    batches = get_store(filename).scan(chunk_size)
+    cold = get_archive(filename)
+    if cold is not None:
+        batches = chain(batches, cold.scan(chunk_size))
+    for batch in batches:
+        buffer = io.StringIO()
+        if fmt == 'csv':
+            writer = csv.DictWriter(buffer, fieldnames=FIELDS, extrasaction='ignore', lineterminator='\n')
+            if first:
+                writer.writeheader()
+            writer.writerows(batch)
+        elif fmt == 'ndjson':
+            for todo in batch:
+                buffer.write(json.dumps(_plain(todo)) + '\n')
+        else:
+            for todo in batch:
+                buffer.write(('\n  ' if first else ',\n  ') + json.dumps(_plain(todo)))
+                first = False
+        first = False
+        yield buffer.getvalue()
+    if fmt == 'json':
+        yield '\n]\n'
+    elif fmt == 'csv' and first:
+        # No todos: still emit the header row
+        yield ','.join(FIELDS) + '\n'
+
+def _plain(todo) -> Dict[str, Any]:
+    return todo.to_dict() if isinstance(todo, Todo) else todo
+
+def export_todos(path: str, fmt: str = None, chunk_size: int = EXPORT_CHUNK_SIZE, filename=None) -> str:
+    """Write all todos to path in chunks; the format defaults to the file extension
+
+    Returns the format used.
+    """
+    if fmt is None:
+        fmt = os.path.splitext(path)[1].lstrip('.').lower() or 'csv'
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {tuple(EXPORT_FORMATS)}")
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        for chunk in iter_export(fmt, chunk_size, filename):
+            file.write(chunk)
+    if instrumentation.ENABLED:
+        instrumentation.add_bytes(written=os.path.getsize(path))
+    return fmt
+
+def import_todos(source, mode: str = 'append', chunk_size: int = IMPORT_CHUNK_SIZE,
+                 filename=None) -> Dict[str, Any]:
+    """Import todos from a CSV file (path or open file) with a single write
+
+    mode is one of IMPORT_MODES:
+      append  - every row becomes a new todo with a fresh id
+      upsert  - a row whose id exists replaces that todo, others are added
+      replace - the current todos are dropped and the file's rows kept
+
+    The file is parsed and validated in chunks (see importer.py); invalid
+    rows are skipped. Returns a report with the number of rows read,
+    imported and rejected, plus the first rejection reasons.
+    """
+    if mode not in IMPORT_MODES:
+        raise ValueError(f"Unknown import mode '{mode}', expected one of {IMPORT_MODES}")
+    _ensure_migrated()
+    reader = CsvImporter(source, chunk_size)
+    # Ids an upsert replaces must not stay behind in the archive
+    upserted = []
+
+    def todos():
+        for chunk in reader.chunks():
+            for todo in chunk:
+                if mode == 'append':
+                    todo.id = None
+                elif todo.id is not None:
+                    upserted.append(todo.id)
+                yield todo
+
+    imported = get_store(filename).bulk_import(todos(), replace=(mode == 'replace'))
+    cold = get_archive(filename)
+    if cold is not None:
+        if mode == 'replace':
+            cold.save([])
+        elif upserted:
+            cold.delete_ids(upserted)
+    report = reader.report()
+    report['imported'] = imported
+    return report
 
 # Legacy functions for backward compatibility
 def read_todos_legacy():
@@ -141,17 +646,7 @@ def read_todos_legacy():
 
 def write_todos_legacy(todo_lines):
     """Legacy function that accepts text lines"""
-    todos = []
-    for i, line in enumerate(todo_lines):
-        text = line.strip()
-        if text:
-            todos.append({
-                'id': i + 1,
-                'text': text,
-                'completed': False,
-                'created_at': datetime.now().isoformat(),
-                'category': 'General',
-                'priority': 'Medium',
-                'due_date': None
-            })
-    write_todos(todos)
\ No newline at end of file
+    write_todos(parse_legacy_lines(todo_lines))
+
+# Record timings and I/O of every public function when instrumentation is on
+instrumentation.instrument_functions(globals(), 'file_ops.')
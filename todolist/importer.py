@@ -0,0 +1,201 @@
+import io
+import csv
+from datetime import datetime, date
+from typing import List, Dict, Any, Tuple, Optional, Iterator
+from models import Todo, FIELDS
+
+# How imported rows are combined with the todos already in the store
+IMPORT_MODES = ('append', 'upsert', 'replace')
+IMPORT_CHUNK_SIZE = 5000
+# Only the first rejected rows are reported in detail
+MAX_REPORTED_ERRORS = 100
+
+PRIORITIES = {'high': 'High', 'medium': 'Medium', 'low': 'Low'}
+TRUE_VALUES = frozenset(('true', 't', 'yes', 'y', '1', '1.0'))
+FALSE_VALUES = frozenset(('false', 'f', 'no', 'n', '0', '0.0'))
+# Spellings of an empty cell, including what pandas writes for NaN/NaT
+MISSING_VALUES = frozenset(('', 'nan', 'nat', 'none', 'null'))
+
+
+def _missing(value: Optional[str]) -> bool:
+    return value is None or value.strip().lower() in MISSING_VALUES
+
+
+def parse_id(value: Optional[str]) -> Optional[int]:
+    if _missing(value):
+        return None
+    try:
+        parsed = int(value)
+    except ValueError:
+        # pandas writes an int column holding NaNs as floats: "3.0"
+        number = float(value)
+        if not number.is_integer():
+            raise ValueError(f"invalid id {value!r}") from None
+        parsed = int(number)
+    if parsed < 1:
+        raise ValueError(f"invalid id {value!r}")
+    return parsed
+
+
+def parse_bool(value: Optional[str]) -> bool:
+    if value is None:
+        return False
+    lowered = value.strip().lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES or lowered in MISSING_VALUES:
+        return False
+    raise ValueError(f"invalid completed value {value!r}")
+
+
+def parse_created(value: Optional[str], default: datetime) -> datetime:
+    if _missing(value):
+        return default
+    try:
+        return datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"invalid created_at {value!r}") from None
+
+
+def parse_due(value: Optional[str]) -> Optional[str]:
+    """ISO date or datetime -> ISO date string, None if empty"""
+    if _missing(value):
+        return None
+    value = value.strip()
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).date().isoformat()
+    except ValueError:
+        raise ValueError(f"invalid due_date {value!r}") from None
+
+
+def parse_category(value: Optional[str]) -> str:
+    return 'General' if _missing(value) else value.strip()
+
+
+def parse_priority(value: Optional[str]) -> str:
+    if _missing(value):
+        return 'Medium'
+    priority = PRIORITIES.get(value.strip().lower())
+    if priority is None:
+        raise ValueError(f"invalid priority {value!r}")
+    return priority
+
+
+class RowParser:
+    """Turns one CSV row into a Todo, given the row index of each of FIELDS.
+
+    Categories, priorities, flags and due dates repeat across a large file,
+    so their normalized values are cached by raw cell text.
+    """
+
+    def __init__(self, columns: Tuple[int, ...], now: datetime):
+        self.columns = columns
+        self.now = now
+        self.completed: Dict[str, bool] = {}
+        self.categories: Dict[str, str] = {}
+        self.priorities: Dict[str, str] = {}
+        self.due_dates: Dict[str, Optional[str]] = {}
+
+    @staticmethod
+    def _cached(cache: Dict[str, Any], parse, value: str):
+        try:
+            return cache[value]
+        except KeyError:
+            parsed = cache[value] = parse(value)
+            return parsed
+
+    def __call__(self, row: List[str]) -> Todo:
+        id_col, text_col, completed_col, created_col, category_col, priority_col, due_col = self.columns
+        text = row[text_col].strip()
+        if not text:
+            raise ValueError("empty text")
+        return Todo(
+            id=parse_id(row[id_col]),
+            text=text,
+            completed=self._cached(self.completed, parse_bool, row[completed_col]),
+            created_at=parse_created(row[created_col], self.now),
+            category=self._cached(self.categories, parse_category, row[category_col]),
+            priority=self._cached(self.priorities, parse_priority, row[priority_col]),
+            due_date=self._cached(self.due_dates, parse_due, row[due_col])
+        )
+
+
+class CsvImporter:
+    """Reads todos from a CSV file in chunks, validating every row.
+
+    Rows are normalized into the todo schema: ids and booleans written as
+    floats or words are coerced, empty cells (including pandas' "nan" and
+    "NaT") fall back to the defaults add_todo uses, and priorities are
+    matched case-insensitively. A row that cannot be normalized is
+    rejected and counted, with the first MAX_REPORTED_ERRORS reasons kept
+    in ``errors`` as (line number, message); the rest of the file still
+    imports. Columns other than the standard todo fields are ignored.
+    """
+
+    def __init__(self, source, chunk_size: int = IMPORT_CHUNK_SIZE):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self.rejected = 0
+        self.errors: List[Tuple[int, str]] = []
+
+    def _open(self):
+        """Text stream over a path, a binary file (e.g. an upload) or a text file"""
+        if isinstance(self.source, str):
+            return open(self.source, encoding='utf-8-sig', newline='')
+        if isinstance(self.source, io.TextIOBase):
+            return self.source
+        return io.TextIOWrapper(self.source, encoding='utf-8-sig', newline='')
+
+    def _reject(self, line: int, message: str):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def chunks(self) -> Iterator[List[Todo]]:
+        """Yield lists of up to chunk_size valid todos.
+
+        Raises ValueError if the file has no ``text`` column.
+        """
+        stream = self._open()
+        try:
+            reader = csv.reader(stream)
+            header = [name.strip().lower() for name in next(reader, [])]
+            if 'text' not in header:
+                raise ValueError("CSV file needs a 'text' column")
+            width = len(header)
+            # Absent columns point one past the end, at the '' every row is padded with
+            columns = tuple(header.index(name) if name in header else width for name in FIELDS)
+            parse = RowParser(columns, datetime.now())
+            chunk = []
+            for row in reader:
+                if not row:
+                    continue
+                self.rows += 1
+                if len(row) != width:
+                    row = (row + [''] * width)[:width]
+                row.append('')
+                try:
+                    chunk.append(parse(row))
+                except ValueError as e:
+                    self._reject(reader.line_num, str(e))
+                    continue
+                if len(chunk) >= self.chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        finally:
+            if stream is not self.source:
+                if isinstance(stream, io.TextIOWrapper) and not isinstance(self.source, str):
+                    # Leave the caller's binary file open
+                    stream.detach()
+                else:
+                    stream.close()
+
+    def report(self) -> Dict[str, Any]:
+        return {'rows': self.rows, 'rejected': self.rejected, 'errors': list(self.errors)}
@@ -0,0 +1,383 @@
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable
+
+# Dicts with None values are used as insertion-ordered sets of todo ids
+IdSet = Dict[int, None]
+
+# Letters and digits, as FTS5's unicode61 tokenizer splits words for the SQLite backend
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+# Rank used when ordering by priority: High first, unknown values with Medium
+PRIORITY_RANK = {'High': 0, 'Medium': 1, 'Low': 2}
+
+# Sort key per orderable field, matching the web list's sort options:
+# todos without a due date sort last, missing values take their defaults.
+# Ties are broken by id, so descending order is the exact reverse.
+SORT_KEYS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    'created_at': lambda todo: str(todo.get('created_at') or ''),
+    'priority': lambda todo: PRIORITY_RANK.get(todo.get('priority'), 1),
+    'category': lambda todo: str(todo.get('category') or 'General'),
+    'due_date': lambda todo: str(todo.get('due_date') or '9999-12-31'),
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens with diacritics removed, so 'cafe' matches 'Café'"""
+    if not isinstance(text, str):
+        return []
+    text = text.lower()
+    if not text.isascii():
+        text = ''.join(char for char in unicodedata.normalize('NFD', text) if not unicodedata.combining(char))
+    return _TOKEN_RE.findall(text)
+
+
+class TextIndex:
+    """Inverted index from word tokens to the todos containing them.
+
+    The vocabulary is also kept as a sorted list so a query token can match
+    every indexed word it is a prefix of, which keeps type-ahead search
+    working while the user is still typing a word.
+    """
+
+    def __init__(self):
+        # token -> {todo id: occurrences}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.vocabulary: List[str] = []
+
+    def add(self, todo_id: int, text: str, keep_sorted: bool = True):
+        """Index a todo's text; with keep_sorted=False the caller sorts the vocabulary afterwards"""
+        for token in tokenize(text):
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = {}
+                if keep_sorted:
+                    insort(self.vocabulary, token)
+                else:
+                    self.vocabulary.append(token)
+            ids[todo_id] = ids.get(todo_id, 0) + 1
+
+    def remove(self, todo_id: int, text: str):
+        for token in set(tokenize(text)):
+            ids = self.postings.get(token)
+            if ids is not None and ids.pop(todo_id, None) is not None and not ids:
+                del self.postings[token]
+                self.vocabulary.pop(bisect_left(self.vocabulary, token))
+
+    def _expand(self, prefix: str) -> List[str]:
+        """Return every indexed token starting with prefix"""
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_left(self.vocabulary, prefix + '\U0010ffff', start)
+        return self.vocabulary[start:end]
+
+    def search(self, query: str, text_of: Callable[[int], str] = None) -> Optional[List[int]]:
+        """Return ids of todos containing every query word, best matches first.
+
+        Each query word matches indexed words it is a prefix of; an exact word
+        match scores higher than a prefix match. Returns None if the query
+        has no word characters at all. When text_of is given, a short list of
+        candidates is checked against the todo text instead of walking a long
+        prefix expansion.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return None
+        expansions = []
+        for term in set(terms):
+            postings = [(2.0 if token == term else 1.0, self.postings[token])
+                        for token in self._expand(term)]
+            expansions.append((sum(len(ids) for _, ids in postings), term, postings))
+        # Evaluate the most selective query word first so the candidates start small
+        expansions.sort(key=lambda expansion: expansion[0])
+
+        scores: Dict[int, float] = {}
+        for weight, ids in expansions[0][2]:
+            for todo_id, count in ids.items():
+                scores[todo_id] = scores.get(todo_id, 0.0) + weight * count
+        for _, term, postings in expansions[1:]:
+            if not scores:
+                break
+            if text_of is not None and len(scores) < len(postings):
+                scores = self._rescore(scores, term, text_of)
+                continue
+            matched: Dict[int, float] = {}
+            for weight, ids in postings:
+                # Walk whichever side of the intersection is smaller
+                if len(ids) < len(scores):
+                    pairs = [(todo_id, count) for todo_id, count in ids.items() if todo_id in scores]
+                else:
+                    pairs = [(todo_id, ids[todo_id]) for todo_id in scores if todo_id in ids]
+                for todo_id, count in pairs:
+                    matched[todo_id] = matched.get(todo_id, 0.0) + weight * count
+            scores = {todo_id: scores[todo_id] + score for todo_id, score in matched.items()}
+        return sorted(scores, key=lambda todo_id: (-scores[todo_id], todo_id))
+
+    @staticmethod
+    def _rescore(scores: Dict[int, float], term: str, text_of: Callable[[int], str]) -> Dict[int, float]:
+        """Keep candidates whose text has a word starting with term, adding its score"""
+        rescored = {}
+        for todo_id, score in scores.items():
+            extra = 0.0
+            for token in tokenize(text_of(todo_id)):
+                if token == term:
+                    extra += 2.0
+                elif token.startswith(term):
+                    extra += 1.0
+            if extra:
+                rescored[todo_id] = score + extra
+        return rescored
+
+
+class TodoIndexes:
+    """Secondary indexes over the todos held by a TodoStore.
+
+    The store calls add() when a todo appears and remove() before one
+    disappears, so every index stays in step with the data without
+    rescanning it. A changed todo is re-filed with refile(), which only
+    touches the indexes whose key changed, so the todo keeps its place in
+    the insertion-ordered id sets.
+    """
+
+    # Fields that, when changed, require a todo to be re-indexed
+    FIELDS = ('text', 'category', 'priority', 'completed', 'due_date')
+
+    def __init__(self):
+        self.by_category: Dict[str, IdSet] = {}
+        self.by_priority: Dict[str, IdSet] = {}
+        self.completed: IdSet = {}
+        self.pending: IdSet = {}
+        # (due_date, id) pairs kept sorted; todos without a due date are left out
+        self.by_due_date: List[Tuple[str, int]] = []
+        self.text = TextIndex()
+
+    def clear(self):
+        self.__init__()
+
+    def rebuild(self, todos):
+        self.clear()
+        # Append everything, then sort once: inserting in order would be quadratic
+        for todo in todos:
+            self.add(todo, keep_sorted=False)
+        self.by_due_date.sort()
+        self.text.vocabulary.sort()
+
+    def add(self, todo: Dict[str, Any], keep_sorted: bool = True):
+        todo_id = todo['id']
+        self.by_category.setdefault(todo.get('category', 'General'), {})[todo_id] = None
+        self.by_priority.setdefault(todo.get('priority', 'Medium'), {})[todo_id] = None
+        if todo.get('completed'):
+            self.completed[todo_id] = None
+        else:
+            self.pending[todo_id] = None
+        if isinstance(todo.get('due_date'), str) and todo['due_date']:
+            if keep_sorted:
+                insort(self.by_due_date, (todo['due_date'], todo_id))
+            else:
+                self.by_due_date.append((todo['due_date'], todo_id))
+        self.text.add(todo_id, todo.get('text', ''), keep_sorted)
+
+    def remove(self, todo: Dict[str, Any]):
+        todo_id = todo['id']
+        self._discard(self.by_category, todo.get('category', 'General'), todo_id)
+        self._discard(self.by_priority, todo.get('priority', 'Medium'), todo_id)
+        self.completed.pop(todo_id, None)
+        self.pending.pop(todo_id, None)
+        self._remove_due(todo.get('due_date'), todo_id)
+        self.text.remove(todo_id, todo.get('text', ''))
+
+    @staticmethod
+    def keys(todo: Dict[str, Any]) -> Tuple:
+        """The values a todo is filed under, to pass to refile() once it has changed"""
+        return (todo.get('category', 'General'), todo.get('priority', 'Medium'), bool(todo.get('completed')),
+                todo.get('due_date'), todo.get('text', ''))
+
+    def refile(self, todo: Dict[str, Any], old_keys: Tuple):
+        """Move a changed todo to its new buckets, given keys() from before the change"""
+        todo_id = todo['id']
+        category, priority, completed, due_date, text = self.keys(todo)
+        old_category, old_priority, old_completed, old_due_date, old_text = old_keys
+        if category != old_category:
+            self._discard(self.by_category, old_category, todo_id)
+            self.by_category.setdefault(category, {})[todo_id] = None
+        if priority != old_priority:
+            self._discard(self.by_priority, old_priority, todo_id)
+            self.by_priority.setdefault(priority, {})[todo_id] = None
+        if completed != old_completed:
+            (self.pending if completed else self.completed).pop(todo_id, None)
+            (self.completed if completed else self.pending)[todo_id] = None
+        if due_date != old_due_date:
+            self._remove_due(old_due_date, todo_id)
+            if isinstance(due_date, str) and due_date:
+                insort(self.by_due_date, (due_date, todo_id))
+        if text != old_text:
+            self.text.remove(todo_id, old_text)
+            self.text.add(todo_id, text)
+
+    def _remove_due(self, due_date: Any, todo_id: int):
+        if isinstance(due_date, str) and due_date:
+            i = bisect_left(self.by_due_date, (due_date, todo_id))
+            if i < len(self.by_due_date) and self.by_due_date[i] == (due_date, todo_id):
+                self.by_due_date.pop(i)
+
+    @staticmethod
+    def _discard(index: Dict[str, IdSet], key: str, todo_id: int):
+        ids = index.get(key)
+        if ids is not None:
+            ids.pop(todo_id, None)
+            if not ids:
+                # Drop empty buckets so categories() only lists live values
+                del index[key]
+
+    def categories(self) -> List[str]:
+        return sorted(self.by_category)
+
+    def candidates(self, category: Optional[str] = None, priority: Optional[str] = None,
+                   completed: Optional[bool] = None) -> Optional[List[int]]:
+        """Return ids matching every given filter, or None if no filter was given"""
+        ids = self.matching(category, priority, completed)
+        return None if ids is None else list(ids)
+
+    def matching(self, category: Optional[str] = None, priority: Optional[str] = None,
+                 completed: Optional[bool] = None) -> Optional[IdSet]:
+        """Like candidates(), but as an id set; a single filter's set is returned as is, not copied"""
+        sets = self.id_sets(category, priority, completed)
+        return self.intersect(sets) if sets else None
+
+    def id_sets(self, category: Optional[str] = None, priority: Optional[str] = None,
+                completed: Optional[bool] = None) -> List[IdSet]:
+        """Return the id set of each given filter, smallest first"""
+        sets = []
+        if category is not None:
+            sets.append(self.by_category.get(category, {}))
+        if priority is not None:
+            sets.append(self.by_priority.get(priority, {}))
+        if completed is not None:
+            sets.append(self.completed if completed else self.pending)
+        sets.sort(key=len)
+        return sets
+
+    @staticmethod
+    def intersect(sets: List[IdSet]) -> IdSet:
+        """Ids in every one of sets (smallest first), in the first set's order"""
+        ids = sets[0]
+        for other in sets[1:]:
+            ids = {todo_id: None for todo_id in ids if todo_id in other}
+        return ids
+
+    def due_slice(self, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[int, int]:
+        """Return the bounds of the by_due_date entries with start <= due_date <= end"""
+        lo = bisect_left(self.by_due_date, (start, -1)) if start else 0
+        hi = bisect_left(self.by_due_date, (end, float('inf'))) if end else len(self.by_due_date)
+        return lo, hi
+
+    def due_between(self, start: Optional[str] = None, end: Optional[str] = None) -> List[int]:
+        """Return ids with start <= due_date <= end, ordered by due date"""
+        lo, hi = self.due_slice(start, end)
+        return [todo_id for _, todo_id in self.by_due_date[lo:hi]]
+
+
+class TodoCounters:
+    """Running totals over the todos held by a TodoStore.
+
+    Registered as a store observer next to TodoIndexes, so the totals move
+    with every add, update and delete and reading them never scans the
+    todos.
+    """
+
+    # Fields that, when changed, require a todo to be counted again
+    FIELDS = ('category', 'priority', 'completed')
+
+    def __init__(self):
+        self.total = 0
+        self.completed = 0
+        self.by_category: Dict[str, int] = {}
+        self.by_priority: Dict[str, int] = {}
+        self.completed_by_category: Dict[str, int] = {}
+
+    def clear(self):
+        self.__init__()
+
+    def rebuild(self, todos):
+        self.clear()
+        for todo in todos:
+            self.add(todo)
+
+    def add(self, todo: Dict[str, Any]):
+        self.count(todo.get('category') or 'General', todo.get('priority') or 'Medium',
+                   bool(todo.get('completed')), 1)
+
+    def remove(self, todo: Dict[str, Any]):
+        self.count(todo.get('category') or 'General', todo.get('priority') or 'Medium',
+                   bool(todo.get('completed')), -1)
+
+    def count(self, category: str, priority: str, completed: bool, delta: int):
+        """Add delta todos sharing these values to the totals"""
+        self.total += delta
+        self._bump(self.by_category, category, delta)
+        self._bump(self.by_priority, priority, delta)
+        if completed:
+            self.completed += delta
+            self._bump(self.completed_by_category, category, delta)
+
+    @staticmethod
+    def _bump(counts: Dict[str, int], key: str, delta: int):
+        count = counts.get(key, 0) + delta
+        if count:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of the totals in the shape returned by file_ops.get_stats()"""
+        return {
+            'total': self.total,
+            'completed': self.completed,
+            'pending': self.total - self.completed,
+            'by_category': dict(self.by_category),
+            'by_priority': dict(self.by_priority),
+            'completed_by_category': dict(self.completed_by_category)
+        }
+
+
+class OrderIndexes:
+    """Todos pre-sorted by each of the SORT_KEYS fields.
+
+    Each ordering is a sorted list of (key, id) pairs, built the first time
+    it is asked for and then kept up to date by the store's add/remove
+    calls, so a page in any order is read off the list in either
+    direction without sorting.
+    """
+
+    FIELDS = tuple(SORT_KEYS)
+
+    def __init__(self):
+        self.orders: Dict[str, List[Tuple[Any, int]]] = {}
+        self._todos: Callable[[], Iterable[Dict[str, Any]]] = lambda: ()
+
+    def clear(self):
+        self.orders = {}
+
+    def rebuild(self, todos):
+        # Orderings are rebuilt lazily from the store's current todos
+        self.orders = {}
+        self._todos = lambda: todos
+
+    def add(self, todo: Dict[str, Any]):
+        for field, order in self.orders.items():
+            insort(order, (SORT_KEYS[field](todo), todo['id']))
+
+    def remove(self, todo: Dict[str, Any]):
+        for field, order in self.orders.items():
+            entry = (SORT_KEYS[field](todo), todo['id'])
+            i = bisect_left(order, entry)
+            if i < len(order) and order[i] == entry:
+                order.pop(i)
+
+    def order(self, field: str) -> List[Tuple[Any, int]]:
+        """Return the (key, id) pairs for field in ascending order"""
+        order = self.orders.get(field)
+        if order is None:
+            key = SORT_KEYS[field]
+            order = self.orders[field] = sorted((key(todo), todo['id']) for todo in self._todos())
+        return order
@@ -0,0 +1,284 @@
+import os
+import json
+import time
+import threading
+from types import FunctionType
+from collections import deque
+from functools import wraps
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Callable
+
+# Off unless TODO_INSTRUMENT is set or enable() is called; when off, an
+# instrumented call costs one flag check
+ENABLED = os.environ.get('TODO_INSTRUMENT', '').lower() in ('1', 'true', 'yes')
+# When set, every instrumented call is also appended here as one JSON line
+LOG_PATH = os.environ.get('TODO_METRICS_LOG') or None
+# Durations kept per name for the percentiles
+RECENT_CALLS = 512
+# Code flag marking generator functions; checked directly because importing
+# inspect would add more to startup than everything else file_ops loads
+CO_GENERATOR = 0x20
+
+
+class CallStats:
+    """Running totals for one instrumented function or page"""
+
+    __slots__ = ('calls', 'errors', 'total', 'max', 'bytes_read', 'bytes_written', 'recent')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.recent = deque(maxlen=RECENT_CALLS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+
+        def percentile(fraction: float) -> float:
+            return recent[min(len(recent) - 1, int(fraction * len(recent)))] * 1000 if recent else 0.0
+
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total / self.calls * 1000 if self.calls else 0.0,
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'max_ms': self.max * 1000,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+        }
+
+
+_stats: Dict[str, CallStats] = {}
+_lock = threading.Lock()
+_log_lock = threading.Lock()
+# Per-thread stack of [name, bytes read, bytes written] for the calls in progress
+_local = threading.local()
+_started = datetime.now()
+
+
+def enable(log_path: Optional[str] = None):
+    """Start recording; log_path additionally appends every call as a JSON line"""
+    global ENABLED, LOG_PATH
+    ENABLED = True
+    if log_path is not None:
+        LOG_PATH = log_path
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    """Forget everything recorded so far"""
+    global _started
+    with _lock:
+        _stats.clear()
+        _started = datetime.now()
+
+
+def _frames() -> List[list]:
+    frames = getattr(_local, 'frames', None)
+    if frames is None:
+        frames = _local.frames = []
+    return frames
+
+
+def add_bytes(read: int = 0, written: int = 0):
+    """Attribute file I/O to every instrumented call in progress on this thread
+
+    Timings are inclusive, so bytes are too: an outer call is charged for
+    what the calls it makes read and write.
+    """
+    if not ENABLED:
+        return
+    for frame in _frames():
+        frame[1] += read
+        frame[2] += written
+
+
+def _record(name: str, elapsed: float, read: int, written: int, failed: bool):
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = CallStats()
+        stats.calls += 1
+        stats.errors += failed
+        stats.total += elapsed
+        stats.max = max(stats.max, elapsed)
+        stats.bytes_read += read
+        stats.bytes_written += written
+        stats.recent.append(elapsed)
+    if LOG_PATH:
+        line = json.dumps({'ts': datetime.now().isoformat(), 'name': name, 'ms': round(elapsed * 1000, 3),
+                           'bytes_read': read, 'bytes_written': written, 'error': failed})
+        try:
+            with _log_lock, open(LOG_PATH, 'a') as file:
+                file.write(line + '\n')
+        except OSError as e:
+            print(f"Error writing metrics log: {e}")
+
+
+class _Timer:
+    """Times one call, collecting the bytes added while it runs"""
+
+    __slots__ = ('name', 'frame', 'started')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.frame = [self.name, 0, 0]
+        _frames().append(self.frame)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        frames = _frames()
+        if frames and frames[-1] is self.frame:
+            frames.pop()
+        # Control flow such as Streamlit's rerun is a BaseException, not an error
+        failed = exc_type is not None and issubclass(exc_type, Exception)
+        _record(self.name, elapsed, self.frame[1], self.frame[2], failed)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _TimedContext:
+    """Wraps a context manager so that its whole with block is timed as one call"""
+
+    __slots__ = ('context', 'timer')
+
+    def __init__(self, context, name: str):
+        self.context = context
+        self.timer = _Timer(name)
+
+    def __enter__(self):
+        self.timer.__enter__()
+        try:
+            return self.context.__enter__()
+        except BaseException as e:
+            self.timer.__exit__(type(e), e, e.__traceback__)
+            raise
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            return self.context.__exit__(exc_type, exc, tb)
+        finally:
+            self.timer.__exit__(exc_type, exc, tb)
+
+
+def _is_context_factory(func) -> bool:
+    """Whether func was made by @contextmanager: a plain function wrapping a generator"""
+    wrapped = getattr(func, '__wrapped__', None)
+    return (isinstance(wrapped, FunctionType) and bool(wrapped.__code__.co_flags & CO_GENERATOR)
+            and not func.__code__.co_flags & CO_GENERATOR)
+
+
+def timed(name: str):
+    """Context manager recording the block as one call of name (no-op when disabled)"""
+    if not ENABLED:
+        return _NULL_TIMER
+    return _Timer(name)
+
+
+def instrumented(name: str) -> Callable[[Callable], Callable]:
+    """Decorator recording every call of a function under name.
+
+    For a generator function one call covers producing all of its items;
+    the time the consumer spends between items is not counted. For a
+    @contextmanager function one call covers the with block, from
+    __enter__ to __exit__, rather than just creating the context manager.
+    """
+    def decorate(func):
+        if _is_context_factory(func):
+            @wraps(func)
+            def context_wrapper(*args, **kwargs):
+                if not ENABLED:
+                    return func(*args, **kwargs)
+                return _TimedContext(func(*args, **kwargs), name)
+            return context_wrapper
+
+        if func.__code__.co_flags & CO_GENERATOR:
+            @wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if not ENABLED:
+                    return (yield from func(*args, **kwargs))
+                frame = [name, 0, 0]
+                elapsed = 0.0
+                failed = False
+                iterator = func(*args, **kwargs)
+                try:
+                    while True:
+                        frames = _frames()
+                        frames.append(frame)
+                        started = time.perf_counter()
+                        try:
+                            item = next(iterator)
+                        except StopIteration:
+                            break
+                        except Exception:
+                            failed = True
+                            raise
+                        finally:
+                            elapsed += time.perf_counter() - started
+                            frames.pop()
+                        yield item
+                finally:
+                    iterator.close()
+                    _record(name, elapsed, frame[1], frame[2], failed)
+            return generator_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _Timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def instrument_functions(namespace: Dict[str, Any], prefix: str):
+    """Wrap every public function defined in a module's namespace (pass globals())
+
+    Calls between the module's own functions go through the wrappers
+    too, so they show up as separate entries.
+    """
+    module = namespace['__name__']
+    for attr, value in list(namespace.items()):
+        if (isinstance(value, FunctionType) and value.__module__ == module
+                and not attr.startswith('_')):
+            namespace[attr] = instrumented(prefix + attr)(value)
+
+
+def snapshot() -> Dict[str, Any]:
+    """Everything recorded so far: per-name stats, slowest total first"""
+    with _lock:
+        calls = {name: stats.to_dict() for name, stats in _stats.items()}
+    return {
+        'enabled': ENABLED,
+        'since': _started.isoformat(timespec='seconds'),
+        'calls': dict(sorted(calls.items(), key=lambda item: -item[1]['total_ms'])),
+    }
+
+
+def export_metrics(path: str):
+    """Write snapshot() to path as JSON"""
+    with open(path, 'w') as file:
+        json.dump(snapshot(), file, indent=2)
@@ -0,0 +1,203 @@
+from sys import intern
+from collections.abc import MutableMapping
+from datetime import datetime, date
+from typing import Dict, Any, Iterator
+
+# Keys every todo normally has, in the order they are serialised
+FIELDS = ('id', 'text', 'completed', 'created_at', 'category', 'priority', 'due_date')
+_FIELD_SET = frozenset(FIELDS)
+# Keys held directly in a slot of the same name
+_PLAIN = frozenset(('id', 'text', 'completed', 'category', 'priority'))
+_INTERNED = frozenset(('category', 'priority'))
+
+# Parsed due dates shared between todos due on the same day
+_dates: Dict[str, date] = {}
+
+
+def _parse_datetime(value):
+    """ISO timestamp -> datetime, keeping values that would not round-trip as-is"""
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+        if parsed.isoformat() == value:
+            return parsed
+    return value
+
+
+def _parse_date(value):
+    """ISO date -> shared date object, keeping values that would not round-trip as-is"""
+    if isinstance(value, str):
+        parsed = _dates.get(value)
+        if parsed is not None:
+            return parsed
+        try:
+            parsed = date.fromisoformat(value)
+        except ValueError:
+            return value
+        if parsed.isoformat() == value:
+            if len(_dates) < 100000:
+                _dates[value] = parsed
+            return parsed
+    return value
+
+
+def _intern(value):
+    return intern(value) if type(value) is str else value
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+class Todo(MutableMapping):
+    """A single todo item.
+
+    Stored in __slots__ rather than a per-todo dict: category and priority
+    strings are interned, created_at is held as a datetime and due_date as
+    a date shared by every todo due that day. It still behaves like the
+    dict it replaces: ``todo['created_at']`` and ``todo['due_date']`` give
+    back ISO strings, ``todo.get(...)`` and ``dict(todo)`` work, and keys
+    outside FIELDS are kept in a small side dict.
+
+    A slot that was never set is a missing key, so records read from
+    hand-edited files keep exactly the keys they had.
+    """
+
+    __slots__ = ('id', 'text', 'completed', 'created', 'category', 'priority', 'due', 'extra')
+
+    def __init__(self, id=None, text='', completed=False, created_at=None,
+                 category='General', priority='Medium', due_date=None):
+        self.id = id
+        self.text = text
+        self.completed = completed
+        self.created = _parse_datetime(created_at)
+        self.category = intern(category) if type(category) is str else category
+        self.priority = intern(priority) if type(priority) is str else priority
+        self.due = _parse_date(due_date)
+        self.extra = None
+
+    @classmethod
+    def from_dict(cls, data) -> 'Todo':
+        """Build a Todo from a dict, returning Todo instances unchanged"""
+        if isinstance(data, Todo):
+            return data
+        if len(data) == len(FIELDS) and data.keys() == _FIELD_SET:
+            return cls(data['id'], data['text'], data['completed'], data['created_at'],
+                       data['category'], data['priority'], data['due_date'])
+        todo = cls.__new__(cls)
+        todo.extra = None
+        for key, value in data.items():
+            todo[key] = value
+        return todo
+
+    def __getitem__(self, key: str):
+        try:
+            if key in _PLAIN:
+                return getattr(self, key)
+            if key == 'created_at':
+                return _iso(self.created)
+            if key == 'due_date':
+                return _iso(self.due)
+        except AttributeError:
+            raise KeyError(key) from None
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key: str, value):
+        if key in _INTERNED:
+            setattr(self, key, _intern(value))
+        elif key in _PLAIN:
+            setattr(self, key, value)
+        elif key == 'created_at':
+            self.created = _parse_datetime(value)
+        elif key == 'due_date':
+            self.due = _parse_date(value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key: str):
+        try:
+            if key in _PLAIN:
+                delattr(self, key)
+            elif key == 'created_at':
+                del self.created
+            elif key == 'due_date':
+                del self.due
+            elif self.extra is not None and key in self.extra:
+                del self.extra[key]
+                if not self.extra:
+                    self.extra = None
+            else:
+                raise KeyError(key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        for key, slot in zip(FIELDS, ('id', 'text', 'completed', 'created', 'category', 'priority', 'due')):
+            if hasattr(self, slot):
+                yield key
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, key) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict copy with ISO strings, ready for JSON"""
+        try:
+            data = {
+                'id': self.id,
+                'text': self.text,
+                'completed': self.completed,
+                'created_at': _iso(self.created),
+                'category': self.category,
+                'priority': self.priority,
+                'due_date': _iso(self.due)
+            }
+        except AttributeError:
+            data = {key: self[key] for key in self}
+        else:
+            if self.extra is not None:
+                data.update(self.extra)
+        return data
+
+    def copy(self) -> 'Todo':
+        return Todo.from_dict(self.to_dict())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (Todo, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, Todo) else other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Todo({self.to_dict()!r})"
+
+    def __reduce__(self):
+        return (Todo.from_dict, (self.to_dict(),))
+
+
+def to_json(value):
+    """json.dumps default= hook for Todo records"""
+    if isinstance(value, Todo):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,263 @@
+import heapq
+from itertools import islice
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable, Iterator, NamedTuple
+from indexes import SORT_KEYS
+
+# Spellings accepted for the boolean fields when a query is given as text
+TRUE_WORDS = ('yes', 'true', '1')
+FALSE_WORDS = ('no', 'false', '0')
+
+# A filter that matches this share of the todos or more is answered by
+# walking a pre-sorted order instead of sorting its matches
+BROAD_MATCH = 1 / 8
+# Computing a todo's sort key costs about this many id set lookups, which
+# is what a step of an order walk costs
+SORT_KEY_COST = 50
+
+
+class Query(NamedTuple):
+    """A structured todo query: filters, sort order and the slice to return.
+
+    Every filter that is not None must match. due_from and due_to bound
+    the due date inclusively (ISO dates) and leave out todos without one.
+    order_by is one of indexes.SORT_KEYS, ties broken by id; without it
+    a search is ranked by relevance and other results keep the order of
+    the index they were read from.
+    """
+    category: Optional[str] = None
+    priority: Optional[str] = None
+    completed: Optional[bool] = None
+    search: Optional[str] = None
+    due_from: Optional[str] = None
+    due_to: Optional[str] = None
+    order_by: Optional[str] = None
+    descending: bool = False
+    offset: int = 0
+    limit: Optional[int] = None
+
+    @classmethod
+    def from_spec(cls, spec: Dict[str, Any]) -> 'Query':
+        """Build a checked query from a dict of its fields"""
+        unknown = sorted(set(spec) - set(cls._fields))
+        if unknown:
+            raise ValueError(f"unknown query field(s): {', '.join(unknown)}")
+        return cls(**spec).checked()
+
+    @classmethod
+    def from_text(cls, fields: Dict[str, str]) -> 'Query':
+        """Build a checked query from string values, as given on a command line or in a URL"""
+        spec: Dict[str, Any] = dict(fields)
+        for field in ('completed', 'descending'):
+            if field in spec:
+                value = spec[field].lower()
+                if value not in TRUE_WORDS + FALSE_WORDS:
+                    raise ValueError(f"{field} must be yes or no")
+                spec[field] = value in TRUE_WORDS
+        for field in ('offset', 'limit'):
+            if field in spec:
+                if not spec[field].isdigit():
+                    raise ValueError(f"{field} must be a whole number")
+                spec[field] = int(spec[field])
+        return cls.from_spec(spec)
+
+    def checked(self) -> 'Query':
+        """Return the query with empty strings read as no filter; raises ValueError if it is invalid"""
+        for field in ('category', 'priority', 'search', 'due_from', 'due_to', 'order_by'):
+            if not isinstance(getattr(self, field), (str, type(None))):
+                raise ValueError(f"{field} must be a string")
+        if not isinstance(self.completed, (bool, type(None))) or not isinstance(self.descending, bool):
+            raise ValueError("completed and descending must be true or false")
+        if (not isinstance(self.offset, int) or isinstance(self.offset, bool)
+                or not isinstance(self.limit, (int, type(None))) or isinstance(self.limit, bool)):
+            raise ValueError("offset and limit must be whole numbers")
+        if self.order_by is not None and self.order_by not in SORT_KEYS:
+            raise ValueError(f"unknown sort key {self.order_by!r}, choose one of: {', '.join(SORT_KEYS)}")
+        if self.offset < 0 or (self.limit is not None and self.limit < 0):
+            raise ValueError("offset and limit cannot be negative")
+        return self._replace(search=self.search or None, due_from=self.due_from or None,
+                             due_to=self.due_to or None)
+
+    def predicate(self, skip: Iterable[str] = ()) -> Optional[Callable[[Dict[str, Any]], bool]]:
+        """One function testing every filter except those in skip, or None if none is left.
+
+        skip names the filters an index already answered ('due' covers
+        both due bounds). A search left to the predicate is a substring
+        test, as used for queries without any word characters.
+        """
+        checks = []
+        if self.category is not None and 'category' not in skip:
+            category = self.category
+            checks.append(lambda todo: todo.get('category', 'General') == category)
+        if self.priority is not None and 'priority' not in skip:
+            priority = self.priority
+            checks.append(lambda todo: todo.get('priority', 'Medium') == priority)
+        if self.completed is not None and 'completed' not in skip:
+            completed = bool(self.completed)
+            checks.append(lambda todo: bool(todo.get('completed')) == completed)
+        if (self.due_from or self.due_to) and 'due' not in skip:
+            start, end = self.due_from, self.due_to
+
+            def due(todo):
+                value = todo.get('due_date')
+                return (isinstance(value, str) and value != '' and (not start or value >= start)
+                        and (not end or value <= end))
+            checks.append(due)
+        if self.search and 'search' not in skip:
+            needle = self.search.lower()
+            checks.append(lambda todo: needle in str(todo.get('text', '')).lower())
+
+        if not checks:
+            return None
+        if len(checks) == 1:
+            return checks[0]
+
+        def matches(todo):
+            for check in checks:
+                if not check(todo):
+                    return False
+            return True
+        return matches
+
+
+class Plan:
+    """How a TodoStore answers a query.
+
+    source is the access path: 'search' (ranked ids from the text index),
+    'index' (the intersected category/priority/completed id sets), 'due'
+    (a range of the due date index) or 'scan' (every todo). ids are the
+    candidate ids it yields, None for a scan, and check is the fused
+    test for the filters the source does not answer, None when the
+    candidates are exactly the matches.
+    """
+
+    __slots__ = ('source', 'ids', 'check')
+
+    def __init__(self, source: str, ids, check: Optional[Callable[[Dict[str, Any]], bool]]):
+        self.source = source
+        self.ids = ids
+        self.check = check
+
+    @property
+    def exact(self) -> bool:
+        return self.check is None
+
+    def candidates(self, todos: Dict[int, Any]) -> int:
+        return len(todos) if self.ids is None else len(self.ids)
+
+    def matches(self, todos: Dict[int, Any]) -> Iterator[Dict[str, Any]]:
+        """Lazily yield the matching todos in source order"""
+        pool = todos.values() if self.ids is None else (todos[todo_id] for todo_id in self.ids)
+        if self.check is None:
+            return iter(pool)
+        return filter(self.check, pool)
+
+    def __repr__(self) -> str:
+        return (f"Plan({self.source}, candidates={'all' if self.ids is None else len(self.ids)}, "
+                f"exact={self.exact})")
+
+
+def plan(query: Query, indexes, todos: Dict[int, Any]) -> Plan:
+    """Choose the most selective index for query; whatever it leaves is fused into one check"""
+    if query.search:
+        ranked = indexes.text.search(query.search, lambda todo_id: todos[todo_id].get('text', ''))
+        if ranked is not None:
+            # Relevance order comes from here, so the search always drives
+            return Plan('search', ranked, query.predicate(skip=('search',)))
+
+    # Sizes are compared before anything is intersected or copied; the
+    # smallest id set bounds what intersecting all of them can give
+    options = []
+    sets = indexes.id_sets(query.category, query.priority, query.completed)
+    if sets:
+        options.append((len(sets[0]), 'index', ('category', 'priority', 'completed')))
+    if query.due_from or query.due_to:
+        lo, hi = indexes.due_slice(query.due_from, query.due_to)
+        options.append((hi - lo, 'due', ('due',)))
+    if not options:
+        return Plan('scan', None, query.predicate())
+
+    size, source, answered = min(options)
+    if source == 'due':
+        ids = {todo_id: None for _, todo_id in indexes.by_due_date[lo:hi]}
+    else:
+        ids = indexes.intersect(sets)
+    return Plan(source, ids, query.predicate(skip=answered))
+
+
+def _slice(matches: Iterator[Dict[str, Any]], offset: int,
+           end: Optional[int]) -> Tuple[List[Dict[str, Any]], int]:
+    """Keep matches offset..end and count the rest without holding them"""
+    page = []
+    total = 0
+    for todo in matches:
+        if total >= offset and (end is None or total < end):
+            page.append(todo)
+        total += 1
+    return page, total
+
+
+def _walk_order(query: Query, plan: Plan, todos: Dict[int, Any], order: List[Tuple[Any, int]],
+                end: Optional[int]) -> Tuple[List[Dict[str, Any]], int]:
+    """Read the page off a pre-sorted (key, id) order, testing each todo on the way"""
+    ids, check = plan.ids, plan.check
+    if plan.exact:
+        total = plan.candidates(todos)
+        end = total if end is None else min(end, total)
+        if query.offset >= end:
+            return [], total
+        if ids is None:
+            # No filter: the page is a plain slice of the order
+            if query.descending:
+                entries = order[len(order) - end:len(order) - query.offset][::-1]
+            else:
+                entries = order[query.offset:end]
+            return [todos[todo_id] for _, todo_id in entries], total
+    page = []
+    count = 0
+    for _, todo_id in (reversed(order) if query.descending else order):
+        if ids is not None and todo_id not in ids:
+            continue
+        if check is not None and not check(todos[todo_id]):
+            continue
+        if count >= query.offset and (end is None or count < end):
+            page.append(todos[todo_id])
+        count += 1
+        if plan.exact and count == end:
+            # The total is already known, so the walk stops with the page
+            break
+    return page, total if plan.exact else count
+
+
+def execute(query: Query, plan: Plan, todos: Dict[int, Any], orders) -> Tuple[List[Dict[str, Any]], int]:
+    """Return the query's slice of the matches in its order, and the total match count"""
+    end = None if query.limit is None else query.offset + query.limit
+    if query.order_by is None:
+        if plan.exact:
+            # The candidates are the matches: slice them directly
+            pool = todos.values() if plan.ids is None else (todos[todo_id] for todo_id in plan.ids)
+            return list(islice(pool, query.offset, end)), plan.candidates(todos)
+        return _slice(plan.matches(todos), query.offset, end)
+
+    if plan.source != 'search':
+        candidates = plan.candidates(todos)
+        # Walking the order reaches the end of an exact page after about
+        # end * len(todos) / candidates steps; sorting needs a key per candidate
+        if candidates >= len(todos) * BROAD_MATCH or (
+                plan.exact and end is not None and end * len(todos) < SORT_KEY_COST * candidates * candidates):
+            return _walk_order(query, plan, todos, orders.order(query.order_by), end)
+
+    matches = list(plan.matches(todos))
+    total = len(matches)
+    end = total if end is None else min(end, total)
+    key = SORT_KEYS[query.order_by]
+    if plan.source != 'search':
+        # Ties by id, as in the pre-sorted orders; a search keeps relevance order among equal keys
+        field_key = key
+        key = lambda todo: (field_key(todo), todo['id'])
+    if end * 4 < total:
+        # Only the first pages are needed: partial selection beats a full sort
+        select = heapq.nlargest if query.descending else heapq.nsmallest
+        matches = select(end, matches, key=key)
+    else:
+        matches.sort(key=key, reverse=query.descending)
+    return matches[query.offset:end], total
@@ -0,0 +1,108 @@
+import os
+import stat
+import tempfile
+from typing import Union
+import instrumentation
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def atomic_write(path: str, data: Union[str, bytes]):
+    """Replace path with data so readers see either the old or the new file.
+
+    The data goes to a temporary file in the same directory, is fsynced,
+    and is then renamed over the target; the directory is fsynced too so
+    the rename itself survives a crash.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(data, bytes) else 'w') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+            if instrumentation.ENABLED:
+                instrumentation.add_bytes(written=os.fstat(file.fileno()).st_size)
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            mode = 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    fsync_directory(directory)
+
+
+def fsync_directory(directory: str):
+    """Flush a directory entry change (rename/create) to disk where supported"""
+    if fcntl is None:
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class InterProcessLock:
+    """Exclusive advisory lock on a sidecar file, shared across processes.
+
+    The lock is re-entrant within one owner; callers must serialise threads
+    themselves (TodoStore holds its own RLock around it).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._depth = 0
+
+    def acquire(self):
+        if self._depth == 0:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            file = open(self.path, 'a+')
+            try:
+                if fcntl is not None:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+                else:
+                    file.seek(0)
+                    while True:
+                        try:
+                            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            # LK_LOCK gives up after ~10 seconds; keep waiting
+                            continue
+            except BaseException:
+                file.close()
+                raise
+            self._file = file
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            file, self._file = self._file, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+                else:
+                    file.seek(0)
+                    msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                file.close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,256 @@
+"""Snapshot encodings for the todo store.
+
+Two formats are understood and told apart by their first bytes:
+
+- ``json``: ``{"next_id": N, "todos": [...]}`` (or a bare list from older
+  versions), pretty-printed so it stays hand-editable.
+- ``binary``: a columnar layout. Fixed-width columns (ids, completed flags,
+  interned category/priority codes, integer due dates and string lengths)
+  are loaded with one ``array.frombytes`` call each; text and creation
+  timestamps are UTF-8 blobs decoded once and sliced by character length.
+  The whole file is read with a single read and checked with a CRC32.
+
+Anything else is rejected as corrupted, so the store quarantines it. The
+old one-todo-per-line ``todos.txt`` is only read by the legacy migration
+(see ``parse_legacy_lines``).
+"""
+import gc
+import sys
+import json
+import zlib
+import struct
+from array import array
+from datetime import datetime, date
+from typing import List, Dict, Any, Tuple
+from models import Todo, to_json
+
+MAGIC = b'TODOCOL1'
+# magic, crc32 of everything after the header, record count, next id, string count
+HEADER = struct.Struct('<8sIIqI')
+STANDARD_FIELDS = ('id', 'text', 'completed', 'created_at', 'category', 'priority', 'due_date')
+# Length marking a None value in a string column
+NULL_LENGTH = 0xFFFFFFFF
+# Extras key listing standard fields a todo did not have at all
+MISSING_KEY = '__missing__'
+
+
+def detect_format(data: bytes) -> str:
+    """Return 'binary' or 'json' for raw snapshot bytes; raises ValueError for anything else"""
+    if data.startswith(MAGIC):
+        return 'binary'
+    if data.lstrip()[:1] in (b'[', b'{', b''):
+        return 'json'
+    raise ValueError('unrecognised snapshot format')
+
+
+def decode(data: bytes) -> Tuple[List[Todo], int]:
+    """Decode snapshot bytes in any known format into (todos, next_id).
+
+    Raises ValueError if the data is corrupted.
+    """
+    # Every decoded object survives, so collections during the load only cost time
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _decode(data)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _decode(data: bytes) -> Tuple[List[Todo], int]:
+    kind = detect_format(data)
+    if kind == 'binary':
+        return decode_binary(data)
+    if not data.strip():
+        return [], 1
+    loaded = json.loads(data)
+    next_id = 1
+    if isinstance(loaded, dict):
+        loaded, next_id = loaded.get('todos', []), loaded.get('next_id', 1)
+    # A plain list was written before the next id was persisted
+    return [Todo.from_dict(todo) for todo in loaded], next_id
+
+
+def encode(todos: List[Dict[str, Any]], next_id: int, fmt: str = 'json') -> bytes:
+    """Encode todos in the given format"""
+    if fmt == 'binary':
+        return encode_binary(todos, next_id)
+    return json.dumps({'next_id': next_id, 'todos': todos}, indent=2, default=to_json).encode('utf-8')
+
+
+def parse_legacy_lines(lines: List[str]) -> List[Todo]:
+    """Turn old todos.txt lines (one todo text per line) into todo records"""
+    todos = []
+    for i, line in enumerate(lines):
+        text = line.strip()
+        if text:
+            todos.append(Todo(id=i + 1, text=text, created_at=datetime.now()))
+    return todos
+
+
+def _ordinal(value) -> int:
+    """ISO date string -> proleptic ordinal, 0 for None, -1 if it won't round-trip"""
+    if value is None:
+        return 0
+    if not isinstance(value, str):
+        return -1
+    try:
+        parsed = date.fromisoformat(value)
+    except ValueError:
+        return -1
+    return parsed.toordinal() if parsed.isoformat() == value else -1
+
+
+def _string_column(values: List[Any], field: str, extras: List[Dict[str, Any]]) -> Tuple[array, bytes]:
+    """Encode a str-or-None column as (char lengths, UTF-8 blob); other values go to extras"""
+    lengths = array('I')
+    parts = []
+    for i, value in enumerate(values):
+        if isinstance(value, str):
+            lengths.append(len(value))
+            parts.append(value)
+        else:
+            lengths.append(NULL_LENGTH)
+            if value is not None:
+                extras[i][field] = value
+    return lengths, ''.join(parts).encode('utf-8')
+
+
+def _slice_strings(blob: str, lengths: array) -> List[Any]:
+    values = []
+    append = values.append
+    start = 0
+    for length in lengths:
+        if length == NULL_LENGTH:
+            append(None)
+        else:
+            end = start + length
+            append(blob[start:end])
+            start = end
+    return values
+
+
+def encode_binary(todos: List[Dict[str, Any]], next_id: int) -> bytes:
+    todos = [todo.to_dict() if isinstance(todo, Todo) else todo for todo in todos]
+    strings: Dict[str, int] = {}
+    extras: List[Dict[str, Any]] = []
+    for todo in todos:
+        extra = {key: value for key, value in todo.items() if key not in STANDARD_FIELDS}
+        missing = [key for key in STANDARD_FIELDS[1:] if key not in todo]
+        if missing:
+            extra[MISSING_KEY] = missing
+        extras.append(extra)
+
+    ids = array('q', [todo['id'] for todo in todos])
+    completed = array('B')
+    for todo, extra in zip(todos, extras):
+        value = todo.get('completed', False)
+        completed.append(1 if value is True else 0)
+        if not isinstance(value, bool):
+            extra['completed'] = value
+
+    codes = {}
+    for field in ('category', 'priority'):
+        column = codes[field] = array('I')
+        for todo, extra in zip(todos, extras):
+            value = todo.get(field)
+            if isinstance(value, str):
+                code = strings.get(value)
+                if code is None:
+                    code = strings[value] = len(strings)
+                column.append(code)
+            else:
+                column.append(0)
+                if field in todo:
+                    extra[field] = value
+
+    due = array('i')
+    for todo, extra in zip(todos, extras):
+        ordinal = _ordinal(todo.get('due_date'))
+        due.append(max(ordinal, 0))
+        if ordinal < 0:
+            extra['due_date'] = todo['due_date']
+
+    text_lengths, texts = _string_column([todo.get('text') for todo in todos], 'text', extras)
+    created_lengths, created = _string_column([todo.get('created_at') for todo in todos], 'created_at', extras)
+    encoded_extras = [json.dumps(extra, separators=(',', ':')).encode('utf-8') if extra else b''
+                      for extra in extras]
+    extra_lengths = array('I', [len(encoded) for encoded in encoded_extras])
+
+    columns = [ids, completed, codes['category'], codes['priority'], due,
+               text_lengths, created_lengths, extra_lengths]
+    if sys.byteorder != 'little':
+        for column in columns:
+            column.byteswap()
+    table = b''.join(struct.pack('<I', len(encoded)) + encoded
+                     for encoded in (value.encode('utf-8') for value in strings))
+    blobs = [struct.pack('<II', len(texts), len(created)), texts, created] + encoded_extras
+    body = table + b''.join(column.tobytes() for column in columns) + b''.join(blobs)
+    return HEADER.pack(MAGIC, zlib.crc32(body), len(todos), next_id, len(strings)) + body
+
+
+def decode_binary(data: bytes) -> Tuple[List[Todo], int]:
+    try:
+        magic, crc, count, next_id, string_count = HEADER.unpack_from(data)
+    except struct.error:
+        raise ValueError('truncated snapshot header')
+    view = memoryview(data)[HEADER.size:]
+    if zlib.crc32(view) != crc:
+        raise ValueError('snapshot checksum mismatch')
+
+    offset = 0
+    strings = []
+    for _ in range(string_count):
+        (length,) = struct.unpack_from('<I', view, offset)
+        offset += 4
+        strings.append(bytes(view[offset:offset + length]).decode('utf-8'))
+        offset += length
+    if not strings:
+        strings.append(None)
+
+    def column(typecode: str) -> array:
+        nonlocal offset
+        values = array(typecode)
+        size = values.itemsize * count
+        values.frombytes(view[offset:offset + size])
+        offset += size
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values
+
+    ids, completed = column('q'), column('B')
+    categories, priorities, due = column('I'), column('I'), column('i')
+    text_lengths, created_lengths, extra_lengths = column('I'), column('I'), column('I')
+
+    try:
+        text_size, created_size = struct.unpack_from('<II', view, offset)
+    except struct.error:
+        raise ValueError('truncated snapshot body')
+    offset += 8
+    texts = _slice_strings(bytes(view[offset:offset + text_size]).decode('utf-8'), text_lengths)
+    offset += text_size
+    created = _slice_strings(bytes(view[offset:offset + created_size]).decode('utf-8'), created_lengths)
+    offset += created_size
+
+    due_dates = {0: None}
+    for ordinal in set(due):
+        if ordinal:
+            due_dates[ordinal] = date.fromordinal(ordinal)
+
+    todos = [
+        Todo(todo_id, text, done == 1, created_at, strings[category], strings[priority], due_dates[ordinal])
+        for todo_id, text, done, created_at, category, priority, ordinal
+        in zip(ids, texts, completed, created, categories, priorities, due)
+    ]
+
+    for todo, length in zip(todos, extra_lengths):
+        if length:
+            extra = json.loads(bytes(view[offset:offset + length]))
+            offset += length
+            for key in extra.pop(MISSING_KEY, ()):
+                del todo[key]
+            todo.update(extra)
+    if offset != len(view):
+        raise ValueError('snapshot length mismatch')
+    return todos, next_id
@@ -0,0 +1,524 @@
+import os
+import json
+import sqlite3
+import threading
+from itertools import islice
+from contextlib import contextmanager, nullcontext
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable, Iterator
+from store import Batch, ConcurrentModificationError
+from indexes import tokenize, TodoCounters
+from models import Todo
+from query import Query
+
+# Columns stored natively; any other todo keys are kept as JSON in `extra`
+COLUMNS = ('id', 'text', 'completed', 'created_at', 'category', 'priority', 'due_date')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS todos (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL DEFAULT '',
+    completed INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    category TEXT NOT NULL DEFAULT 'General',
+    priority TEXT NOT NULL DEFAULT 'Medium',
+    due_date TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_todos_category ON todos(category);
+CREATE INDEX IF NOT EXISTS idx_todos_priority ON todos(priority);
+CREATE INDEX IF NOT EXISTS idx_todos_completed ON todos(completed);
+CREATE INDEX IF NOT EXISTS idx_todos_due_date ON todos(due_date);
+-- Expression indexes matching ORDER_BY, so sorted pages are read in index order
+CREATE INDEX IF NOT EXISTS idx_todos_created_order ON todos(COALESCE(created_at, ''));
+CREATE INDEX IF NOT EXISTS idx_todos_priority_order ON todos((CASE priority WHEN 'High' THEN 0 WHEN 'Low' THEN 2 ELSE 1 END));
+CREATE INDEX IF NOT EXISTS idx_todos_due_order ON todos(COALESCE(NULLIF(due_date, ''), '9999-12-31'));
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('next_id', 1);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+"""
+
+# Full-text index kept in step with the todos table by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(text, content='todos', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos BEGIN
+    INSERT INTO todos_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos BEGIN
+    INSERT INTO todos_fts (todos_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF text ON todos BEGIN
+    INSERT INTO todos_fts (todos_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    INSERT INTO todos_fts (rowid, text) VALUES (new.id, new.text);
+END;
+"""
+
+# Running totals per (category, priority, completed), kept by triggers so
+# stats() never scans the todos table
+COUNTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS todo_counts (
+    category TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    completed INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (category, priority, completed)
+);
+CREATE TRIGGER IF NOT EXISTS todo_counts_insert AFTER INSERT ON todos BEGIN
+    INSERT INTO todo_counts (category, priority, completed, count)
+    VALUES (new.category, new.priority, new.completed, 1)
+    ON CONFLICT (category, priority, completed) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS todo_counts_delete AFTER DELETE ON todos BEGIN
+    UPDATE todo_counts SET count = count - 1
+    WHERE category = old.category AND priority = old.priority AND completed = old.completed;
+    DELETE FROM todo_counts WHERE count <= 0;
+END;
+CREATE TRIGGER IF NOT EXISTS todo_counts_update AFTER UPDATE OF category, priority, completed ON todos BEGIN
+    UPDATE todo_counts SET count = count - 1
+    WHERE category = old.category AND priority = old.priority AND completed = old.completed;
+    DELETE FROM todo_counts WHERE count <= 0;
+    INSERT INTO todo_counts (category, priority, completed, count)
+    VALUES (new.category, new.priority, new.completed, 1)
+    ON CONFLICT (category, priority, completed) DO UPDATE SET count = count + 1;
+END;
+"""
+
+SELECT = "SELECT id, text, completed, created_at, category, priority, due_date, extra FROM todos"
+SELECT_QUALIFIED = ("SELECT todos.id, todos.text, todos.completed, todos.created_at, todos.category, "
+                    "todos.priority, todos.due_date, todos.extra")
+# SQL equivalents of indexes.SORT_KEYS, each backed by an index in SCHEMA
+ORDER_BY = {
+    'created_at': "COALESCE(todos.created_at, '')",
+    'priority': "CASE todos.priority WHEN 'High' THEN 0 WHEN 'Low' THEN 2 ELSE 1 END",
+    'category': "todos.category",
+    'due_date': "COALESCE(NULLIF(todos.due_date, ''), '9999-12-31')",
+}
+# Set once migrate_json_to_sqlite() has run for a database
+MIGRATED = "SELECT 1 FROM meta WHERE key = 'json_migrated'"
+INSERT = ("INSERT OR REPLACE INTO todos (id, text, completed, created_at, category, priority, due_date, extra) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+# Imports larger than this rebuild the indexes, FTS and counts once instead
+# of updating them row by row
+BULK_IMPORT_ROWS = 10000
+
+
+def _row_to_todo(row) -> Todo:
+    todo = Todo(row[0], row[1], bool(row[2]), row[3], row[4], row[5], row[6])
+    if row[7]:
+        todo.update(json.loads(row[7]))
+    return todo
+
+
+def _todo_to_row(todo: Dict[str, Any]) -> tuple:
+    if isinstance(todo, Todo):
+        # Everything outside COLUMNS already lives in the record's side dict
+        extra = todo.extra
+    else:
+        extra = {key: value for key, value in todo.items() if key not in COLUMNS}
+    return (
+        todo['id'],
+        todo.get('text', ''),
+        1 if todo.get('completed') else 0,
+        todo.get('created_at'),
+        todo.get('category') or 'General',
+        todo.get('priority') or 'Medium',
+        todo.get('due_date'),
+        json.dumps(extra) if extra else None
+    )
+
+
+class SqliteStore:
+    """SQLite implementation of the TodoStore interface.
+
+    The database runs in WAL mode so readers never block the writer, and
+    the columns used by the filters are indexed. Each thread gets its own
+    connection; sqlite3 caches the prepared statements per connection.
+    """
+
+    # Kept for interface compatibility with TodoStore; SQLite has its own WAL
+    journal = False
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self.has_fts = True
+        self._observers: List[Any] = []
+        self._observed_version: Optional[int] = None
+        self._init_schema()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.filename) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.filename, timeout=30, isolation_level=None,
+                                   cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Let INSERT OR REPLACE fire the delete triggers that keep FTS and counts right
+            conn.execute("PRAGMA recursive_triggers=ON")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        counts_existed = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'todo_counts'").fetchone() is not None
+        conn.executescript(COUNTS_SCHEMA)
+        if not counts_existed:
+            # Database created before the counts table: seed it once
+            conn.execute("INSERT INTO todo_counts (category, priority, completed, count) "
+                         "SELECT category, priority, completed, COUNT(*) FROM todos "
+                         "GROUP BY category, priority, completed")
+        try:
+            fts_existed = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'todos_fts'").fetchone() is not None
+            conn.executescript(FTS_SCHEMA)
+            if not fts_existed:
+                conn.execute("INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search falls back to LIKE
+            self.has_fts = False
+
+    @contextmanager
+    def _write(self, expected_version: Optional[int] = None) -> Iterator[sqlite3.Connection]:
+        """Run a block inside one IMMEDIATE write transaction that bumps the version"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if expected_version is not None and self.version != expected_version:
+                    raise ConcurrentModificationError(
+                        f"{self.filename} was modified by another writer")
+                yield conn
+                conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[Dict[str, Any]]:
+        return [_row_to_todo(row) for row in self._connection().execute(sql, tuple(params))]
+
+    def load(self) -> List[Dict[str, Any]]:
+        return self._query(SELECT + " ORDER BY id")
+
+    def scan(self, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the todos in batches straight off one cursor, so only a batch is in memory"""
+        cursor = self._connection().execute(SELECT + " ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [_row_to_todo(row) for row in rows]
+
+    @property
+    def version(self) -> int:
+        """Counter bumped by every write transaction, from any process"""
+        return self._connection().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    @property
+    def revision(self) -> int:
+        """Cache key for the current data; the version counter already never repeats"""
+        return self.version
+
+    @property
+    def next_id(self) -> int:
+        return self._connection().execute("SELECT value FROM meta WHERE key = 'next_id'").fetchone()[0]
+
+    def get(self, todo_id: int) -> Optional[Dict[str, Any]]:
+        rows = self._query(SELECT + " WHERE id = ?", (todo_id,))
+        return rows[0] if rows else None
+
+    def _filter_sql(self, query: Query) -> Tuple[str, List[Any], str]:
+        """Return the FROM/WHERE clause, its parameters and the natural order for a query's filters"""
+        clauses, params = [], []
+        if query.category is not None:
+            clauses.append("todos.category = ?")
+            params.append(query.category)
+        if query.priority is not None:
+            clauses.append("todos.priority = ?")
+            params.append(query.priority)
+        if query.completed is not None:
+            clauses.append("todos.completed = ?")
+            params.append(1 if query.completed else 0)
+        if query.due_from or query.due_to:
+            clauses.append("todos.due_date IS NOT NULL AND todos.due_date != ''")
+            if query.due_from:
+                clauses.append("todos.due_date >= ?")
+                params.append(query.due_from)
+            if query.due_to:
+                clauses.append("todos.due_date <= ?")
+                params.append(query.due_to)
+        source, order = " FROM todos", "todos.id"
+        search = query.search
+        terms = tokenize(search) if search else []
+        if terms and self.has_fts:
+            # Every word must prefix-match; rank by bm25 through a join on the FTS table
+            match = ' '.join('"%s"*' % term.replace('"', '""') for term in terms)
+            source += " JOIN todos_fts ON todos_fts.rowid = todos.id"
+            clauses.insert(0, "todos_fts MATCH ?")
+            params.insert(0, match)
+            order = "bm25(todos_fts), todos.id"
+        elif search:
+            clauses.append("instr(lower(todos.text), ?) > 0")
+            params.append(search.lower())
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return source + where, params, order
+
+    def query(self, query: Query) -> Tuple[List[Dict[str, Any]], int]:
+        """Return the query's slice of the matching todos in its order, plus the total match count
+
+        The filters become one WHERE clause, so SQLite's planner picks the
+        index, and the slice is a LIMIT/OFFSET.
+        """
+        source, params, order = self._filter_sql(query)
+        if query.order_by is not None:
+            direction = 'DESC' if query.descending else 'ASC'
+            # Ties by id in the same direction, so the index alone gives the order
+            tiebreak = order.replace("todos.id", f"todos.id {direction}")
+            order = f"{ORDER_BY[query.order_by]} {direction}, {tiebreak}"
+        sql = SELECT_QUALIFIED + source + " ORDER BY " + order
+        if query.limit is None and not query.offset:
+            # Everything is returned, so its length is the total
+            todos = self._query(sql, params)
+            return todos, len(todos)
+        conn = self._connection()
+        # One read transaction so the count and the slice see the same data
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute("BEGIN")
+        try:
+            total = conn.execute("SELECT COUNT(*)" + source, params).fetchone()[0]
+            todos = self._query(sql + " LIMIT ? OFFSET ?",
+                                params + [-1 if query.limit is None else query.limit, query.offset])
+        finally:
+            if own_transaction:
+                conn.execute("COMMIT")
+        return todos, total
+
+    def filter(self, category: Optional[str] = None, priority: Optional[str] = None,
+               completed: Optional[bool] = None, search: Optional[str] = None) -> List[Dict[str, Any]]:
+        return self.query(Query(category, priority, completed, search or None))[0]
+
+    def page(self, category: Optional[str] = None, priority: Optional[str] = None,
+             completed: Optional[bool] = None, search: Optional[str] = None,
+             order_by: Optional[str] = None, descending: bool = False,
+             offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        return self.query(Query(category, priority, completed, search or None, order_by=order_by,
+                                descending=descending, offset=offset, limit=limit))
+
+    def due_between(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        clauses, params = ["due_date IS NOT NULL", "due_date != ''"], []
+        if start:
+            clauses.append("due_date >= ?")
+            params.append(start)
+        if end:
+            clauses.append("due_date <= ?")
+            params.append(end)
+        return self._query(SELECT + " WHERE " + " AND ".join(clauses) + " ORDER BY due_date, id", params)
+
+    def categories(self) -> List[str]:
+        return [row[0] for row in self._connection().execute(
+            "SELECT DISTINCT category FROM todos ORDER BY category")]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the running totals kept in todo_counts by triggers"""
+        counters = TodoCounters()
+        for category, priority, completed, count in self._connection().execute(
+                "SELECT category, priority, completed, count FROM todo_counts"):
+            counters.count(category, priority, bool(completed), count)
+        return counters.snapshot()
+
+    def observe(self, observer):
+        """Register an observer; it is rebuilt from the table whenever the version moved"""
+        with self._lock:
+            self._observers.append(observer)
+            self._observed_version = None
+
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        """Bring observers up to date with the database while they are read"""
+        with self._lock:
+            version = self.version
+            if self._observers and version != self._observed_version:
+                todos = self.load()
+                for observer in self._observers:
+                    observer.rebuild(todos)
+                self._observed_version = version
+            yield
+
+    def add(self, todo: Dict[str, Any]) -> Dict[str, Any]:
+        self.apply_records([{'op': 'add', 'todo': todo}])
+        return todo
+
+    def update(self, todo_id: int, changes: Dict[str, Any]) -> bool:
+        return self.apply_records([{'op': 'update', 'id': todo_id, 'changes': changes}]) > 0
+
+    def delete(self, todo_id: int) -> bool:
+        return self.apply_records([{'op': 'delete', 'id': todo_id}]) > 0
+
+    def update_where(self, predicate: Callable[[Dict[str, Any]], bool], changes: Dict[str, Any]) -> int:
+        with self._write():
+            return self.apply_records([{'op': 'update', 'id': todo['id'], 'changes': dict(changes)}
+                                       for todo in self.load() if predicate(todo)])
+
+    def delete_ids(self, todo_ids: Iterable[int]) -> int:
+        return self.apply_records([{'op': 'delete', 'id': todo_id} for todo_id in todo_ids])
+
+    @contextmanager
+    def transaction(self, expected_version: Optional[int] = None) -> Iterator[Batch]:
+        with self._write(expected_version):
+            batch = Batch(self)
+            yield batch
+            self.apply_records(batch.records)
+
+    def apply_records(self, records: List[Dict[str, Any]]) -> int:
+        """Apply add/update/delete records in one transaction, return how many matched"""
+        conn = self._connection()
+        # Join the caller's transaction when called from update_where/transaction
+        with (nullcontext() if conn.in_transaction else self._write()):
+            applied = 0
+            for record in records:
+                applied += self._apply(conn, record)
+            return applied
+
+    def _apply(self, conn: sqlite3.Connection, record: Dict[str, Any]) -> int:
+        op = record['op']
+        if op == 'add':
+            todo = record['todo']
+            next_id = self.next_id
+            if todo.get('id') is None:
+                todo['id'] = next_id
+            conn.execute(INSERT, _todo_to_row(todo))
+            if todo['id'] >= next_id:
+                conn.execute("UPDATE meta SET value = ? WHERE key = 'next_id'", (todo['id'] + 1,))
+            return 1
+        if op == 'delete':
+            return conn.execute("DELETE FROM todos WHERE id = ?", (record['id'],)).rowcount
+        changes = record['changes']
+        if all(key in COLUMNS and key != 'id' for key in changes):
+            # Column names come from the COLUMNS whitelist, values are bound
+            assignments = ', '.join(f"{key} = ?" for key in changes)
+            row = _todo_to_row(dict(changes, id=record['id']))
+            values = [row[COLUMNS.index(key)] for key in changes]
+            return conn.execute(f"UPDATE todos SET {assignments} WHERE id = ?",
+                                values + [record['id']]).rowcount
+        todo = self.get(record['id'])
+        if todo is None:
+            return 0
+        todo.update(changes)
+        if todo['id'] != record['id']:
+            conn.execute("DELETE FROM todos WHERE id = ?", (record['id'],))
+        conn.execute(INSERT, _todo_to_row(todo))
+        return 1
+
+    def save(self, todos: List[Dict[str, Any]], expected_version: Optional[int] = None):
+        with self._write(expected_version) as conn:
+            conn.execute("DELETE FROM todos")
+            conn.executemany(INSERT, (_todo_to_row(todo) for todo in todos))
+            max_id = max((todo['id'] for todo in todos), default=0)
+            conn.execute("UPDATE meta SET value = max(value, ?) WHERE key = 'next_id'", (max_id + 1,))
+
+    def bulk_import(self, todos: Iterable[Dict[str, Any]], replace: bool = False) -> int:
+        """Add many todos in one transaction, inserting them a batch at a time
+
+        Same semantics as TodoStore.bulk_import; todos are consumed lazily,
+        so a streamed import never holds more than one batch in memory.
+        Past BULK_IMPORT_ROWS todos (or when replacing) the indexes and
+        triggers are dropped for the rest of the load and rebuilt once at
+        the end, still inside the same transaction.
+        """
+        count = 0
+        dropped = None
+        with self._write() as conn:
+            if replace:
+                dropped = self._drop_secondary(conn)
+                conn.execute("DELETE FROM todos")
+            next_id = self.next_id
+            todos = iter(todos)
+            while True:
+                rows = []
+                for todo in islice(todos, 1000):
+                    if todo.get('id') is None:
+                        todo['id'] = next_id
+                    next_id = max(next_id, todo['id'] + 1)
+                    rows.append(_todo_to_row(todo))
+                if not rows:
+                    break
+                if dropped is None and count + len(rows) > BULK_IMPORT_ROWS:
+                    dropped = self._drop_secondary(conn)
+                conn.executemany(INSERT, rows)
+                count += len(rows)
+            conn.execute("UPDATE meta SET value = max(value, ?) WHERE key = 'next_id'", (next_id,))
+            if dropped is not None:
+                self._restore_secondary(conn, dropped)
+        return count
+
+    @staticmethod
+    def _drop_secondary(conn: sqlite3.Connection) -> List[str]:
+        """Drop the indexes and triggers on todos, returning the SQL that recreates them"""
+        objects = conn.execute("SELECT type, name, sql FROM sqlite_master "
+                               "WHERE tbl_name = 'todos' AND type IN ('index', 'trigger') "
+                               "AND sql IS NOT NULL").fetchall()
+        for kind, name, _ in objects:
+            conn.execute(f'DROP {kind.upper()} "{name}"')
+        return [sql for _, _, sql in objects]
+
+    def _restore_secondary(self, conn: sqlite3.Connection, statements: List[str]):
+        """Recreate what _drop_secondary dropped and rebuild what its triggers maintain"""
+        for sql in statements:
+            conn.execute(sql)
+        conn.execute("DELETE FROM todo_counts")
+        conn.execute("INSERT INTO todo_counts (category, priority, completed, count) "
+                     "SELECT category, priority, completed, COUNT(*) FROM todos "
+                     "GROUP BY category, priority, completed")
+        if self.has_fts:
+            conn.execute("INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')")
+
+    def set_next_id(self, next_id: int):
+        with self._write() as conn:
+            conn.execute("UPDATE meta SET value = max(value, ?) WHERE key = 'next_id'", (next_id,))
+
+    def is_empty(self) -> bool:
+        return self._connection().execute("SELECT 1 FROM todos LIMIT 1").fetchone() is None
+
+    def invalidate(self):
+        """Nothing is cached outside SQLite itself"""
+
+
+def migrate_json_to_sqlite(json_filename: str, db_filename: str) -> int:
+    """Copy every todo from a JSON store, archive included, into an empty SQLite database, once.
+
+    Returns the number of todos copied. The copy is recorded in the meta
+    table, so todos deleted on SQLite later are not brought back from the
+    JSON file; a database that already has todos is never copied into.
+    """
+    from store import TodoStore
+    from archive import archive_path
+
+    target = SqliteStore(db_filename)
+    if target._connection().execute(MIGRATED).fetchone() or not os.path.exists(json_filename):
+        return 0
+    with target._write() as conn:
+        # Another process may have migrated while this one was waiting for the lock
+        if conn.execute(MIGRATED).fetchone():
+            return 0
+        count = 0
+        if target.is_empty():
+            sources = [TodoStore(json_filename)]
+            if os.path.exists(archive_path(json_filename)):
+                # Archived todos go first, so a todo left in both tiers keeps its hot copy
+                sources.insert(0, TodoStore(archive_path(json_filename), journal=True))
+            for source in sources:
+                todos = source.load()
+                conn.executemany(INSERT, (_todo_to_row(todo) for todo in todos))
+                conn.execute("UPDATE meta SET value = max(value, ?) WHERE key = 'next_id'", (source.next_id,))
+            count = conn.execute("SELECT COUNT(*) FROM todos").fetchone()[0]
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', 1)")
+    return count
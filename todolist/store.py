@@ -0,0 +1,635 @@
+import os
+import json
+import time
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable, Iterator
+import snapshot
+import instrumentation
+from indexes import TodoIndexes, TodoCounters, OrderIndexes
+from query import Query, plan, execute
+from models import Todo, to_json
+from safe_io import atomic_write, InterProcessLock
+
+# Number of journal records after which the log is folded into a new snapshot
+COMPACT_EVERY = 1000
+
+# Write-behind mode persists held-back mutations this many seconds after the
+# first of them, or as soon as this many are waiting
+WRITE_BEHIND_DELAY = 0.005
+WRITE_BEHIND_BATCH = 100
+
+
+class ConcurrentModificationError(Exception):
+    """The store changed since the version a caller based its write on"""
+
+
+class TodoStore:
+    """In-memory copy of a todos JSON file.
+
+    The parsed todos are kept in memory and validated against the file's
+    mtime, size and inode on every access, so the file is only re-parsed
+    when another process actually changed it. Todos are held in an
+    insertion-ordered id -> todo dict, and the next id to hand out is
+    persisted in the snapshot, so lookup, update, delete and id allocation
+    are constant time. Secondary indexes (see indexes.py) are maintained
+    incrementally on every mutation, as are running totals for the stats
+    cards.
+
+    In journal mode mutations are appended as compact records to a log
+    next to the snapshot (``todos.log`` for ``todos.json``) instead of
+    rewriting the whole file. Reads replay snapshot plus log, and the log
+    is compacted into a fresh snapshot in the background every
+    ``COMPACT_EVERY`` records.
+
+    In write-behind mode mutations only change the in-memory todos and
+    return; a background thread persists everything that piled up with a
+    single write shortly after (see ``WRITE_BEHIND_DELAY``). ``flush()``
+    writes them at once, and they are flushed at process exit. Ids handed
+    out meanwhile are not reserved: if another process takes one first, the
+    held-back todo gets a new id when the changes are re-applied on top of
+    that process's writes.
+
+    Snapshots are written as JSON or in the compact binary format (see
+    snapshot.py); reads detect the format automatically. They are written
+    atomically (temp file, fsync, rename) and every
+    read-modify-write cycle holds an inter-process lock on ``todos.lock``
+    and re-validates the cache first, so concurrent writers never drop
+    each other's changes.
+    """
+
+    def __init__(self, filename: str, journal: bool = False, snapshot_format: str = 'json',
+                 write_behind: bool = False):
+        self.filename = filename
+        self.snapshot_format = snapshot_format
+        self.log_filename = os.path.splitext(filename)[0] + '.log'
+        self.journal = journal
+        self.write_behind = write_behind
+        self._file_lock = InterProcessLock(os.path.splitext(filename)[0] + '.lock')
+        self._todos: Dict[int, Todo] = {}
+        self._next_id = 1
+        # Bumped on every change to the in-memory todos, including reloads
+        self._revision = 0
+        self.indexes = TodoIndexes()
+        self.counters = TodoCounters()
+        self.orders = OrderIndexes()
+        # Kept in step with the todos: indexes, counters and anything passed to observe()
+        self._observers: List[Any] = [self.indexes, self.counters, self.orders]
+        self._signature: Optional[Tuple] = None
+        self._log_records = 0
+        # Byte length of the valid part of the log when it ends in a torn record
+        self._log_truncate_to: Optional[int] = None
+        self._compacting = False
+        self._lock = threading.RLock()
+        # Records applied in memory but not yet persisted (write-behind mode)
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_ready = threading.Condition(self._lock)
+        self._flusher: Optional[threading.Thread] = None
+        # Ids handed out to added todos that are not on disk yet
+        self._fresh_ids: set = set()
+
+    @contextmanager
+    def _locked(self):
+        """Hold both the thread lock and the inter-process file lock"""
+        with self._lock:
+            with self._file_lock:
+                yield
+
+    @staticmethod
+    def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+        """Return (mtime_ns, size, inode) of a file, or None if it is missing"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    @classmethod
+    def file_version(cls, filename: str) -> Optional[Tuple]:
+        """The version a store of filename reports, read from the file system without loading the todos
+
+        None if the file does not exist.
+        """
+        snapshot = cls._file_signature(filename)
+        if snapshot is None:
+            return None
+        return (snapshot, cls._file_signature(os.path.splitext(filename)[0] + '.log'))
+
+    def _stat_signature(self) -> Optional[Tuple]:
+        return self.file_version(self.filename)
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Return the todos as a new list, re-reading the files only if they changed"""
+        with self._lock:
+            self._refresh()
+            return list(self._todos.values())
+
+    def scan(self, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the todos in batches, without holding the lock between batches"""
+        todos = self.load()
+        for start in range(0, len(todos), batch_size):
+            yield todos[start:start + batch_size]
+
+    def get(self, todo_id: int) -> Optional[Dict[str, Any]]:
+        """Return the todo with the given id, or None"""
+        with self._lock:
+            self._refresh()
+            return self._todos.get(todo_id)
+
+    @property
+    def version(self) -> Tuple:
+        """Opaque token that changes whenever the stored todos change"""
+        with self._lock:
+            self._refresh()
+            # The token describes the files, so held-back writes go first
+            self.flush()
+            return self._signature
+
+    @property
+    def revision(self) -> int:
+        """Counter that moves whenever the todos change, here or in another process
+
+        Unlike version it never repeats within a process, so it is a safe
+        key for caches held by this process. It starts again from zero in
+        every process, so it means nothing to another one: anything kept
+        beyond the process, or handed to clients, needs version or an
+        identifier of the process alongside it.
+        """
+        with self._lock:
+            self._refresh()
+            return self._revision
+
+    @property
+    def next_id(self) -> int:
+        """The id the next added todo will get"""
+        with self._lock:
+            self._refresh()
+            return self._next_id
+
+    def query(self, query: Query) -> Tuple[List[Dict[str, Any]], int]:
+        """Return the query's slice of the matching todos in its order, plus the total match count.
+
+        The query is planned once against the indexes: it starts from the
+        text index for a search, otherwise from the smallest of the
+        category/priority/completed and due date index matches, and tests
+        the remaining filters in a single lazy pass (see query.py). Broad
+        sorted queries read the page off a pre-sorted order index.
+        """
+        with self._lock:
+            self._refresh()
+            return execute(query, plan(query, self.indexes, self._todos), self._todos, self.orders)
+
+    def filter(self, category: Optional[str] = None, priority: Optional[str] = None,
+               completed: Optional[bool] = None, search: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return todos matching all given filters; with a search query ranked by relevance"""
+        return self.query(Query(category, priority, completed, search or None))[0]
+
+    def page(self, category: Optional[str] = None, priority: Optional[str] = None,
+             completed: Optional[bool] = None, search: Optional[str] = None,
+             order_by: Optional[str] = None, descending: bool = False,
+             offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], int]:
+        """Return one slice of the filtered todos in sorted order, plus the total match count"""
+        return self.query(Query(category, priority, completed, search or None, order_by=order_by,
+                                descending=descending, offset=offset, limit=limit))
+
+    def due_between(self, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return todos due within [start, end], ordered by due date"""
+        with self._lock:
+            self._refresh()
+            return [self._todos[todo_id] for todo_id in self.indexes.due_between(start, end)]
+
+    def categories(self) -> List[str]:
+        """Return the sorted list of categories in use"""
+        with self._lock:
+            self._refresh()
+            return self.indexes.categories()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the running totals (see TodoCounters.snapshot)"""
+        with self._lock:
+            self._refresh()
+            return self.counters.snapshot()
+
+    def observe(self, observer):
+        """Keep observer in step with the todos, like the secondary indexes.
+
+        observer.rebuild(todos) is called now and whenever the files are
+        re-read; observer.remove(todo) and observer.add(todo) bracket every
+        change that touches one of observer.FIELDS.
+        """
+        with self._lock:
+            self._refresh()
+            observer.rebuild(self._todos.values())
+            self._observers.append(observer)
+
+    @contextmanager
+    def reading(self) -> Iterator[None]:
+        """Hold the store, brought up to date with the files, while observers are read"""
+        with self._lock:
+            self._refresh()
+            yield
+
+    def _refresh(self):
+        signature = self._stat_signature()
+        if signature is None:
+            # Create the file if it doesn't exist
+            os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+            with self._file_lock:
+                if not os.path.exists(self.filename):
+                    self._write_snapshot([], 1)
+            signature = self._stat_signature()
+        if signature != self._signature:
+            try:
+                todos, next_id = self._read_snapshot()
+            except ValueError:
+                todos, next_id = self._quarantine_corrupt()
+                signature = self._stat_signature()
+            pending, fresh = self._pending, self._fresh_ids
+            self._pending, self._fresh_ids = [], set()
+            self._reset(todos, next_id)
+            self._log_records = self._replay_log()
+            self._signature = signature
+            if pending:
+                self._reapply(pending, fresh)
+
+    def _reapply(self, records: List[Dict[str, Any]], fresh: set):
+        """Apply held-back records again on top of todos just re-read from the files
+
+        Another process wrote while they were held back. An add whose id it
+        has taken since gets the next free one, and the records referring
+        to that todo follow it; records that no longer apply are dropped.
+        """
+        renumbered: Dict[int, int] = {}
+        for record in records:
+            if record['op'] != 'add':
+                if record['id'] in renumbered:
+                    record['id'] = renumbered[record['id']]
+            elif record['todo']['id'] in fresh:
+                todo = record['todo']
+                if todo['id'] in self._todos:
+                    renumbered[todo['id']] = self._next_id
+                    todo['id'] = None
+                else:
+                    self._fresh_ids.add(todo['id'])
+            if self._apply(record):
+                self._pending.append(record)
+
+    def _read_snapshot(self) -> Tuple[List[Dict[str, Any]], int]:
+        """Read the snapshot with a single read, whatever its format"""
+        with open(self.filename, 'rb') as file:
+            data = file.read()
+        instrumentation.add_bytes(read=len(data))
+        return snapshot.decode(data)
+
+    def _quarantine_corrupt(self) -> Tuple[List[Dict[str, Any]], int]:
+        """Move an unreadable snapshot aside instead of silently overwriting it"""
+        with self._file_lock:
+            try:
+                return self._read_snapshot()
+            except ValueError:
+                pass
+            backup = f"{self.filename}.corrupt-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            os.replace(self.filename, backup)
+            print(f"Error reading todos: {self.filename} is corrupted, moved it to {backup}")
+            self._write_snapshot([], 1)
+            return [], 1
+
+    def _reset(self, todos: List[Dict[str, Any]], next_id: int):
+        self._todos = {todo['id']: todo for todo in map(Todo.from_dict, todos)}
+        self._next_id = max(next_id, max(self._todos, default=0) + 1)
+        self._revision += 1
+        for observer in self._observers:
+            observer.rebuild(self._todos.values())
+
+    def _replay_log(self) -> int:
+        """Apply the journal on top of the loaded snapshot, return its length"""
+        self._log_truncate_to = None
+        try:
+            file = open(self.log_filename, 'rb')
+        except FileNotFoundError:
+            return 0
+        count = 0
+        valid_end = 0
+        with file:
+            for line in file:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('incomplete record')
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final record from an interrupted append; it is cut
+                    # off before the next append so later records stay readable
+                    self._log_truncate_to = valid_end
+                    break
+                self._apply(record)
+                valid_end += len(line)
+                count += 1
+        instrumentation.add_bytes(read=valid_end)
+        return count
+
+    def _apply(self, record: Dict[str, Any]) -> bool:
+        """Apply one add/update/delete record to the in-memory list.
+
+        Records are idempotent (an add replaces an existing todo with the
+        same id) so a log can safely be replayed over a snapshot that
+        already contains some of its effects. An add without an id is
+        given the next free one.
+        """
+        op = record['op']
+        if op == 'add':
+            todo = record['todo']
+            if todo.get('id') is None:
+                todo['id'] = self._next_id
+                self._fresh_ids.add(todo['id'])
+            old = self._todos.get(todo['id'])
+            todo = Todo.from_dict(todo)
+            for observer in self._observers:
+                if old is None:
+                    observer.add(todo)
+                elif observer is self.indexes:
+                    observer.refile(todo, observer.keys(old))
+                else:
+                    observer.remove(old)
+                    observer.add(todo)
+            self._todos[todo['id']] = todo
+            self._next_id = max(self._next_id, todo['id'] + 1)
+            return True
+        todo = self._todos.get(record['id'])
+        if todo is None:
+            return False
+        if op == 'update':
+            changes = record['changes']
+            touched = [observer for observer in self._observers
+                       if any(field in changes for field in observer.FIELDS)]
+            # The secondary indexes only move the todo between buckets whose key
+            # changed, so it keeps its place in the others
+            keys = self.indexes.keys(todo)
+            for observer in touched:
+                if observer is not self.indexes:
+                    observer.remove(todo)
+            todo.update(changes)
+            for observer in touched:
+                if observer is self.indexes:
+                    observer.refile(todo, keys)
+                else:
+                    observer.add(todo)
+        elif op == 'delete':
+            for observer in self._observers:
+                observer.remove(todo)
+            del self._todos[record['id']]
+        return True
+
+    def add(self, todo: Dict[str, Any]) -> Dict[str, Any]:
+        """Append a new todo, allocating its id if it has none"""
+        self.apply_records([{'op': 'add', 'todo': todo}])
+        return todo
+
+    def update(self, todo_id: int, changes: Dict[str, Any]) -> bool:
+        """Apply field changes to the todo with the given id"""
+        return self.apply_records([{'op': 'update', 'id': todo_id, 'changes': changes}]) > 0
+
+    def delete(self, todo_id: int) -> bool:
+        """Remove the todo with the given id"""
+        return self.apply_records([{'op': 'delete', 'id': todo_id}]) > 0
+
+    def update_where(self, predicate: Callable[[Dict[str, Any]], bool], changes: Dict[str, Any]) -> int:
+        """Apply the same changes to every todo matching predicate in one write"""
+        with self._locked():
+            self._refresh()
+            return self.apply_records([{'op': 'update', 'id': todo['id'], 'changes': dict(changes)}
+                                       for todo in self._todos.values() if predicate(todo)])
+
+    def delete_ids(self, todo_ids: Iterable[int]) -> int:
+        """Remove every todo whose id is in todo_ids in one write"""
+        return self.apply_records([{'op': 'delete', 'id': todo_id} for todo_id in todo_ids])
+
+    @contextmanager
+    def transaction(self, expected_version: Optional[Tuple] = None) -> Iterator['Batch']:
+        """Collect mutations and apply them with a single write on exit.
+
+        The store stays locked for the whole block, and nothing is written
+        if the block raises. If expected_version is given and the store has
+        moved on since, ConcurrentModificationError is raised.
+        """
+        with self._locked():
+            self._check_version(expected_version)
+            batch = Batch(self)
+            yield batch
+            self.apply_records(batch.records)
+
+    def _check_version(self, expected_version: Optional[Tuple]):
+        if expected_version is not None:
+            self._refresh()
+            self.flush()
+            if self._signature != expected_version:
+                raise ConcurrentModificationError(
+                    f"{self.filename} was modified by another writer")
+
+    def apply_records(self, records: List[Dict[str, Any]]) -> int:
+        """Apply mutation records and persist them, return how many matched"""
+        with self._locked():
+            self._refresh()
+            applied = [record for record in records if self._apply(record)]
+            if applied:
+                self._revision += 1
+                if self.write_behind:
+                    self._hold(applied)
+                else:
+                    self._persist(applied)
+            return len(applied)
+
+    def _hold(self, records: List[Dict[str, Any]]):
+        """Queue applied records for the background flusher (called with the lock held)"""
+        self._pending.extend(records)
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+            atexit.register(self.flush)
+        self._pending_ready.notify()
+
+    def _flush_loop(self):
+        while True:
+            with self._pending_ready:
+                while not self._pending:
+                    self._pending_ready.wait()
+                # Let a burst of mutations gather so it costs a single write
+                deadline = time.monotonic() + WRITE_BEHIND_DELAY
+                while len(self._pending) < WRITE_BEHIND_BATCH:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._pending_ready.wait(remaining)
+            self.flush()
+
+    def flush(self) -> int:
+        """Persist the mutations write-behind mode is holding back, return how many"""
+        with self._locked():
+            # Catch up with other writers first, so held-back adds never reuse their ids
+            self._refresh()
+            records, self._pending = self._pending, []
+            if records:
+                self._persist(records)
+            return len(records)
+
+    def _persist(self, records: List[Dict[str, Any]]):
+        self._fresh_ids.clear()
+        try:
+            if self.journal:
+                if self._log_truncate_to is not None:
+                    os.truncate(self.log_filename, self._log_truncate_to)
+                    self._log_truncate_to = None
+                data = ''.join(json.dumps(record, separators=(',', ':'), default=to_json) + '\n'
+                               for record in records)
+                with open(self.log_filename, 'a') as file:
+                    file.write(data)
+                    file.flush()
+                    os.fsync(file.fileno())
+                # json.dumps escapes non-ASCII, so characters are bytes here
+                instrumentation.add_bytes(written=len(data))
+                self._log_records += len(records)
+                if self._log_records >= COMPACT_EVERY:
+                    self._start_compaction()
+            else:
+                self._write_snapshot(list(self._todos.values()), self._next_id)
+                self._remove_log()
+        except Exception as e:
+            print(f"Error writing todos: {e}")
+            self._signature = None
+            return
+        self._signature = self._stat_signature()
+
+    def save(self, todos: List[Dict[str, Any]], expected_version: Optional[Tuple] = None):
+        """Replace all todos with a fresh snapshot
+
+        If expected_version is given and the store has moved on since,
+        ConcurrentModificationError is raised instead of overwriting.
+        """
+        with self._locked():
+            self._refresh()
+            self._check_version(expected_version)
+            next_id = max(self._next_id, max((todo['id'] for todo in todos), default=0) + 1)
+            # The new snapshot supersedes anything still held back
+            self._pending = []
+            self._fresh_ids.clear()
+            self._write_snapshot(todos, next_id)
+            self._remove_log()
+            self._reset(list(todos), next_id)
+            self._log_records = 0
+            self._signature = self._stat_signature()
+
+    def bulk_import(self, todos: Iterable[Dict[str, Any]], replace: bool = False) -> int:
+        """Add many todos with a single snapshot write, return how many were given
+
+        A todo whose id is already taken replaces the existing one, a todo
+        without an id gets the next free one. With replace=True the current
+        todos are dropped first. The indexes are rebuilt once rather than
+        updated todo by todo.
+        """
+        with self._locked():
+            self._refresh()
+            merged = {} if replace else dict(self._todos)
+            next_id = self._next_id
+            count = 0
+            for todo in todos:
+                todo = Todo.from_dict(todo)
+                if todo.get('id') is None:
+                    todo['id'] = next_id
+                merged[todo['id']] = todo
+                next_id = max(next_id, todo['id'] + 1)
+                count += 1
+            todos = list(merged.values())
+            # Held-back mutations are already part of merged
+            self._pending = []
+            self._fresh_ids.clear()
+            self._write_snapshot(todos, next_id)
+            self._remove_log()
+            self._reset(todos, next_id)
+            self._log_records = 0
+            self._signature = self._stat_signature()
+            return count
+
+    def _write_snapshot(self, todos: List[Dict[str, Any]], next_id: int):
+        atomic_write(self.filename, snapshot.encode(todos, next_id, self.snapshot_format))
+
+    def _remove_log(self):
+        if os.path.exists(self.log_filename):
+            os.remove(self.log_filename)
+
+    def _start_compaction(self):
+        if not self._compacting:
+            self._compacting = True
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot.
+
+        The snapshot is written from a copy taken under the lock; records
+        appended to the log while it is being written are carried over into
+        the new, shorter log, and applied to the in-memory todos first if
+        another process appended them. If another process replaced the
+        snapshot in the meantime, this compaction is abandoned.
+        """
+        try:
+            with self._locked():
+                # The snapshot must only hold what is on disk, or held-back adds
+                # would later look like todos another process wrote
+                self.flush()
+                if not os.path.exists(self.log_filename):
+                    return
+                todos = [todo.copy() for todo in self._todos.values()]
+                next_id = self._next_id
+                log_offset = self._log_truncate_to
+                if log_offset is None:
+                    log_offset = os.path.getsize(self.log_filename)
+                snapshot_signature = self._file_signature(self.filename)
+            data = snapshot.encode(todos, next_id, self.snapshot_format)
+            with self._locked():
+                # Take in what other processes appended meanwhile: once the files
+                # are replaced below, the cache can no longer tell it is missing
+                self._refresh()
+                if (self._file_signature(self.filename) != snapshot_signature
+                        or not os.path.exists(self.log_filename)):
+                    return
+                with open(self.log_filename, 'rb') as file:
+                    file.seek(log_offset)
+                    tail = file.read()
+                atomic_write(self.filename, data)
+                if tail:
+                    atomic_write(self.log_filename, tail.decode())
+                else:
+                    self._remove_log()
+                # The in-memory todos already include the tail records
+                self._log_records = tail.count(b'\n')
+                self._signature = self._stat_signature()
+        except Exception as e:
+            print(f"Error compacting todos: {e}")
+        finally:
+            self._compacting = False
+
+    def invalidate(self):
+        """Forget the cached copy so the next load re-reads the files"""
+        with self._lock:
+            self._signature = None
+
+
+class Batch:
+    """Mutations collected by TodoStore.transaction()"""
+
+    def __init__(self, store: TodoStore):
+        self.store = store
+        self.records: List[Dict[str, Any]] = []
+
+    def todos(self) -> List[Dict[str, Any]]:
+        """Todos as they were when the transaction started"""
+        return self.store.load()
+
+    def add(self, todo: Dict[str, Any]):
+        self.records.append({'op': 'add', 'todo': todo})
+
+    def update(self, todo_id: int, **changes):
+        self.records.append({'op': 'update', 'id': todo_id, 'changes': changes})
+
+    def delete(self, todo_id: int):
+        self.records.append({'op': 'delete', 'id': todo_id})
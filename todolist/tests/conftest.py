@@ -0,0 +1,68 @@
+import os
+import sys
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+# The app modules import each other flat, as when run from todolist/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_ops  # noqa: E402
+from models import Todo  # noqa: E402
+from query import Query  # noqa: E402
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point file_ops at an empty data directory, as a fresh process with default settings would see it"""
+    monkeypatch.setattr(file_ops, 'data_dir', str(tmp_path))
+    monkeypatch.setattr(file_ops, 'filepath', str(tmp_path / 'todos.json'))
+    monkeypatch.setattr(file_ops, 'legacy_filepath', str(tmp_path / 'todos.txt'))
+    monkeypatch.setattr(file_ops, 'lists_dir', str(tmp_path / 'lists'))
+    monkeypatch.setattr(file_ops, 'BACKEND', 'json')
+    monkeypatch.setattr(file_ops, 'JOURNAL_MODE', False)
+    monkeypatch.setattr(file_ops, 'WRITE_BEHIND', False)
+    monkeypatch.setattr(file_ops, 'AUTO_ARCHIVE', False)
+    monkeypatch.setattr(file_ops, 'SNAPSHOT_FORMAT', 'json')
+    restart(monkeypatch)
+    with file_ops.use_list(file_ops.DEFAULT_LIST):
+        yield tmp_path
+
+
+def restart(monkeypatch):
+    """Forget every store file_ops opened, as if a new process had started"""
+    monkeypatch.setattr(file_ops, '_stores', {})
+    monkeypatch.setattr(file_ops, '_archives', {})
+    monkeypatch.setattr(file_ops, '_columns', {})
+    monkeypatch.setattr(file_ops, '_migrated', set())
+
+
+def new_todo(text: str, **fields) -> Todo:
+    """A todo without an id, as file_ops.add_todo builds it"""
+    return Todo(id=None, text=text, created_at=datetime.now(), **fields)
+
+
+# Queries whose results are fully ordered, so every store must return them identically
+ORDERED_QUERIES = [
+    Query(order_by='created_at'),
+    Query(completed=True, order_by='due_date'),
+    Query(completed=False, order_by='category', limit=10),
+    Query(category='Work', order_by='priority', descending=True, offset=3, limit=5),
+    Query(priority='High', due_from='2024-03-01', due_to='2024-09-30', order_by='due_date', descending=True),
+    Query(search='report', order_by='created_at'),
+]
+
+
+def populate(count: int = 60, seed: int = 1):
+    """Add count varied todos through file_ops, about half of them completed"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, 9, 0, 0, 1)
+    for n in range(count):
+        todo = file_ops.add_todo(f"{rng.choice(['write', 'review', 'file'])} {rng.choice(['report', 'notes', 'taxes'])} {n}",
+                                 category=rng.choice(['Work', 'Home', 'Errands']),
+                                 priority=rng.choice(['High', 'Medium', 'Low']),
+                                 due_date=rng.choice([None, '2024-02-01', '2024-05-15', '2024-08-31']))
+        # Distinct creation times, so every ordering is total
+        file_ops.update_todo(todo['id'], created_at=(start + timedelta(hours=n)).isoformat(),
+                             completed=rng.random() < 0.5)
@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import pytest
+
+import api
+import file_ops
+from conftest import restart
+
+
+def send(request: bytes):
+    """Send one raw request to a fresh API server, return the status, headers and body of its answer"""
+    async def run():
+        todo_api = api.TodoApi()
+        writer_task = asyncio.create_task(todo_api.writer())
+        server = await asyncio.start_server(todo_api.handle, '127.0.0.1', 0)
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(request)
+            # The server closes the connection after answering
+            answer = await asyncio.wait_for(reader.read(), 10)
+            writer.close()
+        writer_task.cancel()
+        return answer
+
+    head, _, body = asyncio.run(run()).partition(b'\r\n\r\n')
+    status, *lines = head.decode().split('\r\n')
+    headers = dict(line.lower().split(': ', 1) for line in lines)
+    return int(status.split(' ')[1]), headers, body
+
+
+def exchange(request: bytes):
+    """Send one raw request to a fresh API server, return the status and JSON body of its answer"""
+    status, _, body = send(request)
+    return status, json.loads(body)
+
+
+def test_add_todo(data_dir):
+    body = json.dumps({'text': "Buy milk"}).encode()
+    status, todo = exchange(b'POST /todos HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n%s'
+                            % (len(body), body))
+    assert status == 201
+    assert file_ops.get_todo_by_id(todo['id'])['text'] == "Buy milk"
+
+
+@pytest.mark.parametrize('headers, status', [
+    (b'Content-Length: abc\r\n', 400),
+    (b'Content-Length: -5\r\n', 400),
+    (b'Content-Length: \xb2\r\n', 400),
+    (b'Transfer-Encoding: chunked\r\n', 411),
+    (b'Content-Length: %d\r\n' % (api.MAX_BODY + 1), 413),
+])
+def test_bad_content_length_is_refused(data_dir, headers, status):
+    answer, body = exchange(b'POST /todos HTTP/1.1\r\n' + headers + b'\r\n5\r\n{"text": "x"}\r\n0\r\n\r\n')
+    assert answer == status
+    assert 'error' in body
+    assert file_ops.get_stats()['total'] == 0
+
+
+def test_etags_from_before_a_restart_do_not_match(data_dir, monkeypatch):
+    status, headers, _ = send(b'GET /todos HTTP/1.1\r\nConnection: close\r\n\r\n')
+    assert status == 200
+    etag = headers['etag'].encode()
+    # Another process adds a todo, then the server restarts
+    todo = file_ops.add_todo("Buy milk")
+    restart(monkeypatch)
+
+    status, listing = exchange(b'GET /todos HTTP/1.1\r\nConnection: close\r\nIf-None-Match: %s\r\n\r\n' % etag)
+    assert (status, listing['total']) == (200, 1)
+    restart(monkeypatch)
+    body = b'{"completed": true}'
+    status, _ = exchange(b'PATCH /todos/%d HTTP/1.1\r\nConnection: close\r\nIf-Match: %s\r\n'
+                         b'Content-Length: %d\r\n\r\n%s' % (todo['id'], etag, len(body), body))
+    assert status == 412
+    assert file_ops.get_todo_by_id(todo['id'])['completed'] is False
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+import cli
+import file_ops
+
+
+def run(*args) -> int:
+    return cli.run_command(cli.select_list(list(args)))
+
+
+def test_add_complete_and_delete(data_dir, capsys):
+    assert run('add', 'Buy', 'milk') == 0
+    todo = file_ops.read_todos()[0]
+    assert todo['text'] == "Buy milk"
+    assert f"(ID: {todo['id']})" in capsys.readouterr().out
+
+    assert run('complete', str(todo['id'])) == 0
+    assert file_ops.get_todo_by_id(todo['id'])['completed'] is True
+    assert run('delete', str(todo['id'])) == 0
+    assert file_ops.read_todos() == []
+
+
+@pytest.mark.parametrize('args', [('complete', '99'), ('delete', '99')])
+def test_unknown_id_fails(data_dir, capsys, args):
+    file_ops.add_todo("Buy milk")
+    assert run(*args) == 1
+    assert "No todo with ID 99" in capsys.readouterr().out
+    assert len(file_ops.read_todos()) == 1
+
+
+@pytest.mark.parametrize('args', [
+    ('complete', 'abc'), ('delete',), ('add',), ('search',), ('stats', 'extra'), ('frobnicate',),
+])
+def test_malformed_commands_print_usage(data_dir, capsys, args):
+    assert run(*args) == 2
+    assert capsys.readouterr().err.startswith("Usage:")
+
+
+def test_show_and_search(data_dir, capsys):
+    file_ops.add_todo("Write report", category="Work")
+    file_ops.add_todo("Buy milk")
+    assert run('show', 'category=Work') == 0
+    out = capsys.readouterr().out
+    assert "Write report" in out and "Buy milk" not in out
+
+    assert run('show', 'order_by=nonsense') == 1
+    assert run('show', 'category') == 1
+    capsys.readouterr()
+    assert run('search', 'milk') == 0
+    assert "Buy milk" in capsys.readouterr().out
+    assert run('search', 'nothing') == 1
+
+
+def test_stats(data_dir, capsys):
+    assert run('stats') == 0
+    assert "No todos available" in capsys.readouterr().out
+    file_ops.update_todo(file_ops.add_todo("Buy milk")['id'], completed=True)
+    file_ops.add_todo("Write report", priority="High")
+    assert run('stats') == 0
+    out = capsys.readouterr().out
+    assert "Total todos: 2" in out and "Completion rate: 50.0%" in out
+
+
+def test_export_and_archive(data_dir, capsys):
+    file_ops.update_todo(file_ops.add_todo("Buy milk")['id'], completed=True)
+    path = data_dir / 'todos.ndjson'
+    assert run('export', str(path)) == 0
+    assert [json.loads(line)['text'] for line in path.read_text().splitlines()] == ["Buy milk"]
+    assert run('export', str(data_dir / 'todos.xml')) == 1
+
+    assert run('archive', 'soon') == 1
+    assert run('archive', '0') == 0
+    assert "Archived 1 completed todos" in capsys.readouterr().out
+    assert file_ops.filter_todos(completed=False) == []
+    assert file_ops.get_stats()['total'] == 1
+
+
+def test_list_option_selects_the_list(data_dir, capsys):
+    assert run('--list', 'work', 'add', 'Write', 'report') == 0
+    assert run('--list=home', 'add', 'Buy milk') == 0
+    file_ops.set_list(file_ops.DEFAULT_LIST)
+    assert file_ops.read_todos() == []
+    with file_ops.use_list('work'):
+        assert [todo['text'] for todo in file_ops.read_todos()] == ["Write report"]
+    capsys.readouterr()
+    assert run('lists') == 0
+    assert capsys.readouterr().out.split() == ["👉", "default", "home", "work"]
+    with pytest.raises(ValueError):
+        cli.select_list(['--list', '../escape', 'lists'])
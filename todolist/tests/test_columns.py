@@ -0,0 +1,61 @@
+from collections import Counter
+from datetime import datetime
+
+import file_ops
+from conftest import restart, populate
+
+
+def recount(todos):
+    """What get_statistics() should report, counted with plain Python"""
+    categories = Counter(todo['category'] for todo in todos)
+    done = Counter(todo['category'] for todo in todos if todo['completed'])
+    days = Counter(datetime.fromisoformat(todo['created_at']).date().isoformat() for todo in todos)
+    return {
+        'total': len(todos),
+        'completed': sum(todo['completed'] for todo in todos),
+        'high_priority': sum(todo['priority'] == 'High' for todo in todos),
+        'by_category': categories,
+        'by_priority': Counter(todo['priority'] for todo in todos),
+        'timeline': days,
+        'completion': {name: (categories[name], done[name]) for name in sorted(categories)},
+    }
+
+
+def summarize(statistics):
+    """get_statistics() in the shape of recount()"""
+    by_category = statistics['by_category']['counts'].tolist()
+    assert by_category == sorted(by_category, reverse=True)
+    completion = statistics['completion']
+    for total, completed, rate in zip(completion['total'], completion['completed'], completion['completion_rate']):
+        assert rate == round(completed / total * 100, 1)
+    return {
+        'total': statistics['total'],
+        'completed': statistics['completed'],
+        'high_priority': statistics['high_priority'],
+        'by_category': Counter(dict(zip(statistics['by_category']['names'], by_category))),
+        'by_priority': Counter(dict(zip(statistics['by_priority']['names'],
+                                        statistics['by_priority']['counts'].tolist()))),
+        'timeline': Counter(dict(zip(statistics['timeline']['dates'].astype(str).tolist(),
+                                     statistics['timeline']['counts'].tolist()))),
+        'completion': {name: (total, completed) for name, total, completed in
+                       zip(completion['categories'], completion['total'].tolist(), completion['completed'].tolist())},
+    }
+
+
+def test_statistics_match_a_recount_as_the_todos_change(data_dir, monkeypatch):
+    populate(200)
+    assert summarize(file_ops.get_statistics()) == recount(file_ops.read_todos())
+
+    todos = file_ops.read_todos()
+    for todo in todos[:40]:
+        file_ops.update_todo(todo['id'], category="Garden", priority="High", completed=not todo['completed'])
+    file_ops.bulk_delete(todo['id'] for todo in todos[40:70])
+    file_ops.add_todo("new one", category="Garden")
+    assert summarize(file_ops.get_statistics()) == recount(file_ops.read_todos())
+
+    # The archive's columns are merged in, whichever of its categories the hot todos still use
+    assert file_ops.archive_completed(days=0) > 0
+    file_ops.add_todo("after archiving", category="Only hot")
+    assert summarize(file_ops.get_statistics()) == recount(file_ops.read_todos())
+    restart(monkeypatch)
+    assert summarize(file_ops.get_statistics()) == recount(file_ops.read_todos())
@@ -0,0 +1,63 @@
+import io
+import csv
+import json
+
+import pytest
+
+import file_ops
+from models import FIELDS
+from conftest import populate
+
+
+def exported(fmt: str, chunk_size: int) -> str:
+    return ''.join(file_ops.iter_export(fmt, chunk_size))
+
+
+def test_csv_export_imports_back_unchanged(data_dir):
+    populate(25)
+    file_ops.update_todo(1, text='Quote " and, comma\nnew line', due_date=None)
+    path = data_dir / 'todos.csv'
+    assert file_ops.export_todos(str(path), chunk_size=4) == 'csv'
+    rows = list(csv.reader(io.StringIO(path.read_text(encoding='utf-8'))))
+    assert rows[0] == list(FIELDS)
+    assert len(rows) == 26
+
+    original = [todo.to_dict() for todo in file_ops.read_todos()]
+    with file_ops.use_list('copy'):
+        report = file_ops.import_todos(str(path), mode='replace')
+        assert (report['imported'], report['rejected']) == (25, 0)
+        assert [todo.to_dict() for todo in file_ops.read_todos()] == original
+
+
+@pytest.mark.parametrize('fmt', ['json', 'ndjson'])
+def test_json_exports_load_back_unchanged(data_dir, fmt):
+    populate(25)
+    original = [todo.to_dict() for todo in file_ops.read_todos()]
+    text = exported(fmt, chunk_size=4)
+    todos = json.loads(text) if fmt == 'json' else [json.loads(line) for line in text.splitlines()]
+    assert todos == original
+    with file_ops.use_list('copy'):
+        file_ops.write_todos(todos)
+        assert [todo.to_dict() for todo in file_ops.read_todos()] == original
+
+
+@pytest.mark.parametrize('fmt, expected', [
+    ('csv', ','.join(FIELDS) + '\n'), ('ndjson', ''), ('json', '[\n]\n'),
+])
+def test_empty_exports_are_well_formed(data_dir, fmt, expected):
+    assert exported(fmt, chunk_size=4) == expected
+
+
+def test_archived_todos_are_exported_last(data_dir):
+    populate(10)
+    file_ops.archive_completed(days=0)
+    ids = [todo['id'] for todo in json.loads(exported('json', chunk_size=3))]
+    assert ids == [todo['id'] for todo in file_ops.read_todos()]
+    assert sorted(ids) == list(range(1, 11))
+
+
+def test_unknown_format_is_refused(data_dir):
+    with pytest.raises(ValueError):
+        file_ops.export_todos(str(data_dir / 'todos.xml'))
+    with pytest.raises(ValueError):
+        list(file_ops.iter_export('xml'))
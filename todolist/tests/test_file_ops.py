@@ -0,0 +1,92 @@
+import json
+
+import archive
+import file_ops
+from store import TodoStore
+from conftest import restart, new_todo, populate, ORDERED_QUERIES
+
+
+def test_todos_round_trip_through_a_new_process(data_dir, monkeypatch):
+    first = file_ops.add_todo("Buy milk", category="Shopping")
+    second = file_ops.add_todo("Write report", priority="High")
+    file_ops.update_todo(first['id'], completed=True)
+    restart(monkeypatch)
+    todos = file_ops.read_todos()
+    assert [(todo['id'], todo['text'], todo['completed']) for todo in todos] == [
+        (first['id'], "Buy milk", True), (second['id'], "Write report", False)]
+    assert file_ops.get_stats()['completed'] == 1
+
+
+def test_legacy_text_file_is_migrated(data_dir):
+    (data_dir / 'todos.txt').write_text("Buy milk\n\nWalk the dog\n")
+    assert [todo['text'] for todo in file_ops.read_todos()] == ["Buy milk", "Walk the dog"]
+    assert (data_dir / 'todos.txt.backup').exists()
+
+
+def test_transaction_changes_archived_todos(data_dir, monkeypatch):
+    ids = [file_ops.add_todo(text)['id'] for text in ("one", "two", "three")]
+    for todo_id in ids[:2]:
+        file_ops.update_todo(todo_id, completed=True)
+    assert file_ops.archive_completed(days=0) == 2
+    with file_ops.transaction() as batch:
+        batch.update(ids[0], text="edited", completed=False)
+        batch.delete(ids[1])
+    restart(monkeypatch)
+    assert file_ops.get_todo_by_id(ids[0])['text'] == "edited"
+    assert file_ops.get_todo_by_id(ids[1]) is None
+    assert sorted(todo['id'] for todo in file_ops.filter_todos(completed=False)) == [ids[0], ids[2]]
+    assert file_ops.get_stats()['total'] == 2
+
+
+def test_lists_keep_their_todos_apart(data_dir):
+    file_ops.add_todo("on the default list")
+    export = data_dir / 'work.ndjson'
+    with file_ops.use_list('work'):
+        file_ops.add_todo("on the work list")
+        file_ops.export_todos(str(export))
+    assert file_ops.get_lists() == [file_ops.DEFAULT_LIST, 'work']
+    assert [todo['text'] for todo in file_ops.read_todos()] == ["on the default list"]
+    assert [json.loads(line)['text'] for line in export.read_text().splitlines()] == ["on the work list"]
+
+
+def test_archiving_leaves_query_results_unchanged(data_dir, monkeypatch):
+    populate()
+    before = [file_ops.query(query) for query in ORDERED_QUERIES]
+    stats = file_ops.get_stats()
+    assert file_ops.archive_completed(days=0) == stats['completed']
+    restart(monkeypatch)
+    assert [file_ops.query(query) for query in ORDERED_QUERIES] == before
+    assert file_ops.get_stats() == stats
+    assert file_ops.query(completed=False)[1] == stats['pending']
+
+
+def test_stats_use_the_saved_archive_totals_until_the_archive_changes(data_dir, monkeypatch):
+    ids = [file_ops.add_todo(text, category="Home")['id'] for text in ("one", "two", "three")]
+    for todo_id in ids[:2]:
+        file_ops.update_todo(todo_id, completed=True)
+    file_ops.archive_completed(days=0)
+    stats = file_ops.get_stats()
+    restart(monkeypatch)
+    assert file_ops.get_stats() == stats
+    assert file_ops._archives == {}
+
+    # Another process changes the archive, so its saved totals are out of date
+    other = TodoStore(archive.archive_path(file_ops.filepath), journal=True)
+    other.delete(ids[0])
+    assert file_ops.get_stats()['total'] == 2
+    restart(monkeypatch)
+    assert file_ops.get_stats()['completed'] == 1
+    assert file_ops._archives == {}
+
+
+def test_revision_moves_on_changes_from_another_process(data_dir, monkeypatch):
+    file_ops.add_todo("one")
+    revision, version = file_ops.get_revision(), file_ops.get_version()
+    TodoStore(file_ops.filepath).add(new_todo("from another process"))
+    assert file_ops.get_revision() > revision
+    assert file_ops.get_version() != version
+
+    # The version describes the files, so a new process reports the same one
+    version = file_ops.get_version()
+    restart(monkeypatch)
+    assert file_ops.get_version() == version
@@ -0,0 +1,81 @@
+import io
+
+import pytest
+
+import file_ops
+from importer import CsvImporter
+from conftest import restart
+
+
+def texts():
+    return sorted(todo['text'] for todo in file_ops.read_todos())
+
+
+def test_rows_written_by_pandas_are_normalized(data_dir):
+    # pandas writes NaN/NaT for empty cells and floats for an int column holding NaNs
+    csv_file = io.StringIO(
+        "id,text,completed,created_at,category,priority,due_date,notes\n"
+        "3.0,Buy milk,yes,2024-01-02T10:00:00,Shopping,high,2024-02-01T00:00:00,ignored\n"
+        "nan,Walk the dog,NaN,NaT,nan,LOW,NaT,\n"
+        ",Pay rent,False,,, ,,\n")
+    todos = [todo for chunk in CsvImporter(csv_file).chunks() for todo in chunk]
+    assert [(todo['id'], todo['completed'], todo['category'], todo['priority'], todo['due_date'])
+            for todo in todos] == [
+        (3, True, "Shopping", "High", '2024-02-01'),
+        (None, False, "General", "Low", None),
+        (None, False, "General", "Medium", None),
+    ]
+    assert todos[0]['created_at'] == '2024-01-02T10:00:00'
+    assert 'notes' not in todos[0]
+
+
+def test_invalid_rows_are_rejected_with_their_line_numbers(data_dir):
+    path = data_dir / 'import.csv'
+    path.write_text("text,completed,priority,id,due_date\n"
+                    "Good one,no,Medium,,\n"
+                    "Bad flag,maybe,Medium,,\n"
+                    ",no,Medium,,\n"
+                    "Bad priority,no,Urgent,,\n"
+                    "Bad id,no,Medium,2.5,\n"
+                    "Bad date,no,Medium,,tomorrow\n"
+                    "Good two,1,low,,2024-03-04\n", encoding='utf-8')
+    report = file_ops.import_todos(str(path))
+    assert (report['rows'], report['imported'], report['rejected']) == (7, 2, 5)
+    assert [line for line, _ in report['errors']] == [3, 4, 5, 6, 7]
+    assert "invalid completed value 'maybe'" in report['errors'][0][1]
+    assert texts() == ["Good one", "Good two"]
+
+
+def test_file_without_a_text_column_leaves_the_todos_alone(data_dir, monkeypatch):
+    file_ops.add_todo("keep me")
+    with pytest.raises(ValueError, match="'text' column"):
+        file_ops.import_todos(io.StringIO("title,completed\nnope,no\n"), mode='replace')
+    restart(monkeypatch)
+    assert texts() == ["keep me"]
+
+
+@pytest.mark.parametrize('mode, expected', [
+    ('append', ["first", "first again", "second", "third"]),
+    ('upsert', ["first again", "second", "third"]),
+    ('replace', ["first again", "third"]),
+])
+def test_import_modes(data_dir, monkeypatch, mode, expected):
+    first = file_ops.add_todo("first")
+    file_ops.add_todo("second")
+    csv_bytes = io.BytesIO(f"id,text\n{first['id']},first again\n,third\n".encode('utf-8-sig'))
+    report = file_ops.import_todos(csv_bytes, mode=mode, chunk_size=1)
+    assert report['imported'] == 2
+    restart(monkeypatch)
+    assert texts() == expected
+    ids = [todo['id'] for todo in file_ops.read_todos()]
+    assert len(set(ids)) == len(ids)
+    assert file_ops.add_todo("next")['id'] > max(ids)
+
+
+def test_upsert_replaces_an_archived_todo(data_dir, monkeypatch):
+    done = file_ops.add_todo("done")
+    file_ops.update_todo(done['id'], completed=True)
+    assert file_ops.archive_completed(days=0) == 1
+    file_ops.import_todos(io.StringIO(f"id,text\n{done['id']},reopened\n"), mode='upsert')
+    restart(monkeypatch)
+    assert [(todo['text'], todo['completed']) for todo in file_ops.read_todos()] == [("reopened", False)]
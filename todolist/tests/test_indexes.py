@@ -0,0 +1,56 @@
+import random
+
+import file_ops
+from indexes import TodoIndexes
+from store import TodoStore
+from conftest import new_todo
+
+
+def test_editing_a_todo_keeps_its_place(data_dir):
+    ids = [file_ops.add_todo(f"todo {n}", category="Work")['id'] for n in range(4)]
+    file_ops.update_todo(ids[0], text="edited", priority="High", due_date='2024-01-01')
+    assert [todo['id'] for todo in file_ops.get_todos_by_category("Work")] == ids
+    assert [todo['id'] for todo in file_ops.filter_todos(completed=False)] == ids
+    assert [todo['id'] for todo in file_ops.search_todos("edited")] == [ids[0]]
+    assert [todo['id'] for todo in file_ops.get_todos_by_due_date('2024-01-01', '2024-01-01')] == [ids[0]]
+
+
+def index_state(indexes: TodoIndexes):
+    """Everything the indexes hold; a todo moved to another bucket goes last in it, so id sets are compared as sets"""
+    return (
+        {key: set(ids) for key, ids in indexes.by_category.items()},
+        {key: set(ids) for key, ids in indexes.by_priority.items()},
+        set(indexes.completed), set(indexes.pending), indexes.by_due_date,
+        indexes.text.postings, indexes.text.vocabulary,
+    )
+
+
+def test_indexes_kept_in_step_match_a_rebuild(tmp_path):
+    rng = random.Random(5)
+    store = TodoStore(str(tmp_path / 'todos.json'))
+    for n in range(100):
+        store.add(new_todo(f"task {n} {rng.choice(['alpha', 'beta', 'gamma'])}",
+                           category=rng.choice(['Work', 'Home', 'Errands']),
+                           due_date=rng.choice([None, '2024-05-01', '2024-06-15'])))
+    ids = [todo['id'] for todo in store.load()]
+    for _ in range(300):
+        todo_id = rng.choice(ids)
+        field, value = rng.choice([
+            ('text', f"renamed {rng.choice(['alpha', 'delta'])}"),
+            ('category', rng.choice(['Work', 'Home', 'Errands'])),
+            ('priority', rng.choice(['High', 'Medium', 'Low'])),
+            ('completed', rng.random() < 0.5),
+            ('due_date', rng.choice([None, '', '2024-05-01', '2024-07-04'])),
+        ])
+        store.update(todo_id, {field: value})
+    for todo_id in rng.sample(ids, 10):
+        # An add with a taken id replaces that todo
+        replacement = new_todo(f"replaced {todo_id}", category='Home', due_date='2024-06-15')
+        replacement['id'] = todo_id
+        store.add(replacement)
+    for todo_id in rng.sample(ids, 10):
+        store.delete(todo_id)
+
+    rebuilt = TodoIndexes()
+    rebuilt.rebuild(store.load())
+    assert index_state(store.indexes) == index_state(rebuilt)
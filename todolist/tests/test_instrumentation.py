@@ -0,0 +1,99 @@
+import json
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import file_ops
+import instrumentation
+from conftest import new_todo
+
+
+@pytest.fixture
+def recording(monkeypatch):
+    """Record from a clean slate, and stop again afterwards"""
+    monkeypatch.setattr(instrumentation, 'ENABLED', True)
+    monkeypatch.setattr(instrumentation, 'LOG_PATH', None)
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
+
+
+def calls():
+    return instrumentation.snapshot()['calls']
+
+
+def test_calls_and_errors_are_counted(recording):
+    @instrumentation.instrumented('test.divide')
+    def divide(a, b):
+        return a / b
+
+    assert divide(6, 3) == 2
+    with pytest.raises(ZeroDivisionError):
+        divide(1, 0)
+    stats = calls()['test.divide']
+    assert (stats['calls'], stats['errors']) == (2, 1)
+    assert stats['max_ms'] >= stats['p50_ms'] >= 0
+
+
+def test_generator_time_excludes_the_consumer(recording):
+    @instrumentation.instrumented('test.produce')
+    def produce():
+        for n in range(3):
+            time.sleep(0.01)
+            yield n
+
+    for _ in produce():
+        time.sleep(0.05)
+    stats = calls()['test.produce']
+    assert stats['calls'] == 1
+    assert 30 <= stats['total_ms'] < 120
+
+
+def test_context_manager_time_covers_the_with_block(recording):
+    @instrumentation.instrumented('test.block')
+    @contextmanager
+    def block():
+        instrumentation.add_bytes(read=5)
+        yield 'value'
+
+    with block() as value:
+        time.sleep(0.05)
+        instrumentation.add_bytes(written=7)
+    assert value == 'value'
+    stats = calls()['test.block']
+    assert (stats['calls'], stats['bytes_read'], stats['bytes_written']) == (1, 5, 7)
+    assert stats['total_ms'] >= 50
+
+    with pytest.raises(KeyError):
+        with block():
+            raise KeyError('x')
+    assert calls()['test.block']['errors'] == 1
+
+
+def test_file_ops_transaction_is_timed_with_its_writes(data_dir, recording):
+    with file_ops.transaction() as batch:
+        batch.add(new_todo("Buy milk"))
+    stats = calls()['file_ops.transaction']
+    assert stats['calls'] == 1
+    assert stats['bytes_written'] > 0
+
+
+def test_disabled_instrumentation_records_nothing(data_dir, monkeypatch):
+    monkeypatch.setattr(instrumentation, 'ENABLED', False)
+    instrumentation.reset()
+    with file_ops.use_list('work'):
+        file_ops.add_todo("Buy milk")
+    assert calls() == {}
+
+
+def test_metrics_are_exported_and_logged(data_dir, recording, monkeypatch):
+    log = data_dir / 'metrics.log'
+    monkeypatch.setattr(instrumentation, 'LOG_PATH', str(log))
+    file_ops.add_todo("Buy milk")
+    path = data_dir / 'metrics.json'
+    instrumentation.export_metrics(str(path))
+    exported = json.loads(path.read_text())
+    assert exported['enabled'] is True
+    assert exported['calls']['file_ops.add_todo']['calls'] == 1
+    assert {json.loads(line)['name'] for line in log.read_text().splitlines()} >= {'file_ops.add_todo'}
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+import pytest
+
+from models import Todo
+
+
+@pytest.mark.parametrize('value', [
+    '2024-05-01T10:00:00.000000',
+    '2024-W18-3T10:00:00.123456',
+    '2024-05-01 10:00:00',
+    'yesterday',
+])
+def test_timestamps_that_would_not_round_trip_are_kept(value):
+    todo = Todo(1, "Buy milk", created_at=value)
+    assert todo['created_at'] == value
+    assert Todo.from_dict(todo.to_dict())['created_at'] == value
+
+
+def test_timestamps_are_held_as_datetimes():
+    now = datetime.now().replace(microsecond=123456)
+    todo = Todo(1, "Buy milk", created_at=now.isoformat())
+    assert todo.created == now
+    assert todo['created_at'] == now.isoformat()
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+import snapshot
+from store import TodoStore
+from conftest import new_todo
+
+
+@pytest.mark.parametrize('fmt', ['json', 'binary'])
+def test_snapshot_round_trip(fmt):
+    todos = [new_todo("Buy milk", category="Shopping", due_date='2024-06-01'), new_todo("Ünïcode ✓")]
+    for todo_id, todo in enumerate(todos, 1):
+        todo['id'] = todo_id
+    todos[1]['note'] = "kept as an extra key"
+    assert snapshot.decode(snapshot.encode(todos, 7, fmt)) == (todos, 7)
+
+
+@pytest.mark.parametrize('data', [
+    b'\xef\xbb\xbf{"next_id": 2, "todos": []}',
+    b'Buy milk\nWalk the dog\n',
+    b'\x00\x13\x7fgarbage',
+])
+def test_unrecognised_snapshot_is_quarantined(tmp_path, data):
+    path = tmp_path / 'todos.json'
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        snapshot.decode(data)
+    assert TodoStore(str(path)).load() == []
+    backups = [name for name in os.listdir(tmp_path) if name.startswith('todos.json.corrupt-')]
+    assert len(backups) == 1
+    assert (tmp_path / backups[0]).read_bytes() == data
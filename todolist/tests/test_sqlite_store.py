@@ -0,0 +1,50 @@
+import file_ops
+from conftest import restart, populate, ORDERED_QUERIES
+
+
+def test_migration_does_not_bring_back_deleted_todos(data_dir, monkeypatch):
+    for text in ("one", "two", "three"):
+        file_ops.add_todo(text)
+    file_ops.set_backend('sqlite')
+    assert file_ops.get_stats()['total'] == 3
+
+    file_ops.bulk_delete([todo['id'] for todo in file_ops.read_todos()])
+    restart(monkeypatch)
+    assert file_ops.read_todos() == []
+    assert file_ops.migrate_to_sqlite() == 0
+
+
+def test_migration_copies_archived_todos(data_dir):
+    ids = [file_ops.add_todo(text)['id'] for text in ("one", "two", "three")]
+    file_ops.update_todo(ids[0], completed=True)
+    assert file_ops.archive_completed(days=0) == 1
+    file_ops.set_backend('sqlite')
+    assert file_ops.get_stats()['total'] == 3
+    assert file_ops.get_todo_by_id(ids[0])['completed'] is True
+    assert file_ops.add_todo("four")['id'] == 4
+
+
+def test_sqlite_answers_queries_like_the_json_store(data_dir):
+    populate()
+    expected = [file_ops.query(query) for query in ORDERED_QUERIES]
+    stats = file_ops.get_stats()
+    file_ops.set_backend('sqlite')
+    assert [file_ops.query(query) for query in ORDERED_QUERIES] == expected
+    assert file_ops.get_stats() == stats
+
+
+SEARCHES = ["report", "rep", "write rep", "cafe", "Café", "naïve", "bar", "2024", "nothing here"]
+
+
+def test_search_matches_the_same_todos_on_both_backends(data_dir):
+    for text in ("Write report", "Report on the report", "Reply to Renée", "Meet at the café",
+                 "Naive plan", "foo_bar cleanup", "Cafeteria menu", "Q1 2024 numbers"):
+        file_ops.add_todo(text)
+    expected = {search: file_ops.search_todos(search) for search in SEARCHES}
+    file_ops.set_backend('sqlite')
+    for search, todos in expected.items():
+        # Ranking differs by backend (exact-word scoring against bm25), the matches do not
+        assert sorted(todo['id'] for todo in file_ops.search_todos(search)) == sorted(todo['id'] for todo in todos)
+    assert [todo['text'] for todo in expected["cafe"]] == ["Meet at the café", "Cafeteria menu"]
+    assert [todo['text'] for todo in expected["report"]] == ["Report on the report", "Write report"]
+    assert [todo['text'] for todo in expected["bar"]] == ["foo_bar cleanup"]
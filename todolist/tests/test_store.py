@@ -0,0 +1,72 @@
+import pytest
+
+import snapshot
+import store as store_module
+from store import TodoStore, ConcurrentModificationError
+from conftest import new_todo
+
+
+def test_compaction_keeps_records_another_process_appended(tmp_path, monkeypatch):
+    path = str(tmp_path / 'todos.json')
+    monkeypatch.setattr(store_module, 'COMPACT_EVERY', 10 ** 9)
+    compacting, other = TodoStore(path, journal=True), TodoStore(path, journal=True)
+    for n in range(5):
+        compacting.add(new_todo(f"todo {n}"))
+    encode = snapshot.encode
+
+    def encode_while_another_process_writes(*args):
+        # The snapshot is encoded without the lock held
+        other.add(new_todo("added during compaction"))
+        return encode(*args)
+
+    monkeypatch.setattr(snapshot, 'encode', encode_while_another_process_writes)
+    compacting.compact()
+    monkeypatch.setattr(snapshot, 'encode', encode)
+
+    assert compacting.get(6)['text'] == "added during compaction"
+    assert compacting.add(new_todo("added after compaction"))['id'] == 7
+    todos = TodoStore(path).load()
+    assert sorted(todo['id'] for todo in todos) == [1, 2, 3, 4, 5, 6, 7]
+
+
+def test_write_behind_renumbers_adds_whose_id_another_process_took(tmp_path, monkeypatch):
+    path = str(tmp_path / 'todos.json')
+    # Nothing is flushed in the background during the test
+    monkeypatch.setattr(store_module, 'WRITE_BEHIND_DELAY', 3600)
+    held, other = TodoStore(path, write_behind=True), TodoStore(path)
+    mine = held.add(new_todo("held back"))
+    held.update(mine['id'], {'completed': True})
+    theirs = other.add(new_todo("written at once"))
+    assert mine['id'] == theirs['id'] == 1
+
+    assert held.flush() == 2
+    assert mine['id'] == 2
+    todos = {todo['id']: todo for todo in TodoStore(path).load()}
+    assert (todos[1]['text'], todos[1]['completed']) == ("written at once", False)
+    assert (todos[2]['text'], todos[2]['completed']) == ("held back", True)
+    assert held.next_id == other.next_id == 3
+
+
+def test_journal_replay_skips_a_torn_record(tmp_path):
+    path = str(tmp_path / 'todos.json')
+    writer = TodoStore(path, journal=True)
+    first = writer.add(new_todo("first"))
+    writer.update(first['id'], {'completed': True})
+    with open(writer.log_filename, 'a') as log:
+        # An append interrupted by a crash
+        log.write('{"op":"add","todo":{"id":9')
+
+    reader = TodoStore(path, journal=True)
+    assert [(todo['text'], todo['completed']) for todo in reader.load()] == [("first", True)]
+    reader.add(new_todo("second"))
+    assert [todo['text'] for todo in TodoStore(path).load()] == ["first", "second"]
+
+
+def test_save_based_on_a_stale_version_is_refused(tmp_path):
+    path = str(tmp_path / 'todos.json')
+    first, second = TodoStore(path), TodoStore(path)
+    stale = second.version
+    first.add(new_todo("added meanwhile"))
+    with pytest.raises(ConcurrentModificationError):
+        second.save([], expected_version=stale)
+    assert [todo['text'] for todo in TodoStore(path).load()] == ["added meanwhile"]
@@ -0,0 +1,10 @@
+import pytest
+
+from benchmarks import stress_writers
+
+
+@pytest.mark.parametrize('mode', ['snapshot', 'journal'])
+def test_concurrent_writers_lose_nothing(mode, tmp_path, monkeypatch):
+    # In journal mode the log is compacted every few appends while the other workers keep writing
+    monkeypatch.setattr(stress_writers, 'COMPACT_EVERY', 20)
+    assert stress_writers.run(mode, workers=4, ops=60, directory=str(tmp_path))
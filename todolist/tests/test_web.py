@@ -0,0 +1,67 @@
+import gc
+import os
+
+from streamlit.testing.v1 import AppTest
+
+import file_ops
+
+WEB_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'web.py')
+
+
+def test_export_covers_the_selected_list(data_dir):
+    file_ops.add_todo("on the default list")
+    with file_ops.use_list('work'):
+        file_ops.add_todo("on the work list")
+    app = AppTest.from_file(WEB_APP, default_timeout=30)
+    app.session_state.todo_list = 'work'
+    app.session_state.current_page = "Settings"
+    app.run()
+    # Button callbacks run before the script body selects the session's list
+    prepare_export(app)
+    with open(app.session_state.export.path, encoding='utf-8') as file:
+        exported = file.read()
+    assert "on the work list" in exported
+    assert "on the default list" not in exported
+
+
+def prepare_export(app: AppTest):
+    next(button for button in app.button if button.label == "📦 Prepare export").click().run()
+
+
+def test_export_files_are_removed_with_their_session(data_dir):
+    file_ops.add_todo("Buy milk")
+    app = AppTest.from_file(WEB_APP, default_timeout=30)
+    app.session_state.current_page = "Settings"
+    app.run()
+    prepare_export(app)
+    first = app.session_state.export.path
+    prepare_export(app)
+    second = app.session_state.export.path
+    assert not os.path.exists(first)
+    assert os.path.exists(second)
+
+    del app
+    gc.collect()
+    assert not os.path.exists(second)
+
+
+def test_default_page_leaves_the_archive_unread(data_dir):
+    file_ops.add_todo("pending", category="Work")
+    done = file_ops.add_todo("done long ago", category="Taxes")
+    file_ops.update_todo(done['id'], completed=True)
+    assert file_ops.archive_completed(days=0) == 1
+    file_ops._archives.clear()
+    app = AppTest.from_file(WEB_APP, default_timeout=30)
+    app.run()
+    assert not app.exception
+    assert file_ops._archives == {}
+    # The stats cards still count the archived todo
+    assert '<h3>2</h3>' in app.markdown[2].value
+    assert "Taxes" not in category_options(app)
+
+    next(box for box in app.sidebar.checkbox if box.label == "Show completed").check().run()
+    assert "Taxes" in category_options(app)
+
+
+def category_options(app: AppTest):
+    return next(box for box in app.sidebar.selectbox if box.label == "Category").options
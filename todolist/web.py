@@ -1,9 +1,11 @@
+import os
+import json
+import weakref
+import tempfile
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, date
 import file_ops
+import instrumentation
 from typing import List, Dict
 
 # Page configuration
@@ -98,39 +100,123 @@ def init_session_state():
         st.session_state.filter_priority = "All"
     if 'show_completed' not in st.session_state:
         st.session_state.show_completed = False
+    if 'page' not in st.session_state:
+        st.session_state.page = 0
+    if 'page_size' not in st.session_state:
+        st.session_state.page_size = PAGE_SIZES[1]
+    if 'todo_list' not in st.session_state:
+        st.session_state.todo_list = file_ops.current_list()
+
+# Sort option label -> field the store orders by
+SORT_OPTIONS = {"Created Date": 'created_at', "Priority": 'priority', "Category": 'category', "Due Date": 'due_date'}
+PAGE_SIZES = [10, 25, 50, 100]
+IMPORT_MODES = {
+    'append': "Append as new todos",
+    'upsert': "Update matching ids",
+    'replace': "Replace all todos"
+}
+
+# Cached results are keyed on the list and its file_ops.get_revision(), which
+# moves on every change to the todos, so they are shared across reruns and
+# sessions and dropped exactly when the data changes. The revision only
+# holds within one process, which is where st.cache_data keeps them.
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_todo_page(todo_list: str, revision: int, query: file_ops.Query):
+    """Run one todo query (a page of the list) for one revision of the data"""
+    # Filtering, sorting and slicing happen in the store, so only this page is copied
+    with file_ops.use_list(todo_list):
+        return file_ops.query(query)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_categories(todo_list: str, revision: int, archived: bool) -> List[str]:
+    with file_ops.use_list(todo_list):
+        return file_ops.get_categories(archived)
 
 def get_filtered_todos():
-    """Get todos based on current filters"""
-    todos = file_ops.read_todos()
-    
-    # Filter by completion status
-    if not st.session_state.show_completed:
-        todos = [todo for todo in todos if not todo['completed']]
-    
-    # Filter by search query
-    if st.session_state.search_query:
-        todos = [todo for todo in todos if st.session_state.search_query.lower() in todo['text'].lower()]
-    
-    # Filter by category
-    if st.session_state.filter_category != "All":
-        todos = [todo for todo in todos if todo.get('category', 'General') == st.session_state.filter_category]
-    
-    # Filter by priority
-    if st.session_state.filter_priority != "All":
-        todos = [todo for todo in todos if todo.get('priority', 'Medium') == st.session_state.filter_priority]
-    
-    return todos
+    """Get the current page of todos for the active filters and sort order, and the match count"""
+    query = file_ops.Query(
+        category=None if st.session_state.filter_category == "All" else st.session_state.filter_category,
+        priority=None if st.session_state.filter_priority == "All" else st.session_state.filter_priority,
+        completed=None if st.session_state.show_completed else False,
+        search=st.session_state.search_query or None,
+        order_by=SORT_OPTIONS[st.session_state.get('sort_by', next(iter(SORT_OPTIONS)))],
+        descending=st.session_state.get('reverse_order', False),
+        limit=st.session_state.page_size
+    )
+    # A different filter, sort order or page size starts again from the first page
+    if st.session_state.get('page_query') != query:
+        st.session_state.page_query = query
+        st.session_state.page = 0
+    page_size = st.session_state.page_size
+    todos, total = load_todo_page(file_ops.current_list(), file_ops.get_revision(),
+                                  query._replace(offset=st.session_state.page * page_size))
+    if not todos and total and st.session_state.page > 0:
+        # The page emptied (e.g. its last todo was deleted): show the last one instead
+        st.session_state.page = (total - 1) // page_size
+        todos, total = load_todo_page(file_ops.current_list(), file_ops.get_revision(),
+                                      query._replace(offset=st.session_state.page * page_size))
+    return todos, total
+
+def turn_page(step: int):
+    st.session_state.page += step
+
+def set_page_size():
+    st.session_state.page_size = st.session_state.page_size_picker
+
+def render_pagination(total: int):
+    """Render previous/next controls and the page size picker"""
+    page_size = st.session_state.page_size
+    pages = max(1, (total + page_size - 1) // page_size)
+    col1, col2, col3, col4 = st.columns([1, 2, 1, 1])
+    with col1:
+        st.button("⬅️ Previous", disabled=st.session_state.page == 0, on_click=turn_page, args=(-1,))
+    with col2:
+        first = st.session_state.page * page_size + 1
+        st.caption(f"Page {st.session_state.page + 1} of {pages} · todos {first}-{min(first + page_size - 1, total)} of {total}")
+    with col3:
+        st.button("Next ➡️", disabled=st.session_state.page >= pages - 1, on_click=turn_page, args=(1,))
+    with col4:
+        st.selectbox("Per page", PAGE_SIZES, index=PAGE_SIZES.index(page_size), key='page_size_picker',
+                     on_change=set_page_size, label_visibility="collapsed")
+
+def get_categories(archived: bool = True):
+    """Get all unique categories; archived=False skips those only archived todos use"""
+    return load_categories(file_ops.current_list(), file_ops.get_revision(), archived)
+
+def switch_list():
+    """Start the newly selected list on its first page, with no todo being edited"""
+    st.session_state.page = 0
+    st.session_state.edit_todo_id = None
 
-def get_categories():
-    """Get all unique categories"""
-    todos = file_ops.read_todos()
-    categories = set([todo.get('category', 'General') for todo in todos])
-    return sorted(list(categories))
+def create_list():
+    """Create the list named in the sidebar and switch to it"""
+    name = st.session_state.new_list_name.strip()
+    try:
+        file_ops.create_list(name)
+    except ValueError as e:
+        st.session_state.list_error = str(e)
+        return
+    st.session_state.todo_list = name
+    st.session_state.new_list_name = ""
+    switch_list()
 
 def render_sidebar():
-    """Render the sidebar with navigation and filters"""
+    """Render the sidebar with list selection, navigation and filters"""
     st.sidebar.title("🎯 Todo App")
     
+    # Each list is stored on its own, so sessions on different lists never wait on each other
+    lists = file_ops.get_lists()
+    if st.session_state.todo_list not in lists:
+        lists.append(st.session_state.todo_list)
+    st.sidebar.selectbox("📋 List", lists, key='todo_list', on_change=switch_list)
+    with st.sidebar.expander("➕ New list"):
+        st.text_input("Name", key='new_list_name', help="Letters, digits, - and _")
+        st.button("Create list", on_click=create_list)
+        error = st.session_state.pop('list_error', None)
+        if error:
+            st.error(error)
+    
     # Navigation
     pages = ["Todo List", "Add Todo", "Statistics", "Settings"]
     st.session_state.current_page = st.sidebar.selectbox("Navigate", pages, index=pages.index(st.session_state.current_page))
@@ -152,9 +238,8 @@ def render_sidebar():
         # Search
         st.session_state.search_query = st.sidebar.text_input("Search todos", value=st.session_state.search_query)
         
-        # Category filter
-        categories = ["All"] + get_categories()
-        st.session_state.filter_category = st.sidebar.selectbox("Category", categories, index=categories.index(st.session_state.filter_category) if st.session_state.filter_category in categories else 0)
+        # Category filter, filled in once Show completed is known
+        category_filter = st.sidebar.container()
         
         # Priority filter
         priorities = ["All", "High", "Medium", "Low"]
@@ -163,6 +248,10 @@ def render_sidebar():
         # Show completed
         st.session_state.show_completed = st.sidebar.checkbox("Show completed", value=st.session_state.show_completed)
         
+        # Categories of archived todos only when completed ones are shown, so the archive stays unread
+        categories = ["All"] + get_categories(archived=st.session_state.show_completed)
+        st.session_state.filter_category = category_filter.selectbox("Category", categories, index=categories.index(st.session_state.filter_category) if st.session_state.filter_category in categories else 0)
+        
         if st.sidebar.button("Clear Filters"):
             st.session_state.search_query = ""
             st.session_state.filter_category = "All"
@@ -228,15 +317,16 @@ def render_todo_item(todo: Dict):
                 st.success("Todo deleted!")
                 st.rerun()
 
+@instrumentation.instrumented('web.render_todo_list')
 def render_todo_list():
     """Render the main todo list page"""
     st.markdown('<h1 class="main-header">📝 My Advanced Todo List</h1>', unsafe_allow_html=True)
     
     # Quick stats
-    all_todos = file_ops.read_todos()
-    total_todos = len(all_todos)
-    completed_todos = len([t for t in all_todos if t['completed']])
-    pending_todos = total_todos - completed_todos
+    stats = file_ops.get_stats()
+    total_todos = stats['total']
+    completed_todos = stats['completed']
+    pending_todos = stats['pending']
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -298,30 +388,23 @@ def render_todo_list():
             
             st.markdown("---")
     
-    # Display todos
-    todos = get_filtered_todos()
+    # Display todos, one page at a time
+    todos, total = get_filtered_todos()
     
     if not todos:
         st.info("🎉 No todos found! Add some tasks or adjust your filters.")
     else:
-        st.subheader(f"📋 Todos ({len(todos)} items)")
-        
-        # Sort options
-        sort_by = st.selectbox("Sort by", ["Created Date", "Priority", "Category", "Due Date"])
-        reverse_order = st.checkbox("Reverse order")
+        st.subheader(f"📋 Todos ({total} items)")
         
-        if sort_by == "Created Date":
-            todos.sort(key=lambda x: x['created_at'], reverse=reverse_order)
-        elif sort_by == "Priority":
-            priority_order = {"High": 3, "Medium": 2, "Low": 1}
-            todos.sort(key=lambda x: priority_order.get(x.get('priority', 'Medium'), 2), reverse=not reverse_order)
-        elif sort_by == "Category":
-            todos.sort(key=lambda x: x.get('category', 'General'), reverse=reverse_order)
-        elif sort_by == "Due Date":
-            todos.sort(key=lambda x: x.get('due_date', '9999-12-31') or '9999-12-31', reverse=reverse_order)
+        # Sort options (read by get_filtered_todos through their keys, so the
+        # store returns the page already sorted)
+        st.selectbox("Sort by", list(SORT_OPTIONS), key='sort_by')
+        st.checkbox("Reverse order", key='reverse_order')
         
         for todo in todos:
             render_todo_item(todo)
+        
+        render_pagination(total)
 
 def render_add_todo():
     """Render the add todo page"""
@@ -353,39 +436,78 @@ def render_add_todo():
             else:
                 st.error("❌ Please enter a todo item!")
 
+@st.cache_data(max_entries=4, show_spinner=False)
+def build_statistics(todo_list: str, revision: int) -> Dict:
+    """Compute the statistics page's metrics, figures and table for one revision of a list"""
+    # Loaded on first use, so workers that never show this page don't pay for them
+    import pandas as pd
+    import plotly.express as px
+    
+    with file_ops.use_list(todo_list):
+        stats = file_ops.get_statistics()
+    
+    category_counts = stats['by_category']
+    fig_category = px.pie(values=category_counts['counts'], names=category_counts['names'], 
+                        title="Distribution by Category")
+    
+    priority_counts = stats['by_priority']
+    colors = {'High': '#dc3545', 'Medium': '#ffc107', 'Low': '#28a745'}
+    fig_priority = px.bar(x=priority_counts['names'], y=priority_counts['counts'],
+                        title="Distribution by Priority",
+                        color=priority_counts['names'],
+                        color_discrete_map=colors)
+    
+    timeline = stats['timeline']
+    fig_timeline = px.line(x=timeline['dates'], y=timeline['counts'], labels={'x': 'date', 'y': 'count'},
+                          title="Todos Created Over Time")
+    
+    completion = stats['completion']
+    completion_by_category = pd.DataFrame({
+        'category': completion['categories'],
+        'total': completion['total'],
+        'completed': completion['completed'],
+        'completion_rate': completion['completion_rate']
+    })
+    
+    return {
+        'total': stats['total'],
+        'completed': stats['completed'],
+        'high_priority': stats['high_priority'],
+        'fig_category': fig_category,
+        'fig_priority': fig_priority,
+        'fig_timeline': fig_timeline,
+        'completion_by_category': completion_by_category
+    }
+
+@instrumentation.instrumented('web.render_statistics')
 def render_statistics():
     """Render the statistics page"""
     st.markdown('<h1 class="main-header">📊 Todo Statistics</h1>', unsafe_allow_html=True)
     
-    todos = file_ops.read_todos()
-    
-    if not todos:
+    # A new list starts empty, and the charts need at least one todo
+    if not file_ops.get_stats()['total']:
         st.info("📈 No data available. Add some todos to see statistics!")
         return
     
-    # Prepare data
-    df = pd.DataFrame(todos)
-    df['created_at'] = pd.to_datetime(df['created_at'])
-    df['category'] = df['category'].fillna('General')
-    df['priority'] = df['priority'].fillna('Medium')
+    stats = build_statistics(file_ops.current_list(), file_ops.get_revision())
+    total = stats['total']
     
     # Key metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Todos", len(todos))
+        st.metric("Total Todos", total)
     
     with col2:
-        completed = len(df[df['completed'] == True])
+        completed = stats['completed']
         st.metric("Completed", completed)
     
     with col3:
-        completion_rate = (completed / len(todos) * 100) if todos else 0
+        completion_rate = (completed / total * 100) if total else 0
         st.metric("Completion Rate", f"{completion_rate:.1f}%")
     
     with col4:
-        high_priority = len(df[df['priority'] == 'High'])
-        st.metric("High Priority", high_priority)
+        st.metric("High Priority", stats['high_priority'])
     
     st.markdown("---")
     
@@ -394,37 +516,99 @@ def render_statistics():
     
     with col1:
         st.subheader("📊 Todos by Category")
-        category_counts = df['category'].value_counts()
-        fig_category = px.pie(values=category_counts.values, names=category_counts.index, 
-                            title="Distribution by Category")
-        st.plotly_chart(fig_category, use_container_width=True)
+        st.plotly_chart(stats['fig_category'], use_container_width=True)
     
     with col2:
         st.subheader("🔥 Todos by Priority")
-        priority_counts = df['priority'].value_counts()
-        colors = {'High': '#dc3545', 'Medium': '#ffc107', 'Low': '#28a745'}
-        fig_priority = px.bar(x=priority_counts.index, y=priority_counts.values,
-                            title="Distribution by Priority",
-                            color=priority_counts.index,
-                            color_discrete_map=colors)
-        st.plotly_chart(fig_priority, use_container_width=True)
+        st.plotly_chart(stats['fig_priority'], use_container_width=True)
     
     # Timeline
     st.subheader("📈 Todo Creation Timeline")
-    df['date'] = df['created_at'].dt.date
-    daily_counts = df.groupby('date').size().reset_index(name='count')
-    fig_timeline = px.line(daily_counts, x='date', y='count', 
-                          title="Todos Created Over Time")
-    st.plotly_chart(fig_timeline, use_container_width=True)
+    st.plotly_chart(stats['fig_timeline'], use_container_width=True)
     
     # Completion analysis
     st.subheader("✅ Completion Analysis")
-    completion_by_category = df.groupby('category')['completed'].agg(['count', 'sum']).reset_index()
-    completion_by_category['completion_rate'] = (completion_by_category['sum'] / completion_by_category['count'] * 100).round(1)
-    completion_by_category = completion_by_category.rename(columns={'count': 'total', 'sum': 'completed'})
+    st.dataframe(stats['completion_by_category'], use_container_width=True)
+
+def remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class ExportFile:
+    """A temporary export file, removed when replaced or when the session holding it ends"""
+    
+    def __init__(self, fmt: str):
+        fd, self.path = tempfile.mkstemp(prefix='todos_export_', suffix=f'.{fmt}')
+        os.close(fd)
+        self.format = fmt
+        self.name = f"todos_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+        # Runs once this object is garbage collected with its session state, or at exit
+        self.remove = weakref.finalize(self, remove_file, self.path)
+
+def prepare_export(fmt: str):
+    """Stream an export of the session's list into a temporary file, replacing the previous one"""
+    old = st.session_state.pop('export', None)
+    if old is not None:
+        old.remove()
+    export = ExportFile(fmt)
+    # Callbacks run before main() has selected the session's list
+    with file_ops.use_list(st.session_state.todo_list):
+        file_ops.export_todos(export.path, fmt)
+    st.session_state.export = export
+
+def toggle_instrumentation():
+    """Turn call recording on or off for the whole process"""
+    if st.session_state.instrumentation_enabled:
+        instrumentation.enable()
+    else:
+        instrumentation.disable()
+
+def render_diagnostics():
+    """Render timings recorded by the instrumentation module"""
+    st.subheader("🩺 Diagnostics")
+    st.checkbox(
+        "Record timings",
+        value=instrumentation.ENABLED,
+        key='instrumentation_enabled',
+        on_change=toggle_instrumentation,
+        help="Time every file_ops call and page render, with bytes read and written. "
+             "Can also be switched on with TODO_INSTRUMENT=1."
+    )
     
-    st.dataframe(completion_by_category, use_container_width=True)
+    metrics = instrumentation.snapshot()
+    if not metrics['calls']:
+        st.info("Nothing recorded yet" if instrumentation.ENABLED else "Recording is off")
+        return
+    
+    import pandas as pd
+    
+    # Timings are inclusive: a page includes the file_ops calls it made
+    rows = pd.DataFrame.from_dict(metrics['calls'], orient='index').rename_axis('name').reset_index()
+    pages = rows[rows['name'].str.startswith('web.')]
+    calls = rows[~rows['name'].str.startswith('web.')]
+    number_format = {column: '{:.2f}' for column in ('total_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms')}
+    if not pages.empty:
+        st.markdown("**🖼️ Page renders**")
+        st.dataframe(pages.drop(columns=['bytes_read', 'bytes_written']).style.format(number_format),
+                     hide_index=True, use_container_width=True)
+    if not calls.empty:
+        st.markdown("**🔧 file_ops calls**")
+        st.dataframe(calls.style.format(number_format), hide_index=True, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="📥 Download metrics (JSON)",
+            data=json.dumps(metrics, indent=2),
+            file_name=f"todo_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json"
+        )
+    with col2:
+        st.button("🔄 Reset metrics", on_click=instrumentation.reset)
 
+@instrumentation.instrumented('web.render_settings')
 def render_settings():
     """Render the settings page"""
     st.markdown('<h1 class="main-header">⚙️ Settings & Tools</h1>', unsafe_allow_html=True)
@@ -436,16 +620,19 @@ def render_settings():
     
     with col1:
         st.markdown("**📤 Export Data**")
-        todos = file_ops.read_todos()
-        if todos:
-            df = pd.DataFrame(todos)
-            csv_data = df.to_csv(index=False)
-            st.download_button(
-                label="📥 Download as CSV",
-                data=csv_data,
-                file_name=f"todos_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
-            )
+        if file_ops.get_stats()['total']:
+            # Nothing is generated until asked for; the file is written in chunks
+            export_format = st.selectbox("Format", list(file_ops.EXPORT_FORMATS))
+            st.button("📦 Prepare export", on_click=prepare_export, args=(export_format,))
+            export = st.session_state.get('export')
+            if export is not None and os.path.exists(export.path):
+                with open(export.path, 'rb') as export_file:
+                    st.download_button(
+                        label=f"📥 Download as {export.format.upper()}",
+                        data=export_file,
+                        file_name=export.name,
+                        mime=file_ops.EXPORT_FORMATS[export.format]
+                    )
         else:
             st.info("No todos to export")
     
@@ -454,18 +641,34 @@ def render_settings():
         uploaded_file = st.file_uploader("Upload CSV file", type=['csv'])
         if uploaded_file:
             try:
-                df = pd.read_csv(uploaded_file)
+                import pandas as pd
+                
+                # Only the preview rows are read here; the import streams the file
+                df = pd.read_csv(uploaded_file, nrows=5)
+                uploaded_file.seek(0)
                 st.write("Preview:")
-                st.dataframe(df.head())
+                st.dataframe(df)
                 
+                import_mode = st.radio(
+                    "Import mode",
+                    list(IMPORT_MODES),
+                    format_func=IMPORT_MODES.get,
+                    horizontal=True
+                )
                 if st.button("Import Data"):
-                    # Convert dataframe back to todos format
-                    imported_todos = df.to_dict('records')
-                    file_ops.write_todos(imported_todos)
-                    st.success("Data imported successfully!")
+                    st.session_state.import_report = file_ops.import_todos(uploaded_file, import_mode)
                     st.rerun()
             except Exception as e:
                 st.error(f"Error importing file: {e}")
+        
+        report = st.session_state.pop('import_report', None)
+        if report:
+            st.success(f"Imported {report['imported']} of {report['rows']} rows!")
+            if report['rejected']:
+                st.warning(f"Skipped {report['rejected']} invalid rows")
+                with st.expander("Show skipped rows"):
+                    for line, message in report['errors']:
+                        st.write(f"Line {line}: {message}")
     
     st.markdown("---")
     
@@ -476,33 +679,45 @@ def render_settings():
     
     with col1:
         if st.button("✅ Mark All Complete"):
-            todos = file_ops.read_todos()
-            for todo in todos:
-                if not todo['completed']:
-                    file_ops.update_todo(todo['id'], completed=True)
+            file_ops.bulk_update(lambda todo: not todo['completed'], completed=True)
             st.success("All todos marked as complete!")
             st.rerun()
     
     with col2:
         if st.button("🔄 Mark All Incomplete"):
-            todos = file_ops.read_todos()
-            for todo in todos:
-                if todo['completed']:
-                    file_ops.update_todo(todo['id'], completed=False)
+            file_ops.bulk_update(lambda todo: todo['completed'], completed=False)
             st.success("All todos marked as incomplete!")
             st.rerun()
     
     with col3:
         if st.button("🗑️ Delete Completed", type="secondary"):
-            todos = file_ops.read_todos()
-            for todo in todos:
-                if todo['completed']:
-                    file_ops.delete_todo(todo['id'])
+            completed_ids = [todo['id'] for todo in file_ops.read_todos() if todo['completed']]
+            file_ops.bulk_delete(completed_ids)
             st.success("Completed todos deleted!")
             st.rerun()
     
     st.markdown("---")
     
+    # Archive
+    st.subheader("📦 Archive")
+    st.caption("Archived todos are left out of the pending list, so it stays fast however long the "
+               "history gets. They still appear with \"Show completed\", in statistics and in exports.")
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        archive_days = st.number_input("Completed and created more than (days) ago", min_value=0,
+                                       value=int(file_ops.ARCHIVE_AFTER_DAYS))
+    with col2:
+        st.write("")
+        if st.button("📦 Archive Completed Todos"):
+            moved = file_ops.archive_completed(archive_days)
+            st.success(f"Archived {moved} completed todos!")
+    
+    st.markdown("---")
+    
+    render_diagnostics()
+    
+    st.markdown("---")
+    
     # Danger zone
     st.subheader("⚠️ Danger Zone")
     
@@ -517,18 +732,21 @@ def render_settings():
 
 def main():
     """Main application function"""
-    init_session_state()
-    render_sidebar()
-    
-    # Route to appropriate page
-    if st.session_state.current_page == "Todo List":
-        render_todo_list()
-    elif st.session_state.current_page == "Add Todo":
-        render_add_todo()
-    elif st.session_state.current_page == "Statistics":
-        render_statistics()
-    elif st.session_state.current_page == "Settings":
-        render_settings()
+    with instrumentation.timed('web.rerun'):
+        init_session_state()
+        # Every file_ops call in this run works on the session's list
+        file_ops.set_list(st.session_state.todo_list)
+        render_sidebar()
+        
+        # Route to appropriate page
+        if st.session_state.current_page == "Todo List":
+            render_todo_list()
+        elif st.session_state.current_page == "Add Todo":
+            render_add_todo()
+        elif st.session_state.current_page == "Statistics":
+            render_statistics()
+        elif st.session_state.current_page == "Settings":
+            render_settings()
     
     # Footer
     st.markdown("---")